@@ -10,6 +10,13 @@ REMOVE it when a canonical copy already lives there and the drifted one is
 clean + fully pushed. Dirty/unpushed trees, in-progress ops, worktrees, and
 the harness anchor are FAIL-flagged, never touched.
 
+The read-only probing (origin org, dirtiness, stash, op, worktrees,
+pushed-ness) runs on a bounded thread pool; only the moves and removes
+themselves are serial. Origin, HEAD, stash, op markers and worktrees are read
+straight from the .git files (a small vendored reader shared verbatim with
+repo_status), and the fetch behind the pushed-ness check only runs once the
+local checks pass.
+
 Mutating, but only outside check mode: in check mode it reports the
 would-move / would-remove plan and changes nothing. Returns structured rows;
 the role renders them, mirroring the repo_status / repo_registry split.
@@ -21,6 +28,7 @@ from __future__ import annotations
 import os
 import shutil
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
 from ansible.module_utils.basic import AnsibleModule
 
@@ -41,6 +49,209 @@ def _git(repo, *args):
     return r.returncode, r.stdout.strip()
 
 
+# --- read-only .git metadata ------------------------------------------------
+# Vendored verbatim in repo_status and repo_reconcile (no module_utils, so each
+# module stays individually droppable). Reads the files git itself reads -
+# config, HEAD, loose + packed refs, the stash reflog, op markers, worktrees -
+# so per-repo metadata costs no fork/exec. Anything that needs the object
+# database (ahead/behind, commit dates, status) still goes through `_git`.
+# pylint: disable=duplicate-code
+
+_OP_MARKERS = (
+    ("rebase", ("rebase-merge", "rebase-apply")),
+    ("merge", ("MERGE_HEAD",)),
+    ("cherry-pick", ("CHERRY_PICK_HEAD",)),
+    ("revert", ("REVERT_HEAD",)),
+    ("bisect", ("BISECT_LOG",)),
+)
+
+
+def _git_dirs(repo):
+    """(gitdir, commondir): the per-worktree dir holding HEAD and the op
+    markers, and the shared one holding config, refs, stash and worktrees. A
+    `.git` file (linked worktree, submodule) is followed to its `gitdir:`."""
+    gitdir = os.path.join(repo, ".git")
+    if os.path.isfile(gitdir):
+        try:
+            with open(gitdir, encoding="utf-8") as handle:
+                line = handle.readline().strip()
+        except OSError:
+            line = ""
+        if line.startswith("gitdir:"):
+            gitdir = os.path.normpath(os.path.join(repo, line[len("gitdir:"):].strip()))
+    try:
+        with open(os.path.join(gitdir, "commondir"), encoding="utf-8") as handle:
+            return gitdir, os.path.normpath(os.path.join(gitdir, handle.read().strip()))
+    except OSError:
+        return gitdir, gitdir
+
+
+def _config_value(raw):
+    """A raw config value with quotes, escapes and a trailing comment resolved."""
+    out, quoted, i = [], False, 0
+    while i < len(raw):
+        ch = raw[i]
+        if ch == "\\" and i + 1 < len(raw):
+            out.append({"n": "\n", "t": "\t", "b": "\b"}.get(raw[i + 1], raw[i + 1]))
+            i += 2
+            continue
+        if ch == '"':
+            quoted = not quoted
+        elif ch in "#;" and not quoted:
+            break
+        else:
+            out.append(ch)
+        i += 1
+    return "".join(out).strip()
+
+
+def _parse_config(text):
+    """{(section, subsection): {key: [values]}} from git-config syntax; section
+    and key names lowercased, subsections kept as written. None when the file
+    uses include directives, which this reader does not follow."""
+    lines = []
+    for raw in text.splitlines():
+        # A value ending in an odd run of backslashes continues on the next line.
+        if lines and (len(lines[-1]) - len(lines[-1].rstrip("\\"))) % 2:
+            lines[-1] = lines[-1][:-1] + raw
+        else:
+            lines.append(raw)
+    conf, current = {}, ("", "")
+    for raw in lines:
+        line = raw.strip()
+        if line.startswith("["):
+            close = line.find('"', line.find('"') + 1) if '"' in line else 0
+            end = line.find("]", close)
+            name, _, sub = line[1:end].strip().partition(" ")
+            if sub:
+                sub = sub.strip()[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+            elif "." in name:
+                name, _, sub = name.partition(".")  # legacy [section.subsection]
+                sub = sub.lower()
+            if name.lower() in ("include", "includeif"):
+                return None
+            current = (name.lower(), sub)
+            conf.setdefault(current, {})
+            line = line[end + 1:].strip()
+        if not line or line[0] in "#;":
+            continue
+        key, sep, value = line.partition("=")
+        key = key.split("#")[0].split(";")[0].strip().lower()
+        conf.setdefault(current, {}).setdefault(key, []).append(_config_value(value) if sep else "true")
+    return conf
+
+
+def _read_config(repo):
+    """The repo's own config ({(section, subsection): {key: [values]}}), parsed
+    from the file; `git config` is asked only when the file has includes or
+    can't be read."""
+    _, commondir = _git_dirs(repo)
+    try:
+        with open(os.path.join(commondir, "config"), encoding="utf-8") as handle:
+            conf = _parse_config(handle.read())
+    except (OSError, UnicodeDecodeError):
+        conf = None
+    if conf is not None:
+        return conf
+    conf = {}
+    _, out = _git(repo, "config", "--local", "--includes", "--list", "-z")
+    for entry in out.split("\0"):
+        key, newline, value = entry.partition("\n")
+        section, _, rest = key.partition(".")
+        sub, _, name = rest.rpartition(".")
+        if name:
+            conf.setdefault((section.lower(), sub), {}).setdefault(name.lower(), []).append(
+                value if newline else "true",
+            )
+    return conf
+
+
+def _config_values(conf, section, sub, key):
+    """Every value of `section.sub.key`, in file order."""
+    return conf.get((section, sub), {}).get(key.lower(), [])
+
+
+def _read_refs(repo, prefix):
+    """{refname: sha} for the refs under `prefix` (e.g. "refs/remotes/"), loose
+    over packed as git resolves them; symbolic refs are skipped. None for a
+    reftable repo, whose refs only git can read."""
+    _, commondir = _git_dirs(repo)
+    if os.path.isdir(os.path.join(commondir, "reftable")):
+        return None
+    refs = {}
+    try:
+        with open(os.path.join(commondir, "packed-refs"), encoding="utf-8") as handle:
+            for line in handle:
+                sha, _, name = line.strip().partition(" ")
+                if line[:1] not in ("#", "^") and name.startswith(prefix):
+                    refs[name] = sha
+    except OSError:
+        pass
+    for dirpath, _, filenames in os.walk(os.path.join(commondir, *prefix.strip("/").split("/"))):
+        for fname in filenames:
+            if fname.endswith(".lock"):
+                continue
+            path = os.path.join(dirpath, fname)
+            name = os.path.relpath(path, commondir).replace(os.sep, "/")
+            try:
+                with open(path, encoding="utf-8") as handle:
+                    value = handle.read().strip()
+            except OSError:
+                continue
+            if value.startswith("ref:"):
+                refs.pop(name, None)
+            else:
+                refs[name] = value
+    return refs
+
+
+def _head_branch(repo):
+    """The checked-out branch, "" when HEAD is detached, None when HEAD can't
+    be read here (missing, or a reftable repo's placeholder)."""
+    gitdir, commondir = _git_dirs(repo)
+    if os.path.isdir(os.path.join(commondir, "reftable")):
+        return None
+    try:
+        with open(os.path.join(gitdir, "HEAD"), encoding="utf-8") as handle:
+            head = handle.read().strip()
+    except OSError:
+        return None
+    return head[len("ref: refs/heads/"):] if head.startswith("ref: refs/heads/") else ""
+
+
+def _in_progress_op(repo):
+    """A half-finished git operation (repo-recall's in_progress_op signal)."""
+    gitdir, _ = _git_dirs(repo)
+    for op, names in _OP_MARKERS:
+        if any(os.path.exists(os.path.join(gitdir, m)) for m in names):
+            return op
+    return ""
+
+
+def _stash_count(repo):
+    """Stash entries - one line each in the refs/stash reflog `git stash list` reads."""
+    _, commondir = _git_dirs(repo)
+    try:
+        with open(os.path.join(commondir, "logs", "refs", "stash"), encoding="utf-8", errors="replace") as handle:
+            return sum(1 for line in handle if line.strip())
+    except OSError:
+        return 0
+
+
+def _worktrees(repo):
+    """Linked worktrees (`git worktree list` minus the main one)."""
+    _, commondir = _git_dirs(repo)
+    try:
+        entries = os.listdir(os.path.join(commondir, "worktrees"))
+    except OSError:
+        return 0
+    return sum(1 for e in entries if os.path.isdir(os.path.join(commondir, "worktrees", e)))
+
+
+# pylint: enable=duplicate-code
+# --- end read-only .git metadata --------------------------------------------
+
+
 def _present_repos(root, known_orgs):
     """Every git checkout across the sibling org dirs under the checkout root's
     parent. Mirrors repo_registry / repo_status discovery so the roles agree."""
@@ -60,10 +271,10 @@ def _present_repos(root, known_orgs):
 
 def _origin_org(repo):
     """The org segment of origin's URL (e.g. coilyco-bridge), "" if unparseable."""
-    rc, url = _git(repo, "remote", "get-url", "origin")
-    if rc != 0 or not url:
+    url = next(iter(_config_values(_read_config(repo), "remote", "origin", "url")), "")
+    if not url:
         return ""
-    tail = url.strip()
+    tail = url
     for sep in ("://", "@"):
         if sep in tail:
             tail = tail.split(sep, 1)[1]
@@ -75,81 +286,85 @@ def _origin_org(repo):
     return parts[-2]
 
 
-def _in_progress_op(repo):
-    """A half-finished git operation (repo-recall's in_progress_op signal)."""
-    _, gitdir = _git(repo, "rev-parse", "--git-dir")
-    if not gitdir:
-        return ""
-    base = gitdir if os.path.isabs(gitdir) else os.path.join(repo, gitdir)
-    # pylint: disable=duplicate-code
-    markers = (
-        ("rebase", ("rebase-merge", "rebase-apply")),
-        ("merge", ("MERGE_HEAD",)),
-        ("cherry-pick", ("CHERRY_PICK_HEAD",)),
-        ("revert", ("REVERT_HEAD",)),
-        ("bisect", ("BISECT_LOG",)),
-    )
-    for op, names in markers:
-        if any(os.path.exists(os.path.join(base, m)) for m in names):
-            return op
-    return ""
-
-
-def _worktrees(repo):
-    _, out = _git(repo, "worktree", "list", "--porcelain")
-    return max(0, sum(1 for line in out.splitlines() if line.startswith("worktree ")) - 1)
-
-
 def _relocation_blockers(repo, require_pushed):
     """Reasons it is unsafe to relocate/remove `repo`, empty if safe.
 
     A move preserves history, but the convention is to act only on clean trees,
     so any local state blocks. `require_pushed` adds an unpushed-commits check
     (REMOVE only - deleting a duplicate must never drop commits); it fetches
-    first so the remote-tracking refs are current."""
+    first so the remote-tracking refs are current, but only when every local
+    check passed - a repo already blocked never pays for the network."""
     blockers = []
     _, porcelain = _git(repo, "status", "--porcelain")
     lines = [line for line in porcelain.splitlines() if line]
     if lines:
         blockers.append(f"{len(lines)} uncommitted")
-    _, stash_out = _git(repo, "stash", "list")
-    if [line for line in stash_out.splitlines() if line]:
+    if _stash_count(repo):
         blockers.append("stash")
     if (op := _in_progress_op(repo)):
         blockers.append(f"{op} in progress")
-    _, branch = _git(repo, "rev-parse", "--abbrev-ref", "HEAD")
-    if branch.strip() in ("", "HEAD"):
+    branch = _head_branch(repo)
+    if branch is None:
+        _, branch = _git(repo, "rev-parse", "--abbrev-ref", "HEAD")
+    if branch in ("", "HEAD"):
         blockers.append("detached HEAD")
     if _worktrees(repo):
         blockers.append("worktree(s)")
-    if require_pushed:
+    if require_pushed and not blockers:
         # Unpushed = HEAD reachable from no remote-tracking ref. Branch-agnostic
         # and ancestor-covering (compares HEAD's exact sha). Fetch first.
         _git(repo, "fetch", "--all", "--prune", "--quiet")
         _, on_remote = _git(repo, "branch", "-r", "--contains", "HEAD")
         if not [line for line in on_remote.splitlines() if line.strip()]:
-            blockers.append(f"unpushed commit(s) on {branch.strip()}")
+            blockers.append(f"unpushed commit(s) on {branch}")
     return blockers
 
 
-def _plan(root, known_orgs, check_mode):
+def _needs_pushed(repo, org, correct):
+    """Whether relocating `repo` to `org` is a REMOVE (a canonical copy already
+    exists), which additionally requires its commits to be pushed."""
+    name = os.path.basename(repo)
+    dest = os.path.join(os.path.dirname(os.path.dirname(repo)), org, name)
+    return org in correct.get(name, set()) or os.path.exists(dest)
+
+
+def _probe(repos, origins, correct, parallel):
+    """Relocation blockers for every drifted checkout, probed concurrently:
+    {(repo, require_pushed): blockers}. Read-only - safe to overlap."""
+    jobs = {}
+    for repo in repos:
+        org = origins[repo]
+        if not org or os.path.basename(os.path.dirname(repo)) == org:
+            continue
+        if os.path.basename(repo) in RECONCILE_PIN:
+            continue
+        jobs[(repo, _needs_pushed(repo, org, correct))] = None
+    with ThreadPoolExecutor(max_workers=max(1, parallel)) as pool:
+        futures = {key: pool.submit(_relocation_blockers, *key) for key in jobs}
+        return {key: future.result() for key, future in futures.items()}
+
+
+def _plan(root, known_orgs, check_mode, parallel):
     """Walk every checkout, decide move/remove/skip, and (outside check mode)
-    apply it. Returns (rows, changed)."""
+    apply it. Returns (rows, changed). Probing is concurrent (`_probe`); the
+    decisions and mutations below stay serial and in order."""
     repos = _present_repos(root, known_orgs)
+    origins = {repo: _origin_org(repo) for repo in repos}
     # name -> org dirs already holding a correct-location checkout (parent == org).
     # Drives move (no correct copy yet) vs remove (a canonical copy exists).
     correct = {}
     for repo in repos:
-        org = _origin_org(repo)
+        org = origins[repo]
         if org and os.path.basename(os.path.dirname(repo)) == org:
             correct.setdefault(os.path.basename(repo), set()).add(org)
+    probed = _probe(repos, origins, correct, parallel)
 
     rows = []
     changed = False
     for repo in repos:
         name = os.path.basename(repo)
         cur_org = os.path.basename(os.path.dirname(repo))
-        org = _origin_org(repo)
+        org = origins[repo]
         if not org:
             rows.append({"repo": name, "org": cur_org, "status": "skip", "reason": "no origin remote"})
             continue
@@ -159,34 +374,42 @@ def _plan(root, known_orgs, check_mode):
             rows.append({"repo": name, "org": cur_org, "status": "fail", "dest_org": org,
                          "reason": "harness anchor - relocate manually, then re-run setup.sh"})
             continue
-        dest = os.path.join(os.path.dirname(os.path.dirname(repo)), org, name)
-        has_correct_copy = org in correct.get(name, set())
-
-        if has_correct_copy or os.path.exists(dest):
-            blockers = _relocation_blockers(repo, require_pushed=True)
-            if blockers:
-                rows.append({"repo": name, "org": cur_org, "status": "fail", "dest_org": org,
-                             "reason": f"duplicate of {org}/ but {', '.join(blockers)}"})
-                continue
-            if not check_mode:
-                shutil.rmtree(repo)
-                changed = True
-            rows.append({"repo": name, "org": cur_org, "status": "remove", "dest_org": org})
-        else:
-            blockers = _relocation_blockers(repo, require_pushed=False)
-            if blockers:
-                rows.append({"repo": name, "org": cur_org, "status": "fail", "dest_org": org,
-                             "reason": ", ".join(blockers)})
-                continue
-            if not check_mode:
-                os.makedirs(os.path.dirname(dest), exist_ok=True)
-                shutil.move(repo, dest)
+        row = _relocate(repo, org, correct, probed, check_mode)
+        rows.append(row)
+        if row["status"] != "fail" and not check_mode:
+            changed = True
+            if row["status"] == "move":
                 correct.setdefault(name, set()).add(org)
-                changed = True
-            rows.append({"repo": name, "org": cur_org, "status": "move", "dest_org": org})
     return rows, changed
 
 
+def _relocate(repo, org, correct, probed, check_mode):
+    """The row for one drifted checkout: FAIL when blocked, else remove it (a
+    canonical copy exists) or move it to <parent>/<org>/<name> - for real only
+    outside check mode."""
+    remove = _needs_pushed(repo, org, correct)
+    blockers = probed.get((repo, remove))
+    if blockers is None:
+        # An earlier move this pass turned a would-move into a remove; that
+        # key was never probed.
+        blockers = _relocation_blockers(repo, remove)
+    name = os.path.basename(repo)
+    cur_org = os.path.basename(os.path.dirname(repo))
+    row = {"repo": name, "org": cur_org, "dest_org": org}
+    if blockers:
+        reason = f"duplicate of {org}/ but {', '.join(blockers)}" if remove else ", ".join(blockers)
+        return {**row, "status": "fail", "reason": reason}
+    if remove:
+        if not check_mode:
+            shutil.rmtree(repo)
+        return {**row, "status": "remove"}
+    if not check_mode:
+        dest = os.path.join(os.path.dirname(os.path.dirname(repo)), org, name)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        shutil.move(repo, dest)
+    return {**row, "status": "move"}
+
+
 def _summarize(row, check_mode):
     label = f"{row['org']}/{row['repo']}"
     status = row["status"]
@@ -200,15 +423,17 @@ def _summarize(row, check_mode):
 
 
 def run_module():
+    # pylint: disable=duplicate-code
     module = AnsibleModule(
         argument_spec={
             "root": {"type": "path", "required": True},
             "known_orgs": {"type": "list", "elements": "str", "default": []},
+            "parallel": {"type": "int", "default": 8},
         },
         supports_check_mode=True,
     )
     p = module.params
-    rows, changed = _plan(p["root"], p["known_orgs"], module.check_mode)
+    rows, changed = _plan(p["root"], p["known_orgs"], module.check_mode, p["parallel"])
     rows.sort(key=lambda row: (row["repo"], row.get("org", "")))
     module.exit_json(
         changed=bool(changed),
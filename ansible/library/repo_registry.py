@@ -11,22 +11,49 @@ are present. Ported from the legacy converger's step-6 discovery
 
 No opaque values: owner, forgejo host, and the SSM token path are meaningful
 names passed in as module args. The Forgejo PAT is fetched from SSM at runtime
-and only ever sent to the canonical host (token_destination_allowed).
+and only ever sent to the canonical host (token_destination_allowed). A
+fetched PAT is kept for a short TTL in the same private runtime-dir cache
+scripts/ssm-cache.py uses, so back-to-back syncs skip the SSM round trip.
+
+Discovery is mostly waiting, so it overlaps: `gh repo list` and the SSM token
+fetch start together on a thread pool, and the Forgejo listing follows as soon
+as the token lands - page 1 first, whose X-Total-Count says how many pages to
+fetch in parallel after it. Each Forgejo page is cached on disk (0600, only
+the fields read) with its ETag and revalidated with If-None-Match, so an
+unchanged inventory answers 304s.
 """
 from __future__ import annotations
 
+import contextlib
 import datetime
+import hashlib
 import json
+import math
 import os
 import shutil
+import stat
 import subprocess
+import sys
+import time
 import urllib.error
 import urllib.parse
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 
 from ansible.module_utils.basic import AnsibleModule
 
 CANONICAL_FORGEJO_HOST = "forgejo.coilysiren.me"
+CACHE_SCHEMA = 2  # bump when the cached page shape changes
+# The only repo fields read from a Forgejo listing - and so the only ones
+# cached: full bodies would put private-repo metadata on disk.
+FORGEJO_FIELDS = ("name", "updated_at", "archived", "fork")
+FORGEJO_PAGE_SIZE = 50
+FORGEJO_MAX_PAGES = 10
+# gh and the SSM fetch, then the Forgejo pages after page 1, all at once.
+POOL_WORKERS = FORGEJO_MAX_PAGES
+# Seconds the SSM token is reused from scripts/ssm-cache.py's cache;
+# $SSM_CACHE_TTL overrides, 0 disables.
+TOKEN_CACHE_TTL = 900
 
 
 def _have(binary):
@@ -91,8 +118,76 @@ def _github_inventory(owner, limit=300):
     }
 
 
+def _token_cache_entry(ssm_path):
+    """Path of `ssm_path`'s (decrypted) entry in the scripts/ssm-cache.py
+    cache, or None when there is no runtime dir for it or it is not private
+    to us (docs/ssm-cache.md). Mirrors that script's layout so a token
+    fetched by either is reused by both."""
+    base = os.environ.get("XDG_RUNTIME_DIR")
+    if not base and sys.platform == "darwin":
+        base = os.environ.get("TMPDIR")  # per-user 0700 on macOS
+    if not base:
+        return None
+    directory = os.path.join(base, "infrastructure-ssm")
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        st = os.lstat(directory)
+    except OSError:
+        return None
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        return None
+    return os.path.join(directory, hashlib.sha256(ssm_path.encode()).hexdigest()[:32] + ".json")
+
+
+def _cached_token(path, ssm_path):
+    # pylint: disable=duplicate-code
+    try:
+        fd = os.open(path, os.O_RDONLY | os.O_NOFOLLOW)
+    except OSError:
+        return None
+    with os.fdopen(fd, encoding="utf-8") as handle:
+        st = os.fstat(handle.fileno())
+        if st.st_uid != os.getuid() or st.st_mode & 0o077:
+            return None
+        try:
+            entry = json.load(handle)
+        except ValueError:
+            return None
+    if (not isinstance(entry, dict) or entry.get("name") != ssm_path
+            or entry.get("decrypt", True) is not True or entry.get("expires", 0) <= time.time()):
+        return None
+    token = entry.get("value")
+    return token if isinstance(token, str) and token and not any(c.isspace() for c in token) else None
+
+
+def _cache_token(path, ssm_path, token, ttl):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump({"name": ssm_path, "decrypt": True, "value": token,
+                       "expires": time.time() + ttl}, handle)
+        os.replace(tmp, path)
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+
+
 def _forgejo_token(ssm_path):
-    if not ssm_path or not _have("coily"):
+    """The PAT from SSM, reused from the local short-TTL cache when a recent
+    lookup left it there. Only the value is cached; where it may be sent is
+    still decided by _token_destination_allowed before this is called."""
+    if not ssm_path:
+        return None
+    try:
+        ttl = max(0, int(os.environ.get("SSM_CACHE_TTL", TOKEN_CACHE_TTL)))
+    except ValueError:
+        ttl = TOKEN_CACHE_TTL
+    path = _token_cache_entry(ssm_path) if ttl else None
+    token = _cached_token(path, ssm_path) if path else None
+    if token:
+        return token
+    if not _have("coily"):
         return None
     rc, out = _run_stdout([
         "coily", "ops", "aws", "ssm", "get-parameter",
@@ -102,22 +197,73 @@ def _forgejo_token(ssm_path):
     out = (out or "").strip()
     if rc != 0 or not out or any(c.isspace() for c in out):
         return None
+    if path:
+        _cache_token(path, ssm_path, out, ttl)
     return out
 
 
-def _forgejo_inventory(api, owner, token, max_pages=10, page_size=50):
+def _forgejo_page(url, token, entry):
+    """GET one listing page, revalidating `entry` (the page's cached ETag and
+    body) with If-None-Match. Returns (repos, X-Total-Count or None, the entry
+    to cache or None); repos is None on any failure."""
+    headers = {"Authorization": f"token {token}"}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    req = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=15) as resp:
+            data = json.loads(resp.read().decode())
+            etag, total = resp.headers.get("ETag"), resp.headers.get("X-Total-Count")
+    except urllib.error.HTTPError as exc:
+        if exc.code == 304 and entry:
+            return entry["body"], entry.get("total"), entry
+        return None, None, None
+    except (urllib.error.URLError, ValueError, TimeoutError, OSError):
+        return None, None, None
+    total = int(total) if total and total.isdigit() else None
+    if isinstance(data, list):
+        # One item per repo still, so a short page still reads as the last.
+        data = [{k: r[k] for k in FORGEJO_FIELDS if k in r} if isinstance(r, dict) else {}
+                for r in data]
+    return data, total, {"etag": etag, "body": data, "total": total} if etag else None
+
+
+def _forgejo_pages(urls, token, cache, pool):
+    """Fetch the listing pages at `urls` (page 1 first). Returns (the page
+    bodies in order, {url: entry} to cache). Page 1's X-Total-Count sizes the
+    rest, which are fetched in parallel; a server that omits the header is
+    paged serially until a short page."""
+    data, total, entry = _forgejo_page(urls[0], token, cache.get(urls[0]))
+    pages, fresh = [data], {urls[0]: entry}
+    if not isinstance(data, list) or len(data) < FORGEJO_PAGE_SIZE:
+        return pages, fresh
+    if total is not None:
+        rest = urls[1:math.ceil(total / FORGEJO_PAGE_SIZE)]
+        for url, (data, _, entry) in zip(rest, pool.map(lambda u: _forgejo_page(u, token, cache.get(u)), rest)):
+            pages.append(data)
+            fresh[url] = entry
+        return pages, fresh
+    for url in urls[1:]:
+        data, _, entry = _forgejo_page(url, token, cache.get(url))
+        pages.append(data)
+        fresh[url] = entry
+        if not isinstance(data, list) or len(data) < FORGEJO_PAGE_SIZE:
+            break
+    return pages, fresh
+
+
+def _forgejo_inventory(api, owner, token, cache, pool):
+    """The owner's Forgejo repos, plus the {url: entry} page cache to keep."""
     if not token:
-        return {}
+        return {}, {}
+    base = api.rstrip("/")
+    urls = [
+        f"{base}/users/{owner}/repos?limit={FORGEJO_PAGE_SIZE}&page={n}"
+        for n in range(1, FORGEJO_MAX_PAGES + 1)
+    ]
+    pages, fresh = _forgejo_pages(urls, token, cache, pool)
     inv = {}
-    for page in range(1, max_pages + 1):
-        base = api.rstrip("/")
-        url = f"{base}/users/{owner}/repos?limit={page_size}&page={page}"
-        req = urllib.request.Request(url, headers={"Authorization": f"token {token}"})
-        try:
-            with urllib.request.urlopen(req, timeout=15) as resp:
-                data = json.loads(resp.read().decode())
-        except (urllib.error.URLError, ValueError, TimeoutError, OSError):
-            break
+    for data in pages:
         if not isinstance(data, list) or not data:
             break
         for r in data:
@@ -127,9 +273,43 @@ def _forgejo_inventory(api, owner, token, max_pages=10, page_size=50):
                     "archived": bool(r.get("archived")),
                     "fork": bool(r.get("fork")),
                 }
-        if len(data) < page_size:
-            break
-    return inv
+    return inv, {url: e for url, e in fresh.items() if e}
+
+
+def _cache_path(cache_dir):
+    base = cache_dir or os.path.join(
+        os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "infrastructure",
+    )
+    return os.path.join(base, "repo_registry.json")
+
+
+def _load_pages(path):
+    """{url: {etag, body, total}} from the last run, {} when absent or stale."""
+    # pylint: disable=duplicate-code
+    try:
+        with open(path, encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("schema") != CACHE_SCHEMA:
+        return {}
+    pages = data.get("pages")
+    return pages if isinstance(pages, dict) else {}
+
+
+def _save_pages(path, pages):
+    """Create-exclusive 0600 temp file, then rename; a failed write only costs
+    the next run its 304s."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump({"schema": CACHE_SCHEMA, "pages": pages}, handle)
+        os.replace(tmp, path)
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
 
 
 def _present_repos(root, known_orgs):
@@ -146,7 +326,7 @@ def _present_repos(root, known_orgs):
     return present
 
 
-def run_module():
+def run_module():  # pylint: disable=too-many-locals
     module = AnsibleModule(
         argument_spec={
             "owner": {"type": "str", "required": True},
@@ -156,25 +336,32 @@ def run_module():
             "forgejo_token_ssm": {"type": "str", "default": ""},
             "recent_days": {"type": "int", "default": 7},
             "forgejo_only": {"type": "list", "elements": "str", "default": []},
+            "cache": {"type": "bool", "default": True},
+            "cache_dir": {"type": "path", "default": ""},
         },
         supports_check_mode=True,
     )
     p = module.params
     forgejo_only = set(p["forgejo_only"])
 
-    present_paths = _present_repos(p["root"], p["known_orgs"])
-    gh_inv = _github_inventory(p["owner"])
-
-    fj_inv = {}
-    if p["forgejo_api"]:
-        if not _token_destination_allowed(p["forgejo_api"]):
-            module.fail_json(msg=(
-                f"forgejo_api {p['forgejo_api']!r} is not the canonical https "
-                "Forgejo host; refusing to fetch/send the token"
-            ))
-        fj_inv = _forgejo_inventory(
-            p["forgejo_api"], p["owner"], _forgejo_token(p["forgejo_token_ssm"]),
-        )
+    if p["forgejo_api"] and not _token_destination_allowed(p["forgejo_api"]):
+        module.fail_json(msg=(
+            f"forgejo_api {p['forgejo_api']!r} is not the canonical https "
+            "Forgejo host; refusing to fetch/send the token"
+        ))
+
+    cache_path = _cache_path(p["cache_dir"]) if p["cache"] else ""
+    cache = _load_pages(cache_path) if cache_path else {}
+    fj_inv, pages = {}, {}
+    with ThreadPoolExecutor(max_workers=POOL_WORKERS) as pool:
+        gh_job = pool.submit(_github_inventory, p["owner"])
+        if p["forgejo_api"]:
+            token = pool.submit(_forgejo_token, p["forgejo_token_ssm"]).result()
+            fj_inv, pages = _forgejo_inventory(p["forgejo_api"], p["owner"], token, cache, pool)
+        present_paths = _present_repos(p["root"], p["known_orgs"])
+        gh_inv = gh_job.result()
+    if cache_path and pages:
+        _save_pages(cache_path, pages)
 
     if not gh_inv and not fj_inv:
         module.fail_json(msg="no inventory reachable (gh absent/failed and forgejo unreachable)")
@@ -1,6 +1,7 @@
 #!/usr/bin/python
 # GPL-3.0-or-later (https://www.gnu.org/licenses/gpl-3.0.txt). The /usr/bin/python
 # shebang is the Ansible convention - the controller rewrites it; env-style fails.
+# pylint: disable=too-many-lines  # self-contained by design (no module_utils)
 """Ansible module: git remote-sync + github<->forgejo mirror-drift sweep.
 
 Per local repo across the known org dirs (the same dirs the `repos` role
@@ -18,102 +19,604 @@ a local push). mirror-drift is the github HEAD sha compared against canonical:
 flagged, never resolved - no force, no push (matches
 agentic-os-kai/scripts/up-to-date.py, step 6).
 
+Repos fan out on asyncio: each is a small DAG (wire -> fetch -> inspect ->
+pull -> finish) whose network steps share a self-tuning concurrency cap (AIMD
+on fetch latency and throttle/reset errors) while local plumbing runs under a
+separate CPU-sized cap. Every phase (wire, probe, fetch, refs, status, stale,
+pull, finish, and time queued on either cap) is timed per repo along with its git
+process count; the `timings` block ranks the slowest repos and gives per-phase
+p50/p95, and `trace_file` appends the same records as JSON lines.
+
 Fetch runs in check mode too: it only refreshes remote-tracking refs (no
-working-tree change) and reporting ahead/behind/drift requires it. The
+working-tree change) and reporting ahead/behind/drift requires it. By default
+(`fetch: smart`) each distinct remote URL is probed with `ls-remote --heads`
+first and only remotes whose heads moved are fetched; `fetch: all` restores the
+unconditional `fetch --all --prune`. The
 mutating steps (pull, remote-config writes) are gated on apply mode.
 
+Idle repos are cheap: after each sweep a settled row is cached on disk with a
+fingerprint of the repo's .git state (stat tokens of HEAD/index/config,
+packed + loose refs, the stash reflog, worktrees and op markers, plus the
+FETCH_HEAD bytes). When the fingerprint still matches after the fetch, the row
+is reused and every derived git call is skipped; only `git status` reruns,
+since no .git file sees an edit to a tracked file - unless `watch_index` points
+at a live scripts/repo-watch.py index that saw no working-tree event in the
+repo since its dirty counts were taken, in which case the counts carry over too.
+
+Metadata kept in plain .git files (config, HEAD, loose + packed refs, the
+stash reflog, worktrees, op markers) is read by a small vendored reader rather
+than a git subprocess; git runs only for what needs the object database or the
+network, and for writes.
+
 No opaque values and no secrets: this module only runs git locally. The forgejo
 URL it wires points at the canonical host, a meaningful name pinned in code.
 """
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import contextvars
+import hashlib
+import json
+import math
 import os
+import random
+import resource
 import subprocess
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 
 from ansible.module_utils.basic import AnsibleModule
 
 CANONICAL_FORGEJO_HOST = "forgejo.coilysiren.me"
 DEFAULT_BRANCHES = ("main", "master")
 STALE_BRANCH_SECS = 86_400  # tip older than 24h => land-or-delete (repo-recall parity)
+# A network op slower than both SLOW_FACTOR x the fastest seen and SLOW_FLOOR_SECS
+# means the remote is queueing us: shrink the fetch limit instead of growing it.
+SLOW_FACTOR = 4
+SLOW_FLOOR_SECS = 2.0
+FETCH_ATTEMPTS = 3
+# stderr fragments of a throttled or dropped connection (Forgejo 429/5xx over
+# https, sshd refusing or resetting under load) - back off and retry.
+_THROTTLE_MARKERS = (
+    "returned error: 429", "Too Many Requests", "returned error: 5",
+    "Connection reset", "reset by peer", "Connection timed out",
+    "kex_exchange_identification", "Connection closed by remote host",
+    "remote end hung up unexpectedly",
+)
+CACHE_SCHEMA = 1  # bump when the row shape changes so stale caches are ignored
+# scripts/repo-watch.py's index: trusted only while its heartbeat is this fresh.
+WATCH_SCHEMA = 1
+WATCH_STALE_SECS = 120
+# .git paths whose stat tokens make up the fingerprint: everything a derived git
+# call reads - HEAD, index, remote/branch config, packed refs, the stash reflog,
+# linked worktrees, and the in-progress-op markers.
+_FINGERPRINT_PATHS = (
+    "HEAD", "index", "config", "packed-refs", "logs/refs/stash", "worktrees",
+    "rebase-merge", "rebase-apply", "MERGE_HEAD", "CHERRY_PICK_HEAD", "REVERT_HEAD", "BISECT_LOG",
+)
+# The current repo's timing record ({"phases": {name: seconds}, "procs": n}).
+# Set once per repo task; asyncio tasks and to_thread workers both inherit it,
+# so _git/_agit and _phase find the right repo without threading it through.
+_STATS = contextvars.ContextVar("repo_status_stats", default=None)
+
 
+@contextlib.contextmanager
+def _phase(name):
+    """Add the wall time of the block to the current repo's `name` phase."""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        stats = _STATS.get()
+        if stats is not None:
+            stats["phases"][name] = stats["phases"].get(name, 0.0) + time.monotonic() - started
+
+
+def _count_proc():
+    stats = _STATS.get()
+    if stats is not None:
+        stats["procs"] += 1
 
-def _git(repo, *args):
+
+def _git(repo, *args, stdin=None):
     """Run git in `repo`, returning (rc, stripped-stdout)."""
+    _count_proc()
     try:
         r = subprocess.run(
-            ["git", "-C", repo, *args], capture_output=True, text=True, check=False,
+            ["git", "-C", repo, *args], input=stdin, capture_output=True, text=True, check=False,
         )
     except (OSError, ValueError) as exc:
         return 1, str(exc)
     return r.returncode, r.stdout.strip()
 
 
-def _remote_branch(repo, remote):
-    for b in DEFAULT_BRANCHES:
-        rc, _ = _git(repo, "rev-parse", "--verify", "--quiet", f"refs/remotes/{remote}/{b}")
-        if rc == 0:
-            return b
-    return ""
+async def _agit(repo, *args):
+    """Async `_git` on asyncio's subprocess support: (rc, stripped-stdout, stderr)."""
+    _count_proc()
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "git", "-C", repo, *args,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        )
+        out, err = await proc.communicate()
+    except (OSError, ValueError) as exc:
+        return 1, "", str(exc)
+    return proc.returncode, out.decode(errors="replace").strip(), err.decode(errors="replace")
 
 
-def _local_default_branch(repo):
-    for b in DEFAULT_BRANCHES:
-        rc, _ = _git(repo, "rev-parse", "--verify", "--quiet", f"refs/heads/{b}")
-        if rc == 0:
-            return b
-    return ""
+# --- read-only .git metadata ------------------------------------------------
+# Vendored verbatim in repo_status and repo_reconcile (no module_utils, so each
+# module stays individually droppable). Reads the files git itself reads -
+# config, HEAD, loose + packed refs, the stash reflog, op markers, worktrees -
+# so per-repo metadata costs no fork/exec. Anything that needs the object
+# database (ahead/behind, commit dates, status) still goes through `_git`.
+# pylint: disable=duplicate-code
+
+_OP_MARKERS = (
+    ("rebase", ("rebase-merge", "rebase-apply")),
+    ("merge", ("MERGE_HEAD",)),
+    ("cherry-pick", ("CHERRY_PICK_HEAD",)),
+    ("revert", ("REVERT_HEAD",)),
+    ("bisect", ("BISECT_LOG",)),
+)
+
+
+def _git_dirs(repo):
+    """(gitdir, commondir): the per-worktree dir holding HEAD and the op
+    markers, and the shared one holding config, refs, stash and worktrees. A
+    `.git` file (linked worktree, submodule) is followed to its `gitdir:`."""
+    gitdir = os.path.join(repo, ".git")
+    if os.path.isfile(gitdir):
+        try:
+            with open(gitdir, encoding="utf-8") as handle:
+                line = handle.readline().strip()
+        except OSError:
+            line = ""
+        if line.startswith("gitdir:"):
+            gitdir = os.path.normpath(os.path.join(repo, line[len("gitdir:"):].strip()))
+    try:
+        with open(os.path.join(gitdir, "commondir"), encoding="utf-8") as handle:
+            return gitdir, os.path.normpath(os.path.join(gitdir, handle.read().strip()))
+    except OSError:
+        return gitdir, gitdir
+
+
+def _config_value(raw):
+    """A raw config value with quotes, escapes and a trailing comment resolved."""
+    out, quoted, i = [], False, 0
+    while i < len(raw):
+        ch = raw[i]
+        if ch == "\\" and i + 1 < len(raw):
+            out.append({"n": "\n", "t": "\t", "b": "\b"}.get(raw[i + 1], raw[i + 1]))
+            i += 2
+            continue
+        if ch == '"':
+            quoted = not quoted
+        elif ch in "#;" and not quoted:
+            break
+        else:
+            out.append(ch)
+        i += 1
+    return "".join(out).strip()
+
+
+def _parse_config(text):
+    """{(section, subsection): {key: [values]}} from git-config syntax; section
+    and key names lowercased, subsections kept as written. None when the file
+    uses include directives, which this reader does not follow."""
+    lines = []
+    for raw in text.splitlines():
+        # A value ending in an odd run of backslashes continues on the next line.
+        if lines and (len(lines[-1]) - len(lines[-1].rstrip("\\"))) % 2:
+            lines[-1] = lines[-1][:-1] + raw
+        else:
+            lines.append(raw)
+    conf, current = {}, ("", "")
+    for raw in lines:
+        line = raw.strip()
+        if line.startswith("["):
+            close = line.find('"', line.find('"') + 1) if '"' in line else 0
+            end = line.find("]", close)
+            name, _, sub = line[1:end].strip().partition(" ")
+            if sub:
+                sub = sub.strip()[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+            elif "." in name:
+                name, _, sub = name.partition(".")  # legacy [section.subsection]
+                sub = sub.lower()
+            if name.lower() in ("include", "includeif"):
+                return None
+            current = (name.lower(), sub)
+            conf.setdefault(current, {})
+            line = line[end + 1:].strip()
+        if not line or line[0] in "#;":
+            continue
+        key, sep, value = line.partition("=")
+        key = key.split("#")[0].split(";")[0].strip().lower()
+        conf.setdefault(current, {}).setdefault(key, []).append(_config_value(value) if sep else "true")
+    return conf
+
+
+def _read_config(repo):
+    """The repo's own config ({(section, subsection): {key: [values]}}), parsed
+    from the file; `git config` is asked only when the file has includes or
+    can't be read."""
+    _, commondir = _git_dirs(repo)
+    try:
+        with open(os.path.join(commondir, "config"), encoding="utf-8") as handle:
+            conf = _parse_config(handle.read())
+    except (OSError, UnicodeDecodeError):
+        conf = None
+    if conf is not None:
+        return conf
+    conf = {}
+    _, out = _git(repo, "config", "--local", "--includes", "--list", "-z")
+    for entry in out.split("\0"):
+        key, newline, value = entry.partition("\n")
+        section, _, rest = key.partition(".")
+        sub, _, name = rest.rpartition(".")
+        if name:
+            conf.setdefault((section.lower(), sub), {}).setdefault(name.lower(), []).append(
+                value if newline else "true",
+            )
+    return conf
+
+
+def _config_values(conf, section, sub, key):
+    """Every value of `section.sub.key`, in file order."""
+    return conf.get((section, sub), {}).get(key.lower(), [])
+
+
+def _read_refs(repo, prefix):
+    """{refname: sha} for the refs under `prefix` (e.g. "refs/remotes/"), loose
+    over packed as git resolves them; symbolic refs are skipped. None for a
+    reftable repo, whose refs only git can read."""
+    _, commondir = _git_dirs(repo)
+    if os.path.isdir(os.path.join(commondir, "reftable")):
+        return None
+    refs = {}
+    try:
+        with open(os.path.join(commondir, "packed-refs"), encoding="utf-8") as handle:
+            for line in handle:
+                sha, _, name = line.strip().partition(" ")
+                if line[:1] not in ("#", "^") and name.startswith(prefix):
+                    refs[name] = sha
+    except OSError:
+        pass
+    for dirpath, _, filenames in os.walk(os.path.join(commondir, *prefix.strip("/").split("/"))):
+        for fname in filenames:
+            if fname.endswith(".lock"):
+                continue
+            path = os.path.join(dirpath, fname)
+            name = os.path.relpath(path, commondir).replace(os.sep, "/")
+            try:
+                with open(path, encoding="utf-8") as handle:
+                    value = handle.read().strip()
+            except OSError:
+                continue
+            if value.startswith("ref:"):
+                refs.pop(name, None)
+            else:
+                refs[name] = value
+    return refs
+
+
+def _head_branch(repo):
+    """The checked-out branch, "" when HEAD is detached, None when HEAD can't
+    be read here (missing, or a reftable repo's placeholder)."""
+    gitdir, commondir = _git_dirs(repo)
+    if os.path.isdir(os.path.join(commondir, "reftable")):
+        return None
+    try:
+        with open(os.path.join(gitdir, "HEAD"), encoding="utf-8") as handle:
+            head = handle.read().strip()
+    except OSError:
+        return None
+    return head[len("ref: refs/heads/"):] if head.startswith("ref: refs/heads/") else ""
 
 
 def _in_progress_op(repo):
     """A half-finished git operation (repo-recall's in_progress_op signal)."""
-    _, gitdir = _git(repo, "rev-parse", "--git-dir")
-    if not gitdir:
-        return ""
-    base = gitdir if os.path.isabs(gitdir) else os.path.join(repo, gitdir)
-    markers = (
-        ("rebase", ("rebase-merge", "rebase-apply")),
-        ("merge", ("MERGE_HEAD",)),
-        ("cherry-pick", ("CHERRY_PICK_HEAD",)),
-        ("revert", ("REVERT_HEAD",)),
-        ("bisect", ("BISECT_LOG",)),
-    )
-    for op, names in markers:
-        if any(os.path.exists(os.path.join(base, m)) for m in names):
+    gitdir, _ = _git_dirs(repo)
+    for op, names in _OP_MARKERS:
+        if any(os.path.exists(os.path.join(gitdir, m)) for m in names):
             return op
     return ""
 
 
+def _stash_count(repo):
+    """Stash entries - one line each in the refs/stash reflog `git stash list` reads."""
+    _, commondir = _git_dirs(repo)
+    try:
+        with open(os.path.join(commondir, "logs", "refs", "stash"), encoding="utf-8", errors="replace") as handle:
+            return sum(1 for line in handle if line.strip())
+    except OSError:
+        return 0
+
+
 def _worktrees(repo):
-    _, out = _git(repo, "worktree", "list", "--porcelain")
-    return max(0, sum(1 for line in out.splitlines() if line.startswith("worktree ")) - 1)
+    """Linked worktrees (`git worktree list` minus the main one)."""
+    _, commondir = _git_dirs(repo)
+    try:
+        entries = os.listdir(os.path.join(commondir, "worktrees"))
+    except OSError:
+        return 0
+    return sum(1 for e in entries if os.path.isdir(os.path.join(commondir, "worktrees", e)))
+
+
+# pylint: enable=duplicate-code
+# --- end read-only .git metadata --------------------------------------------
+
+
+class _NetLimit:  # pylint: disable=too-many-instance-attributes
+    """Self-tuning concurrency cap for network-bound git (fetch, pull) - AIMD,
+    like TCP congestion control. Starts at `start`; after `limit` consecutive
+    healthy ops it admits one more, up to `ceiling`. A throttle/reset halves it;
+    an op far slower than the fastest seen drops it by one. Local plumbing never
+    waits on this - it has its own fixed cap - so a slow forgejo never idles
+    the CPU-bound half of the sweep."""
+
+    def __init__(self, start, ceiling):
+        self.ceiling = max(1, ceiling)
+        self.start = self.limit = self.peak = max(1, min(start, self.ceiling))
+        self.throttled = 0
+        self._active = 0
+        self._streak = 0
+        self._fastest = None
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self):
+        with _phase("queued"):
+            async with self._cond:
+                await self._cond.wait_for(lambda: self._active < self.limit)
+                self._active += 1
+
+    async def __aexit__(self, *exc):
+        async with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def observe(self, seconds, throttled):
+        if throttled:
+            self.throttled += 1
+            self.limit = max(1, self.limit // 2)
+            self._streak = 0
+            return
+        self._fastest = seconds if self._fastest is None else min(self._fastest, seconds)
+        if seconds > max(SLOW_FACTOR * self._fastest, SLOW_FLOOR_SECS):
+            self.limit = max(1, self.limit - 1)
+            self._streak = 0
+            return
+        self._streak += 1
+        if self._streak >= self.limit and self.limit < self.ceiling:
+            self.limit += 1
+            self.peak = max(self.peak, self.limit)
+            self._streak = 0
+
+    def report(self):
+        return {"start": self.start, "final": self.limit, "peak": self.peak,
+                "ceiling": self.ceiling, "throttled": self.throttled}
+
+
+class _Engine:
+    """The two lanes of the sweep: `local` caps git plumbing run in worker
+    threads (status, for-each-ref, rev-list - CPU/disk-bound), `net` is the
+    adaptive cap on fetch/pull. `smart` selects the probe-first fetch."""
+
+    def __init__(self, net_start, net_ceiling, local, smart):
+        self.local = asyncio.Semaphore(local)
+        self.net = _NetLimit(net_start, net_ceiling)
+        self.smart = smart
+        self.fetches = {"probes": 0, "fetched": 0, "skipped": 0, "mirrored": 0}
+
+    async def run_local(self, fn, *args):
+        # Time spent waiting for a slot is the "queued" phase, kept apart from
+        # the phases the stage itself records.
+        with _phase("queued"):
+            await self.local.acquire()
+        try:
+            return await asyncio.to_thread(fn, *args)
+        finally:
+            self.local.release()
+
+    async def network_git(self, repo, *args, phase, retry=False):
+        """Run a network git op under the adaptive cap, feeding it the op's
+        latency and throttle verdict; its run time is recorded as `phase`. With
+        `retry`, a throttled op is retried after jittered exponential backoff,
+        its slot released while it waits."""
+        attempts = FETCH_ATTEMPTS if retry else 1
+        for attempt in range(attempts):
+            async with self.net:
+                started = time.monotonic()
+                with _phase(phase):
+                    rc, out, err = await _agit(repo, *args)
+                throttled = rc != 0 and any(m in err for m in _THROTTLE_MARKERS)
+                self.net.observe(time.monotonic() - started, throttled)
+            if not throttled or attempt == attempts - 1:
+                break
+            with _phase("queued"):
+                await asyncio.sleep(2 ** attempt + random.random())
+        return rc, out
+
+
+def _tracking_heads(repo):
+    """{remote: {branch: sha}} of the local remote-tracking heads, read from the
+    ref files (`for-each-ref` only for a reftable repo)."""
+    refs = _read_refs(repo, "refs/remotes/")
+    if refs is None:
+        _, out = _git(repo, "for-each-ref", "--format=%(refname) %(objectname)", "refs/remotes")
+        refs = dict(line.split(" ", 1) for line in out.splitlines() if " " in line)
+    tracking = {}
+    for ref, sha in refs.items():
+        remote, _, branch = ref[len("refs/remotes/"):].partition("/")
+        if branch and branch != "HEAD":
+            tracking.setdefault(remote, {})[branch] = sha
+    return tracking
+
+
+def _fetch_inputs(repo):
+    """What the smart-fetch probe compares against: ({remote: url} for every
+    remote `fetch --all` would fetch, the remotes on the default refspec (whose
+    tracking refs can be mirrored from a same-URL sibling), and the local
+    tracking heads). Read straight from .git - no git process."""
+    urls, mirrorable = {}, set()
+    for (section, name), keys in _read_config(repo).items():
+        if section != "remote" or not keys.get("url"):
+            continue
+        if keys.get("fetch") == [f"+refs/heads/*:refs/remotes/{name}/*"]:
+            mirrorable.add(name)
+        if keys.get("skipfetchall", ["false"])[-1].lower() not in ("true", "yes", "on", "1"):
+            urls[name] = keys["url"][0]
+    return urls, mirrorable, _tracking_heads(repo)
 
 
-def _stale_branches(repo, current):
+def _fetch_groups(moved, urls, mirrorable):
+    """Split the moved remotes into (remotes to fetch, {sibling: primary}).
+    Remotes sharing a URL and the default refspec would download the same
+    objects into parallel namespaces, so only one of them - origin when it is
+    in the group - is fetched and the rest are mirrored from it locally."""
+    fetch, mirror, primaries = [], {}, {}
+    for remote in sorted(moved, key=lambda r: (r != "origin", r)):
+        if remote in mirrorable and urls[remote] in primaries:
+            mirror[remote] = primaries[urls[remote]]
+            continue
+        if remote in mirrorable:
+            primaries[urls[remote]] = remote
+        fetch.append(remote)
+    return fetch, mirror
+
+
+def _mirror_tracking(repo, mirror):
+    """Point each sibling's tracking refs at its primary's just-fetched ones in
+    one `update-ref --stdin` transaction, deleting branches the primary pruned -
+    the sibling's fetch without its network round trip."""
+    with _phase("fetch"):
+        tracking = _tracking_heads(repo)
+        ops = []
+        for sibling, primary in sorted(mirror.items()):
+            want, have = tracking.get(primary, {}), tracking.get(sibling, {})
+            ops += [f"update refs/remotes/{sibling}/{b} {sha}" for b, sha in sorted(want.items()) if have.get(b) != sha]
+            ops += [f"delete refs/remotes/{sibling}/{b}" for b in sorted(have) if b not in want]
+        if ops:
+            _git(repo, "update-ref", "--stdin", stdin="\n".join(ops) + "\n")
+
+
+def _ls_heads(out):
+    """{branch: sha} from `git ls-remote --heads` output."""
+    heads = {}
+    for line in out.splitlines():
+        sha, _, ref = line.partition("\t")
+        if ref.startswith("refs/heads/"):
+            heads[ref[len("refs/heads/"):]] = sha
+    return heads
+
+
+async def _fetch(repo, engine):
+    """Refresh remote-tracking refs. `smart` probes each distinct remote URL
+    with `ls-remote --heads` (origin and forgejo share one probe) and fetches,
+    in one `fetch --multiple`, only the remotes whose heads differ from their
+    tracking refs - a moved, new or deleted branch, or a failed probe. With
+    every remote unchanged no fetch runs at all, FETCH_HEAD stays untouched and
+    the fingerprint cache hits. Of moved remotes sharing a URL only one is
+    fetched; the others' tracking refs are copied from it (`_fetch_groups`).
+    Tags are not probed: a tag pushed without a branch move waits for the next
+    branch change (or `fetch: all`)."""
+    if not engine.smart:
+        await engine.network_git(repo, "fetch", "--all", "--prune", "--quiet", phase="fetch", retry=True)
+        engine.fetches["fetched"] += 1
+        return
+    urls, mirrorable, tracking = await engine.run_local(_fetch_inputs, repo)
+    by_url = {}
+    for remote, url in sorted(urls.items()):
+        by_url.setdefault(url, []).append(remote)
+    probes = await asyncio.gather(*(
+        engine.network_git(repo, "ls-remote", "--heads", url, phase="probe", retry=True) for url in by_url
+    ))
+    engine.fetches["probes"] += len(by_url)
+    moved = [
+        remote
+        for remotes, (rc, out) in zip(by_url.values(), probes)
+        for remote in remotes
+        if rc != 0 or _ls_heads(out) != tracking.get(remote, {})
+    ]
+    if not moved:
+        engine.fetches["skipped"] += 1
+        return
+    fetch, mirror = _fetch_groups(moved, urls, mirrorable)
+    rc, _ = await engine.network_git(
+        repo, "fetch", "--multiple", "--prune", "--quiet", *fetch, phase="fetch", retry=True,
+    )
+    engine.fetches["fetched"] += 1
+    # A failed fetch leaves the primary's refs suspect; the siblings stay as
+    # they were and the next sweep's probe picks them up again.
+    if mirror and rc == 0:
+        await engine.run_local(_mirror_tracking, repo, mirror)
+        engine.fetches["mirrored"] += len(mirror)
+
+
+def _refs(repo):
+    """One `for-each-ref` pass over the local heads and every remote's default-
+    branch refs. Returns ({refname: (sha, committer unix ts)}, current branch or
+    "" when detached) - the table every ref question below is answered from, in
+    place of a `rev-parse` per ref per remote."""
+    _, out = _git(
+        repo, "for-each-ref",
+        "--format=%(refname)\t%(objectname)\t%(committerdate:unix)\t%(HEAD)",
+        "refs/heads", *(f"refs/remotes/*/{b}" for b in DEFAULT_BRANCHES),
+    )
+    refs, current = {}, ""
+    for line in out.splitlines():
+        parts = line.split("\t")
+        if len(parts) < 3:
+            continue
+        name, sha, ts = parts[:3]
+        refs[name] = (sha, int(ts) if ts.isdigit() else 0)
+        if len(parts) > 3 and parts[3] == "*" and name.startswith("refs/heads/"):
+            current = name[len("refs/heads/"):]
+    return refs, current
+
+
+def _remotes(refs):
+    """Remotes carrying a default-branch ref, sorted like `git remote` lists them."""
+    return sorted({
+        name.split("/")[2] for name in refs if name.startswith("refs/remotes/")
+    })
+
+
+def _remote_branch(refs, remote):
+    for b in DEFAULT_BRANCHES:
+        if f"refs/remotes/{remote}/{b}" in refs:
+            return b
+    return ""
+
+
+def _local_default_branch(refs):
+    for b in DEFAULT_BRANCHES:
+        if f"refs/heads/{b}" in refs:
+            return b
+    return ""
+
+
+def _stale_branches(repo, refs, current):
     """Local branches with unmerged work whose tip is older than 24h - land them
-    or delete them (repo-recall's stale_branch signal)."""
-    main = _local_default_branch(repo)
+    or delete them (repo-recall's stale_branch signal). Ages come from the refs
+    table; `branch --merged` only runs when some branch is old enough to matter."""
+    main = _local_default_branch(refs)
     if not main:
         return []
-    _, merged_out = _git(repo, "branch", "--merged", main, "--format=%(refname:short)")
-    merged = {line.strip() for line in merged_out.splitlines() if line.strip()}
     now = int(time.time())
-    out = []
-    _, refs = _git(repo, "for-each-ref", "--format=%(refname:short)\t%(committerdate:unix)", "refs/heads")
-    for line in refs.splitlines():
-        if "\t" not in line:
-            continue
-        name, ts = line.split("\t", 1)
-        if name in (main, current) or name in merged:
+    aged = []
+    for ref, (_, ts) in sorted(refs.items()):
+        if not ref.startswith("refs/heads/"):
             continue
-        try:
-            age = now - int(ts)
-        except ValueError:
-            continue
-        if age > STALE_BRANCH_SECS:
-            out.append(f"{name}({age // 86_400}d)")
-    return out
+        name = ref[len("refs/heads/"):]
+        if name not in (main, current) and now - ts > STALE_BRANCH_SECS:
+            aged.append((name, now - ts))
+    if not aged:
+        return []
+    _, merged_out = _git(repo, "branch", "--merged", main, "--format=%(refname:short)")
+    merged = {line.strip() for line in merged_out.splitlines() if line.strip()}
+    return [f"{name}({age // 86_400}d)" for name, age in aged if name not in merged]
 
 
 _FORGE_PREFIXES = (
@@ -132,39 +635,37 @@ def _slug_from_url(url):
     return ""
 
 
-def _repo_slug(repo, known_orgs):
+def _repo_slug(conf, known_orgs):
     """`<owner>/<name>` for a repo under a known org, read from whichever of
     origin/forgejo/github resolves first. Deriving the owner from the URL (not
     assuming coilysiren) follows a repo through the org split; forks under other
     owners and unknown repos return "" and are left untouched."""
     for remote in ("origin", "forgejo", "github"):
-        rc, url = _git(repo, "remote", "get-url", remote)
-        if rc != 0 or not url:
+        url = next(iter(_config_values(conf, "remote", remote, "url")), "")
+        if not url:
             continue
-        slug = _slug_from_url(url.strip())
+        slug = _slug_from_url(url)
         owner, _, name = slug.partition("/")
         if owner in known_orgs and name:
             return slug
     return ""
 
 
-def _ensure_remote(repo, name, url, check_mode):
+def _ensure_remote(repo, conf, name, url, check_mode):
     """Converge remote `name` to fetch+push `url` (a single normal remote, no
-    explicit pushurl - push follows fetch). Returns a change token or []."""
-    _, listed = _git(repo, "remote")
-    if name not in listed.split():
+    explicit pushurl - push follows fetch). `conf` is the repo's parsed config;
+    only the writes spawn git. Returns a change token or []."""
+    if ("remote", name) not in conf:
         if not check_mode:
             _git(repo, "remote", "add", name, url)
         return [f"+{name}"]
     changes = []
-    _, cur = _git(repo, "remote", "get-url", name)
-    if cur.strip() != url:
+    if next(iter(_config_values(conf, "remote", name, "url")), "") != url:
         changes.append(f"{name}.url")
         if not check_mode:
             _git(repo, "remote", "set-url", name, url)
     # Drop any stray pushurl (e.g. a legacy dual-push origin): push follows fetch.
-    _, push_out = _git(repo, "remote", "get-url", "--push", "--all", name)
-    if {u.strip() for u in push_out.splitlines() if u.strip()} not in ({url}, set()):
+    if set(_config_values(conf, "remote", name, "pushurl")) not in ({url}, set()):
         changes.append(f"{name}.push->url")
         if not check_mode:
             _git(repo, "config", "--unset-all", f"remote.{name}.pushurl")
@@ -180,53 +681,72 @@ def _ensure_remote_topology(repo, known_orgs, check_mode):
     github takes a deliberate `git push github <branch>`. Returns the changes
     applied (or, in check mode, that would apply); empty means already correct.
     No-op for repos not under a known org."""
-    slug = _repo_slug(repo, known_orgs)
+    conf = _read_config(repo)
+    slug = _repo_slug(conf, known_orgs)
     if not slug:
         return []
     fj_url = f"https://{CANONICAL_FORGEJO_HOST}/{slug}.git"
     gh_url = f"git@github.com:{slug}.git"
     changes = []
-    changes += _ensure_remote(repo, "origin", fj_url, check_mode)
-    changes += _ensure_remote(repo, "forgejo", fj_url, check_mode)
-    changes += _ensure_remote(repo, "github", gh_url, check_mode)
-    main = _local_default_branch(repo)
+    changes += _ensure_remote(repo, conf, "origin", fj_url, check_mode)
+    changes += _ensure_remote(repo, conf, "forgejo", fj_url, check_mode)
+    changes += _ensure_remote(repo, conf, "github", gh_url, check_mode)
+    main = _local_default_branch(_refs(repo)[0])
     if main:
-        changes += _wire_default_branch(repo, main, check_mode)
+        changes += _wire_default_branch(repo, conf, main, check_mode)
     return changes
 
 
-def _wire_default_branch(repo, main, check_mode):
+def _wire_default_branch(repo, conf, main, check_mode):
     """Pull and push the default branch via `origin` (canonical forgejo). Pinning
     pushRemote here is what keeps `git push` off github by default - github stays
     a normal remote, reachable only by naming it explicitly."""
     changes = []
-    _, cur_remote = _git(repo, "config", "--get", f"branch.{main}.remote")
-    if cur_remote.strip() != "origin":
+    if _config_values(conf, "branch", main, "remote")[-1:] != ["origin"]:
         changes.append(f"{main}.pull->origin")
         if not check_mode:
             _git(repo, "config", f"branch.{main}.remote", "origin")
-    _, cur_push = _git(repo, "config", "--get", f"branch.{main}.pushRemote")
-    if cur_push.strip() != "origin":
+    if _config_values(conf, "branch", main, "pushRemote")[-1:] != ["origin"]:
         changes.append(f"{main}.push->origin")
         if not check_mode:
             _git(repo, "config", f"branch.{main}.pushRemote", "origin")
     return changes
 
 
-def _remote_states(repo, branch, remotes):
-    """Per-remote {branch, sha, ahead, behind} for the default branch on each remote."""
+def _ahead_behind(repo, local, sha):
+    if local == sha:
+        return 0, 0
+    _, counts = _git(repo, "rev-list", "--left-right", "--count", f"{local}...{sha}")
+    parts = counts.split()
+    if len(parts) == 2 and parts[0].isdigit() and parts[1].isdigit():
+        return int(parts[0]), int(parts[1])
+    return 0, 0
+
+
+def _remote_states(repo, branch, refs):
+    """Per-remote {branch, sha, ahead, behind} for the default branch on each remote.
+
+    Shas come from the refs table. Ahead/behind is counted once per distinct
+    remote tip, not per remote - origin and forgejo are the same host, and in
+    steady state github matches too - and a tip equal to the local branch needs
+    no `rev-list` at all."""
     state = {}
-    for r in remotes:
-        rb = _remote_branch(repo, r)
-        if not rb:
+    local = refs.get(f"refs/heads/{branch}", ("", 0))[0]
+    counts = {}
+    for r in _remotes(refs):
+        # The for-each-ref pattern's `*` matches across `/`, so a remote may
+        # be listed for a nested `<remote>/foo/main` alone. Skip it, as the
+        # per-remote rev-parse did.
+        rb = _remote_branch(refs, r)
+        entry = refs.get(f"refs/remotes/{r}/{rb}") if rb else None
+        if entry is None:
             continue
-        _, sha = _git(repo, "rev-parse", f"{r}/{rb}")
+        sha = entry[0]
         ahead = behind = 0
-        if branch != "(detached)":
-            _, counts = _git(repo, "rev-list", "--left-right", "--count", f"{branch}...{r}/{rb}")
-            parts = counts.split()
-            if len(parts) == 2 and parts[0].isdigit() and parts[1].isdigit():
-                ahead, behind = int(parts[0]), int(parts[1])
+        if branch != "(detached)" and local:
+            if sha not in counts:
+                counts[sha] = _ahead_behind(repo, local, sha)
+            ahead, behind = counts[sha]
         state[r] = {"branch": rb, "sha": sha[:12], "ahead": ahead, "behind": behind}
     return state
 
@@ -241,38 +761,47 @@ def _drift(state):
     return []
 
 
-def _push_pending(repo, branch):
+def _push_pending(repo, branch, state, recount):
     """Commits on the local default branch not yet on `origin` (canonical forgejo)
     - a clean `git push` away. This is healthy local-ahead work, NOT a freshness
     failure: it is surfaced as informational `needs_push`, never folded into
     `action_required`. Detached HEAD, or a branch with no matching origin ref,
-    returns 0. Computed after the apply-mode pull, so a rebased-then-ahead branch
+    returns 0. It is origin's `ahead` count unless a pull just moved the branch
+    (`recount`), in which case it is recounted so a rebased-then-ahead branch
     reports the commits that still need pushing."""
-    if branch == "(detached)":
-        return 0
-    rb = _remote_branch(repo, "origin")
-    if not rb or rb != branch:
+    origin = state.get("origin")
+    if branch == "(detached)" or not origin or origin["branch"] != branch:
         return 0
-    rc, out = _git(repo, "rev-list", "--count", f"origin/{rb}..{branch}")
+    if not recount:
+        return origin["ahead"]
+    rc, out = _git(repo, "rev-list", "--count", f"origin/{branch}..{branch}")
     return int(out) if rc == 0 and out.isdigit() else 0
 
 
-def _working_state(repo, branch):
+def _dirty_counts(repo):
+    """Modified/untracked counts from `git status` - the one working-tree read.
+    No .git fingerprint sees an edit to a tracked file, so this runs on cache
+    hits too."""
     _, porcelain = _git(repo, "status", "--porcelain")
     lines = [line for line in porcelain.splitlines() if line]
     untracked = sum(1 for line in lines if line.startswith("??"))
-    _, stash_out = _git(repo, "stash", "list")
-    return {
-        "modified": len(lines) - untracked,
-        "untracked": untracked,
-        "stashes": len([line for line in stash_out.splitlines() if line]),
-        "op": _in_progress_op(repo),
-        "stale": _stale_branches(repo, branch),
-        "worktrees": _worktrees(repo),
-    }
+    return {"modified": len(lines) - untracked, "untracked": untracked}
+
+
+def _working_state(repo, refs, branch):
+    with _phase("status"):
+        state = {
+            **_dirty_counts(repo),
+            "stashes": _stash_count(repo),
+            "op": _in_progress_op(repo),
+            "worktrees": _worktrees(repo),
+        }
+    with _phase("stale"):
+        state["stale"] = _stale_branches(repo, refs, branch)
+    return state
 
 
-def _pull_remotes(repo, branch, remotes):
+async def _pull_remotes(repo, branch, state, engine):
     """Integrate the default branch from the canonical forgejo remotes.
 
     `origin` (canonical forgejo) resolves divergence: on local-ahead histories it
@@ -282,54 +811,333 @@ def _pull_remotes(repo, branch, remotes):
     immediately - a fleet sweep must never leave a repo mid-rebase - and reports
     BLOCKED. `forgejo` (same canonical host) stays `--ff-only`. `github` is never
     pulled: it isn't the branch's upstream, and its drift is surfaced by `_drift`
-    rather than auto-resolved here (see module docstring)."""
+    rather than auto-resolved here (see module docstring).
+
+    A remote the sweep's fetch found nothing new on (behind 0) reports ok
+    without running: that pull would be a no-op that only rewrites FETCH_HEAD,
+    which would also invalidate the cache fingerprint of an idle repo."""
     pulled = []
-    for r in remotes:
-        if r == "github":
+    for r, rs in state.items():
+        if r == "github" or rs["branch"] != branch:
             continue
-        rb = _remote_branch(repo, r)
-        if not rb or rb != branch:
+        if not rs["behind"]:
+            pulled.append(f"{r}:ok")
             continue
         if r == "origin":
-            rc, _ = _git(repo, "pull", "--rebase", r, branch)
+            rc, _ = await engine.network_git(repo, "pull", "--rebase", r, branch, phase="pull")
             if rc != 0:
-                _git(repo, "rebase", "--abort")  # no-op if no rebase is in progress
+                with _phase("pull"):
+                    await _agit(repo, "rebase", "--abort")  # no-op if no rebase is in progress
         else:
-            rc, _ = _git(repo, "pull", "--ff-only", r, branch)
+            rc, _ = await engine.network_git(repo, "pull", "--ff-only", r, branch, phase="pull")
         pulled.append(f"{r}:{'ok' if rc == 0 else 'BLOCKED'}")
     return pulled
 
 
-def _sync_repo(repo, known_orgs, check_mode):
-    # Converge remotes BEFORE fetch so a newly-added forgejo remote is fetched
-    # this same pass and its drift is reported.
-    wired = _ensure_remote_topology(repo, known_orgs, check_mode)
-    _git(repo, "fetch", "--all", "--prune", "--quiet")
-    _, branch_out = _git(repo, "rev-parse", "--abbrev-ref", "HEAD")
-    branch = branch_out or "(detached)"
-    detached = branch in ("HEAD", "(detached)")
-    if detached:
-        branch = "(detached)"
-    _, remotes_out = _git(repo, "remote")
-    remotes = [r for r in remotes_out.splitlines() if r]
-    state = _remote_states(repo, branch, remotes)
+def _prepare(repo, known_orgs, check_mode, cached):
+    """Pre-fetch stage: the cache check and remote-topology wiring. Returns
+    (hit, wired). A pre-fetch hit means .git/config is untouched since a
+    settled sweep, so its wiring verdict holds."""
+    with _phase("wire"):
+        hit = cached if cached and cached["fp"] == _fingerprint(repo) else None
+        wired = list(hit["row"]["wired"]) if hit else _ensure_remote_topology(repo, known_orgs, check_mode)
+    return hit, wired
+
+
+def _inspect(repo, hit, wired):
+    """Post-fetch stage: the report row and the remote state it was built from.
+    A hit that survived the fetch reuses its row (state None) with only the
+    dirty counts refreshed - or not even those when the watch index saw no
+    working-tree event since they were counted (`quiet`)."""
+    if hit and hit["fp"] == _fingerprint(repo):
+        row = dict(hit["row"], wired=wired, cached=True)
+        if hit.get("quiet"):
+            row["quiet"] = True
+        else:
+            with _phase("status"):
+                row.update(_dirty_counts(repo))
+        return row, None
+    with _phase("refs"):
+        refs, current = _refs(repo)
+        branch = current or "(detached)"
+        state = _remote_states(repo, branch, refs)
     row = {
         "repo": os.path.basename(repo),
         "org": os.path.basename(os.path.dirname(repo)),
         "branch": branch,
-        "detached": detached,
+        "detached": not current,
         "drift": _drift(state),
         "remotes": state,
         "wired": wired,
         "pulled": [],
     }
-    row.update(_working_state(repo, branch))
-    if not check_mode and not detached:
-        row["pulled"] = _pull_remotes(repo, branch, remotes)
-    # After any pull: commits the default branch still owes origin. Purely
-    # informational (needs_push), deliberately kept out of action_required.
-    row["needs_push"] = _push_pending(repo, branch)
-    return row
+    row.update(_working_state(repo, refs, branch))
+    return row, state
+
+
+def _finish(repo, row, state, pulled_any):
+    """Last stage. After any pull: commits the default branch still owes origin,
+    purely informational (needs_push), deliberately kept out of action_required.
+    The fingerprint is taken last, after wiring, pull and the index refresh
+    `git status` may do, so it describes the state the row reports."""
+    with _phase("finish"):
+        if state is not None:
+            row["needs_push"] = _push_pending(repo, row["branch"], state, recount=pulled_any)
+        return row, _fingerprint(repo)
+
+
+async def _sweep_repo(repo, known_orgs, check_mode, cached, engine):
+    """One repo's DAG: prepare (local) -> [probe ->] fetch (net) -> inspect (local) ->
+    pull (net, apply mode, only when behind) -> finish (local). Returns
+    (row, fingerprint)."""
+    # Converge remotes BEFORE fetch so a newly-added forgejo remote is fetched
+    # this same pass and its drift is reported.
+    hit, wired = await engine.run_local(_prepare, repo, known_orgs, check_mode, cached)
+    await _fetch(repo, engine)
+    row, state = await engine.run_local(_inspect, repo, hit, wired)
+    pulled_any = False
+    if state is not None and not check_mode and not row["detached"]:
+        row["pulled"] = await _pull_remotes(repo, row["branch"], state, engine)
+        pulled_any = any(rs["behind"] for r, rs in state.items() if r != "github")
+    return await engine.run_local(_finish, repo, row, state, pulled_any)
+
+
+async def _sweep(repos, known_orgs, check_mode, seeds, lanes):
+    """Fan every repo's DAG out at once; the engine's two caps do the pacing.
+    Returns ({repo: (row, fingerprint) or exception}, {repo: timing record},
+    fetch-limit report with the fetch counts)."""
+    net_start, net_ceiling, local, smart = lanes
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=local))
+    engine = _Engine(net_start, net_ceiling, local, smart)
+    stats = {r: {"phases": {}, "procs": 0, "wall": 0.0} for r in repos}
+
+    async def guarded(repo):
+        # Each gather() task runs in its own context copy, so this binding is
+        # private to the repo.
+        _STATS.set(stats[repo])
+        started = time.monotonic()
+        try:
+            return await _sweep_repo(repo, known_orgs, check_mode, seeds[repo], engine)
+        except (OSError, ValueError, RuntimeError) as exc:
+            return exc
+        finally:
+            stats[repo]["wall"] = time.monotonic() - started
+
+    results = await asyncio.gather(*(guarded(r) for r in repos))
+    return dict(zip(repos, results)), stats, {**engine.net.report(), **engine.fetches}
+
+
+def _cpu_seconds():
+    """User+system CPU of this process and its reaped children (every git)."""
+    return sum(
+        u.ru_utime + u.ru_stime
+        for u in (resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN))
+    )
+
+
+def _percentile(values, pct):
+    """Nearest-rank percentile; 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def _busy(stats):
+    # Queue time is waiting on the caps, not work done for the repo.
+    return sum(s for name, s in stats["phases"].items() if name != "queued")
+
+
+def _timings(stats, wall, cpu, top):
+    """The `timings` result block: sweep wall time against the summed per-repo
+    busy time and CPU actually burnt, per-phase p50/p95/total across repos, and
+    the `top` slowest repos with their phase breakdown."""
+    phases = {}
+    for record in stats.values():
+        for name, seconds in record["phases"].items():
+            phases.setdefault(name, []).append(seconds)
+    slowest = sorted(stats.items(), key=lambda item: item[1]["wall"], reverse=True)[:max(0, top)]
+    return {
+        "wall_s": round(wall, 3),
+        "busy_s": round(sum(_busy(s) for s in stats.values()), 3),
+        "cpu_s": round(cpu, 3),
+        "procs": sum(s["procs"] for s in stats.values()),
+        "phases": {
+            name: {
+                "p50": round(_percentile(values, 50), 3),
+                "p95": round(_percentile(values, 95), 3),
+                "total": round(sum(values), 3),
+            }
+            for name, values in sorted(phases.items())
+        },
+        "slowest": [
+            {
+                "repo": _repo_label(repo),
+                "wall_s": round(s["wall"], 3),
+                "procs": s["procs"],
+                "phases": {name: round(v, 3) for name, v in sorted(s["phases"].items())},
+            }
+            for repo, s in slowest
+        ],
+    }
+
+
+def _write_trace(path, rows_by_repo, stats, summary, check_mode):
+    """Append one JSON line per repo plus a closing `sweep` line to `path`.
+    Appending keeps earlier sweeps, so the file is an archive `jq` can slice by
+    the shared `sweep` timestamp. A failed write never fails the sweep."""
+    sweep = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+    mode = "check" if check_mode else "apply"
+    lines = []
+    for repo, s in stats.items():
+        row = rows_by_repo[repo]
+        lines.append({
+            "kind": "repo", "sweep": sweep, "mode": mode, "repo": _repo_label(repo),
+            "cached": bool(row.get("cached")), "error": row.get("error", ""),
+            "wall_s": round(s["wall"], 3), "busy_s": round(_busy(s), 3), "procs": s["procs"],
+            "phases": {name: round(v, 3) for name, v in sorted(s["phases"].items())},
+        })
+    lines.append({"kind": "sweep", "sweep": sweep, "mode": mode,
+                  **{k: v for k, v in summary.items() if k != "slowest"}})
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a", encoding="utf-8") as handle:
+            handle.writelines(json.dumps(line) + "\n" for line in lines)
+    except OSError:
+        pass
+
+
+def _stat_token(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "-"
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+def _fingerprint(repo):
+    """Cheap digest of the .git state every derived git call reads - stats only,
+    no subprocess. A loose ref update renames `<ref>.lock` into place, which
+    bumps its parent dir's mtime, so walking the refs/ dirs covers loose refs.
+    FETCH_HEAD is hashed by content instead: every fetch rewrites it, but an
+    idle fetch writes the same bytes."""
+    gitdir = os.path.join(repo, ".git")
+    digest = hashlib.sha256()
+    for name in _FINGERPRINT_PATHS:
+        digest.update(f"{name}={_stat_token(os.path.join(gitdir, name))}\n".encode())
+    for dirpath, dirnames, _ in os.walk(os.path.join(gitdir, "refs")):
+        dirnames.sort()
+        digest.update(f"{dirpath}={_stat_token(dirpath)}\n".encode())
+    try:
+        with open(os.path.join(gitdir, "FETCH_HEAD"), "rb") as handle:
+            digest.update(handle.read())
+    except OSError:
+        pass
+    return digest.hexdigest()
+
+
+def _settled(row, check_mode):
+    """Whether re-sweeping unchanged refs would reproduce `row` exactly - only
+    those rows are cached. A check-mode row always is (nothing was mutated). An
+    apply-mode row is not if it wired remotes, hit a BLOCKED pull, or was behind
+    a canonical remote (its counts predate the pull that integrated them)."""
+    if "error" in row:
+        return False
+    if check_mode:
+        return True
+    if row["wired"] or any("BLOCKED" in p for p in row["pulled"]):
+        return False
+    return not any(rs["behind"] for name, rs in row["remotes"].items() if name != "github")
+
+
+def _cache_path(cache_dir):
+    base = cache_dir or os.path.join(
+        os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "infrastructure",
+    )
+    return os.path.join(base, "repo_status.json")
+
+
+def _load_cache(path):
+    try:
+        with open(path, encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("schema") != CACHE_SCHEMA:
+        return {}
+    entries = data.get("entries")
+    return entries if isinstance(entries, dict) else {}
+
+
+def _save_cache(path, entries):
+    """Write-then-rename so a concurrent sweep never reads a torn file. A failed
+    write only costs the next run its cache hits."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as handle:
+            json.dump({"schema": CACHE_SCHEMA, "entries": entries}, handle)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def _cache_key(repo, check_mode):
+    # Check and apply rows differ (apply reports its pulls), so each mode keeps
+    # its own entry.
+    return f"{'check' if check_mode else 'apply'}:{repo}"
+
+
+def _usable_entry(entry, known_orgs, max_age):
+    """`entry` if it may seed this run: same org list (it decides wiring) and no
+    older than `max_age`. The age cap also bounds how late a branch crossing the
+    24h stale line is noticed on an otherwise idle repo."""
+    if not isinstance(entry, dict) or entry.get("orgs") != sorted(known_orgs):
+        return None
+    if time.time() - entry.get("at", 0) > max_age:
+        return None
+    return entry
+
+
+def _load_watch(path):
+    """The repo-watch index, or None when absent, foreign, stale or written by
+    a process that is no longer running - a dead daemon's index says nothing
+    about what happened after it died, and the pid check catches a crash
+    straight away rather than once the heartbeat ages out."""
+    try:
+        with open(path, encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("schema") != WATCH_SCHEMA:
+        return None
+    if time.time() - data.get("heartbeat", 0) > WATCH_STALE_SECS:
+        return None
+    if not _pid_alive(data.get("pid")):
+        return None
+    return data
+
+
+def _pid_alive(pid):
+    if not isinstance(pid, int) or pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # alive, owned by another user
+    except OSError:
+        return False
+    return True
+
+
+def _quiet(watch, repo, since):
+    """Whether the watcher ran throughout the window since `since` (the last
+    `git status`) and saw no working-tree event in `repo` during it."""
+    if not watch or not since or watch.get("started", since) >= since:
+        return False
+    return watch.get("repos", {}).get(os.path.realpath(repo), 0) < since
 
 
 def _present_repos(root, known_orgs):
@@ -357,6 +1165,10 @@ def _label(row):
     return f"{row.get('org', '?')}/{row['repo']}"
 
 
+def _repo_label(repo):
+    return f"{os.path.basename(os.path.dirname(repo))}/{os.path.basename(repo)}"
+
+
 def _is_action_required(row):
     """Hard signals that block a fresh host - the sweep surfaces them and the run
     FAILS on them: uncommitted/untracked changes, stashed work, unmerged local
@@ -411,12 +1223,21 @@ def _summarize(row):
     return f"{status} {head}" + (" - " + ", ".join(flags) if flags else "")
 
 
-def run_module():
+def run_module():  # pylint: disable=too-many-locals
     module = AnsibleModule(
         argument_spec={
             "root": {"type": "path", "required": True},
             "known_orgs": {"type": "list", "elements": "str", "default": []},
             "parallel": {"type": "int", "default": 8},
+            "parallel_max": {"type": "int", "default": 16},
+            "local_parallel": {"type": "int", "default": 0},
+            "cache": {"type": "bool", "default": True},
+            "cache_dir": {"type": "path", "default": ""},
+            "cache_max_age": {"type": "int", "default": 3600},
+            "fetch": {"type": "str", "default": "smart", "choices": ["all", "smart"]},
+            "watch_index": {"type": "path", "default": ""},
+            "timings_top": {"type": "int", "default": 10},
+            "trace_file": {"type": "path", "default": ""},
         },
         supports_check_mode=True,
     )
@@ -425,21 +1246,61 @@ def run_module():
     if not repos:
         module.fail_json(msg=f"no git checkouts found across known_orgs under the parent of {p['root']}")
 
-    rows = []
-    workers = max(1, p["parallel"])
-    with ThreadPoolExecutor(max_workers=workers) as pool:
-        futures = {pool.submit(_sync_repo, r, p["known_orgs"], module.check_mode): r for r in repos}
-        for fut in as_completed(futures):
-            repo = futures[fut]
-            try:
-                rows.append(fut.result())
-            except (OSError, ValueError, RuntimeError) as exc:
-                rows.append({
-                    "repo": os.path.basename(repo),
-                    "org": os.path.basename(os.path.dirname(repo)),
-                    "error": str(exc),
-                })
-    rows.sort(key=lambda row: (row["repo"], row.get("org", "")))
+    cache_path = _cache_path(p["cache_dir"]) if p["cache"] else ""
+    cache = _load_cache(cache_path) if cache_path else {}
+    # Carry over the other mode's entries for repos still present; this mode's
+    # entries are rebuilt from scratch, so unsettled or vanished repos drop out.
+    fresh = {
+        _cache_key(r, not module.check_mode): cache[_cache_key(r, not module.check_mode)]
+        for r in repos if _cache_key(r, not module.check_mode) in cache
+    }
+
+    seeds = {
+        r: _usable_entry(cache.get(_cache_key(r, module.check_mode)), p["known_orgs"], p["cache_max_age"])
+        for r in repos
+    }
+    watch = _load_watch(p["watch_index"]) if p["watch_index"] else None
+    for r, entry in seeds.items():
+        if entry:
+            seeds[r] = dict(entry, quiet=_quiet(watch, r, entry.get("status_at", 0)))
+
+    lanes = (
+        max(1, p["parallel"]),
+        max(p["parallel"], p["parallel_max"]),
+        max(1, p["local_parallel"] or os.cpu_count() or 4),
+        p["fetch"] == "smart",
+    )
+    sweep_at, started, cpu_before = time.time(), time.monotonic(), _cpu_seconds()
+    results, stats, fetch_limit = asyncio.run(_sweep(repos, p["known_orgs"], module.check_mode, seeds, lanes))
+    timings = _timings(stats, time.monotonic() - started, _cpu_seconds() - cpu_before, p["timings_top"])
+
+    rows_by_repo = {}
+    for repo, result in results.items():
+        if isinstance(result, Exception):
+            rows_by_repo[repo] = {
+                "repo": os.path.basename(repo),
+                "org": os.path.basename(os.path.dirname(repo)),
+                "error": str(result),
+            }
+            continue
+        row, fp = result
+        rows_by_repo[repo] = row
+        if _settled(row, module.check_mode):
+            # A hit keeps its original timestamp so cache_max_age
+            # bounds how long derived values are reused, not refreshed.
+            at = seeds[repo]["at"] if row.get("cached") else time.time()
+            # Dirty counts carried over untouched keep the time they were
+            # actually counted; anything recounted dates from the sweep start.
+            status_at = seeds[repo]["status_at"] if row.get("quiet") else sweep_at
+            fresh[_cache_key(repo, module.check_mode)] = {
+                "fp": fp, "at": at, "status_at": status_at, "orgs": sorted(p["known_orgs"]),
+                "row": {k: v for k, v in row.items() if k not in ("cached", "quiet")},
+            }
+    rows = sorted(rows_by_repo.values(), key=lambda row: (row["repo"], row.get("org", "")))
+    if cache_path:
+        _save_cache(cache_path, fresh)
+    if p["trace_file"]:
+        _write_trace(p["trace_file"], rows_by_repo, stats, timings, module.check_mode)
 
     changed = any(r.get("pulled") or r.get("wired") for r in rows)
     module.exit_json(
@@ -451,6 +1312,10 @@ def run_module():
             f"{_label(r)} (+{r['needs_push']})" for r in rows if r.get("needs_push")
         ],
         repo_count=len(rows),
+        cached_count=sum(1 for r in rows if r.get("cached")),
+        quiet_count=sum(1 for r in rows if r.get("quiet")),
+        fetch_limit=fetch_limit,
+        timings=timings,
     )
 
 
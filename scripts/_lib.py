@@ -6,21 +6,61 @@ Each verb script puts scripts/ on sys.path with a short cookie:
     from pathlib import Path
     sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
     from _lib import run  # noqa: E402
+
+Heavy dependencies load on first use, not at import: most verbs only need
+run() or terraform_run() and should not pay for boto3/botocore.
+`make bench-verb-startup` measures each verb's import cost.
 """
 
+import functools
+import importlib.util
 import os
 import shlex
 import subprocess
 import sys
-
-import boto3
+from pathlib import Path
 
 
 CERT_MANAGER_VERSION = "v1.12.16"
 
 
+@functools.cache
+def client(service, region=None):
+    """A boto3 client, built once per (service, region) for the process.
+    boto3 is imported here, on the first call, not when _lib loads. `region`
+    None defers to the caller's AWS config, as boto3.client() does."""
+    import boto3  # pylint: disable=import-outside-toplevel
+
+    return boto3.client(service, region_name=region)
+
+
 def ssm():
-    return boto3.client("ssm", region_name="us-east-1")
+    return client("ssm", "us-east-1")
+
+
+@functools.cache
+def _ssm_cache():
+    """scripts/ssm-cache.py loaded as a module (its file name is a CLI name,
+    not an importable one)."""
+    spec = importlib.util.spec_from_file_location(
+        "ssm_cache", Path(__file__).with_name("ssm-cache.py"),
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def ssm_parameter(name, *, decrypt=True, ttl=None):
+    """An SSM parameter's value through the short-TTL local cache shared with
+    scripts/ssm-cache.py (docs/ssm-cache.md). A miss is fetched with boto3 and
+    cached for `ttl` seconds (default $SSM_CACHE_TTL or 900; 0 bypasses)."""
+    cache = _ssm_cache()
+    ttl = cache.default_ttl() if ttl is None else ttl
+    value = cache.read(name, decrypt) if ttl > 0 else None
+    if value is None:
+        value = ssm().get_parameter(Name=name, WithDecryption=decrypt)["Parameter"]["Value"]
+        cache.write(name, value, ttl, decrypt)
+    return value
 
 
 def terraform_run(chdir, *, env=None, auto_approve=False):
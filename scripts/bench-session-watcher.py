@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# Micro-benchmark for claude-session-watcher.py's debounce: its deadline-heap
+# scheduler (Debouncer) against the one-second poll over a dirty dict that it
+# replaced, on synthetic paths under one burst of writes. Scheduling cost only:
+# no sink, no filesystem. Run via `make bench-session-watcher`.
+
+import argparse
+import importlib.util
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+DEBOUNCE = 0.2
+WRITES_PER_FILE = 20
+
+
+def load_watcher():
+    """scripts/claude-session-watcher.py as a module (its file name is a CLI
+    name, not an importable one)."""
+    spec = importlib.util.spec_from_file_location(
+        "claude_session_watcher", Path(__file__).with_name("claude-session-watcher.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def poll_loop(dirty: dict, lock: threading.Lock, fired: dict, stop: threading.Event):
+    # The old flusher's scan, same shape: copy the dict under the lock every
+    # second and fire whatever has been quiet long enough.
+    while not stop.is_set():
+        now = time.monotonic()
+        with lock:
+            for path, last_seen in list(dirty.items()):
+                if now - last_seen >= DEBOUNCE:
+                    fired[path] = time.monotonic()
+                    del dirty[path]
+        stop.wait(1.0)
+
+
+def heap_loop(scheduler, fired: dict):
+    while due := scheduler.next_due():
+        now = time.monotonic()
+        for path in due:
+            fired[path] = now
+
+
+def harness(watcher, kind: str, fired: dict, stop: threading.Event):
+    """(thread, record(path), hold(paths, when), close()) for one scheduler."""
+    if kind == "poll":
+        dirty, lock = {}, threading.Lock()
+
+        def record(path):
+            with lock:
+                dirty[path] = time.monotonic()
+
+        def hold(paths, when):
+            with lock:
+                dirty.update((p, when) for p in paths)
+
+        thread = threading.Thread(target=poll_loop, args=(dirty, lock, fired, stop))
+        return thread, record, hold, lambda: None
+    scheduler = watcher.Debouncer(DEBOUNCE)
+
+    def hold_heap(paths, when):
+        for path in paths:
+            scheduler.schedule(path, when)
+
+    thread = threading.Thread(target=heap_loop, args=(scheduler, fired))
+    return thread, scheduler.touch, hold_heap, scheduler.close
+
+
+def burst(record, writes: list[str]) -> tuple[dict, float]:
+    """Record every write; returns ({path: its last write}, seconds per write)."""
+    last = {}
+    started = time.perf_counter()
+    for path in writes:
+        record(path)
+        last[path] = time.monotonic()
+    return last, (time.perf_counter() - started) / len(writes)
+
+
+def measure(watcher, kind: str, paths: list[str], writes: list[str]) -> dict:
+    """Record the burst, wait for everything to fire, then hold every path
+    an hour out (a sink-down backoff, say) and sample idle CPU."""
+    fired = {}
+    stop = threading.Event()
+    thread, record, hold, close = harness(watcher, kind, fired, stop)
+    thread.start()
+
+    last, per_write = burst(record, writes)
+    time.sleep(DEBOUNCE + 1.5)
+    late = sorted(fired[p] - (t + DEBOUNCE) for p, t in last.items() if p in fired)
+
+    hold(paths, time.monotonic() + 3600)
+    cpu = time.process_time()
+    time.sleep(3.0)
+    idle = (time.process_time() - cpu) / 3.0
+
+    stop.set()
+    close()
+    thread.join()
+    return {"write_us": per_write * 1e6, "fired": len(late),
+            "p50": late[len(late) // 2] * 1000, "p99": late[int(len(late) * 0.99)] * 1000,
+            "max": late[-1] * 1000, "idle_ms": idle * 1000}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Debounce scheduler micro-benchmark.")
+    parser.add_argument("--files", type=int, default=10000, help="watched files (default 10000)")
+    args = parser.parse_args()
+
+    watcher = load_watcher()
+    paths = [f"/bench/{i:06d}.jsonl" for i in range(args.files)]
+    writes = [random.choice(paths) for _ in range(args.files * WRITES_PER_FILE)]
+    print(f"{args.files} files, {len(writes)} writes in one burst, debounce {DEBOUNCE}s")
+    results = {kind: measure(watcher, kind, paths, writes) for kind in ("poll", "heap")}
+
+    print(f"{'':26} {'1s poll':>10} {'deadline heap':>14}")
+    rows = [("record one write (us)", "write_us"), ("files fired", "fired"),
+            ("lateness p50 (ms)", "p50"), ("lateness p99 (ms)", "p99"),
+            ("lateness max (ms)", "max"), ("idle CPU (ms per s)", "idle_ms")]
+    for label, key in rows:
+        fmt = "d" if key == "fired" else ".2f"
+        print(f"{label:26} {results['poll'][key]:10{fmt}} {results['heap'][key]:14{fmt}}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
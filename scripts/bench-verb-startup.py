@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# Per-verb startup benchmark for the Python verbs under scripts/{k8s,llama,ansible}/:
+# how long each takes to import (module body, _lib, third-party deps) before
+# main() would run, and which top-level import dominates. Run via
+# `make bench-verb-startup`.
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parent
+VERB_DIRS = ("k8s", "llama", "ansible")
+
+# Loads the verb as a plain module - its `if __name__ == "__main__"` guard
+# keeps main() from running, so only import-time work is measured.
+LOADER = (
+    "import importlib.util, sys; "
+    "spec = importlib.util.spec_from_file_location('verb', sys.argv[1]); "
+    "spec.loader.exec_module(importlib.util.module_from_spec(spec))"
+)
+IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def discover(names: list[str]) -> list[Path]:
+    verbs = sorted(p for d in VERB_DIRS for p in (SCRIPTS / d).glob("*.py"))
+    return [v for v in verbs if not names or v.stem in names]
+
+
+def measure(path: Path | None, runs: int) -> tuple[float, dict[str, int]]:
+    """(median wall ms, {top-level import: cumulative us} from the last run).
+    `path` None times the bare interpreter, the floor every verb pays."""
+    cmd = [sys.executable, "-X", "importtime", "-c", LOADER if path else "pass"]
+    if path:
+        cmd.append(str(path))
+    walls, imports = [], {}
+    for _ in range(runs):
+        start = time.perf_counter()
+        r = subprocess.run(cmd, capture_output=True, text=True, check=False)
+        walls.append((time.perf_counter() - start) * 1000)
+        if r.returncode != 0:
+            raise RuntimeError(r.stderr.strip().splitlines()[-1] if r.stderr.strip() else f"exit {r.returncode}")
+        imports = {}
+        for m in IMPORTTIME.finditer(r.stderr):
+            if len(m.group(3)) == 1:  # one space of indent = imported at top level
+                imports[m.group(4)] = int(m.group(2))
+    return statistics.median(walls), imports
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Import-time benchmark per Python verb.")
+    parser.add_argument("verbs", nargs="*", help="verb script stems to time (default: all)")
+    parser.add_argument("--runs", type=int, default=5, help="runs per verb; the median is reported")
+    args = parser.parse_args()
+
+    floor, base_imports = measure(None, args.runs)
+    print(f"{'verb':<36} {'wall ms':>8} {'over py':>8}  heaviest import")
+    print(f"{'(bare interpreter)':<36} {floor:8.0f} {0:8.0f}")
+    for path in discover(args.verbs):
+        label = f"{path.parent.name}/{path.stem}"
+        try:
+            wall, imports = measure(path, args.runs)
+        except RuntimeError as exc:
+            print(f"{label:<36} {'error':>8}           {exc}")
+            continue
+        extra = {k: v for k, v in imports.items() if k not in base_imports}
+        heavy = max(extra.items(), key=lambda kv: kv[1], default=("-", 0))
+        print(f"{label:<36} {wall:8.0f} {wall - floor:8.0f}  {heavy[0]} ({heavy[1] / 1000:.0f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
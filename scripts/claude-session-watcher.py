@@ -1,15 +1,35 @@
 #!/usr/bin/env python3
 # Per-machine watcher: debounce-POSTs changed Claude session .jsonl files to the
-# tailnet session-sink on kai-server. See docs/claude-session-watcher.md.
+# tailnet session-sink on kai-server. Transcripts are append-only, so after the
+# first upload only the bytes appended since the last ship are sent. Files that
+# settle in the same tick go out in one gzip-compressed request over a pooled
+# connection, from a small worker pool that ships the newest session first and
+# backs off when the sink is down. --stream instead follows each file and
+# forwards appended lines over one long-lived connection as they are written.
+# See docs/claude-session-watcher.md.
+# pylint: disable=too-many-lines
 
 import argparse
+import collections
 import dataclasses
+import gzip
+import hashlib
+import heapq
+import http.client
+import itertools
+import json
 import logging
 import os
 import pathlib
+import queue
+import random
+import socket
+import sqlite3
 import sys
 import threading
 import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 import requests
 from watchdog.events import FileSystemEventHandler
@@ -21,34 +41,189 @@ LOG = logging.getLogger("claude-session-watcher")
 # sidecar lock/temp files Claude Code drops in the same directories.
 SESSION_SUFFIX = ".jsonl"
 
+# Most files the startup sweep hands over before it waits for some to ship:
+# pending, queued and in flight together. Keeps a long history from ever
+# being in memory at once.
+SWEEP_WINDOW = 256
+
+# The prefix fingerprint samples the head of the file and the window just
+# before the committed offset, so checking it costs two small reads instead
+# of re-hashing a tens-of-MB transcript on every tick.
+FINGERPRINT_HEAD = 4096
+FINGERPRINT_TAIL = 65536
+
+# Set once the sink answers 404 on the append endpoint: an older sink that
+# only knows whole-file ingest. Every ship is a full upload from then on.
+_APPEND_UNSUPPORTED = threading.Event()
+# Same for the batch endpoint: each file then goes on its own request.
+_BATCH_UNSUPPORTED = threading.Event()
+
+# Per-thread requests.Session; see http_session().
+_HTTP = threading.local()
+
 
 @dataclasses.dataclass(frozen=True)
 class WatcherConfig:
     """Resolved runtime config. Bundled so the worker functions take one
     argument instead of threading five through every call."""
+    # pylint: disable=too-many-instance-attributes
     session_url: str
+    append_url: str
+    batch_url: str
+    stream_url: str
     machine: str
     projects_dir: pathlib.Path
+    ledger_path: pathlib.Path
     debounce: float
     timeout: float
+    batch_files: int
+    batch_bytes: int
+    compress: bool
+    workers: int
+    metrics_addr: str
+    stream: bool
+
+
+class Ledger:
+    """Per-file committed offset + prefix fingerprint, plus the file's mtime
+    when it was shipped, in sqlite so a restart resumes where the last
+    successful ship left off and the startup sweep can skip files that have
+    not changed since. Shared by the flusher and --once; one lock serialises
+    the (tiny) writes."""
+
+    def __init__(self, path: pathlib.Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS shipped ("
+                " relpath TEXT PRIMARY KEY,"
+                " offset INTEGER NOT NULL,"
+                " fingerprint TEXT NOT NULL,"
+                " mtime_ns INTEGER)")
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(shipped)")}
+            if "mtime_ns" not in columns:
+                # Ledgers written before mtimes were kept: NULL reads as
+                # changed, so each file is checked (not resent) once.
+                self._db.execute("ALTER TABLE shipped ADD COLUMN mtime_ns INTEGER")
+
+    def get(self, relpath: str):
+        """(offset, fingerprint, mtime_ns) of the last ship, or None."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT offset, fingerprint, mtime_ns FROM shipped WHERE relpath = ?",
+                (relpath,)).fetchone()
+
+    def shipped(self, prefix: str) -> dict:
+        """{name: (size, mtime_ns)} for the files directly under `prefix`
+        (a relpath ending in "/", or "" for the top), in one range scan of
+        the primary key, so the sweep does not hit sqlite once per file
+        and only ever holds one directory's entries."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT relpath, offset, mtime_ns FROM shipped"
+                " WHERE relpath >= ? AND relpath < ?", (prefix, prefix + "\U0010ffff"))
+            return {relpath[len(prefix):]: (offset, mtime_ns)
+                    for relpath, offset, mtime_ns in rows
+                    if "/" not in relpath[len(prefix):]}
+
+    def commit(self, relpath: str, offset: int, mark: str, mtime_ns: int):
+        """Record that the sink holds bytes [0, offset), read when the file's
+        mtime was mtime_ns. A file is current while size == offset and its
+        mtime is unchanged."""
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO shipped VALUES (?, ?, ?, ?)",
+                (relpath, offset, mark, mtime_ns))
+
+    def forget(self, relpath: str):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM shipped WHERE relpath = ?", (relpath,))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class Debouncer:
+    """Deadline heap behind the debounce: a file fires once it has been quiet
+    for `debounce` seconds, or at an explicit time (backoff, breaker). One
+    heap entry per pending file - a touch on a file already pending only
+    moves its deadline in a dict, and the entry is pushed back when it
+    surfaces early - so a burst of writes costs O(1) each. next_due()
+    sleeps until the earliest deadline or until an earlier one arrives: an
+    idle watcher does no work, and a file fires at exactly its deadline."""
+
+    def __init__(self, debounce: float):
+        self._debounce = debounce
+        self._cond = threading.Condition()
+        self._heap = []  # (deadline, path), possibly stale; see next_due()
+        self._deadline = {}  # path -> its real deadline
+        self._closed = False
+
+    def __len__(self):
+        with self._cond:
+            return len(self._deadline)
+
+    @property
+    def closed(self) -> bool:
+        with self._cond:
+            return self._closed
+
+    def touch(self, path: str):
+        self.schedule(path, time.monotonic() + self._debounce)
+
+    def schedule(self, path: str, when: float):
+        with self._cond:
+            current = self._deadline.get(path)
+            self._deadline[path] = when
+            if current is None or when < current:
+                heapq.heappush(self._heap, (when, path))
+                if self._heap[0] == (when, path):
+                    self._cond.notify()
+
+    def next_due(self) -> list:
+        """Block until at least one file is due and return the due paths,
+        or [] once close() was called."""
+        with self._cond:
+            while not self._closed:
+                now = time.monotonic()
+                due = []
+                while self._heap and self._heap[0][0] <= now:
+                    when, path = heapq.heappop(self._heap)
+                    deadline = self._deadline.get(path)
+                    if deadline == when:
+                        del self._deadline[path]
+                        due.append(path)
+                    elif deadline is not None and deadline > when:
+                        # Touched since this entry was pushed.
+                        heapq.heappush(self._heap, (deadline, path))
+                    # deadline < when: an earlier entry for it is queued.
+                if due:
+                    return due
+                self._cond.wait(self._heap[0][0] - now if self._heap else None)
+            return []
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
 
 
 class SessionHandler(FileSystemEventHandler):
-    """Records every touched .jsonl path with the time it was last seen.
+    """Pushes every touched .jsonl path's debounce deadline out.
 
-    The flusher thread owns the actual POSTing. This handler only ever
-    marks files dirty, so a burst of inotify events is cheap.
+    The flusher threads own the actual POSTing. This handler only ever
+    touches the scheduler, so a burst of inotify events is cheap.
     """
 
-    def __init__(self, dirty: dict, lock: threading.Lock):
-        self._dirty = dirty
-        self._lock = lock
+    def __init__(self, scheduler: Debouncer):
+        self._scheduler = scheduler
 
     def _mark(self, path: str):
-        if not path.endswith(SESSION_SUFFIX):
-            return
-        with self._lock:
-            self._dirty[path] = time.monotonic()
+        if path.endswith(SESSION_SUFFIX):
+            self._scheduler.touch(path)
 
     def on_created(self, event):
         if not event.is_directory:
@@ -64,78 +239,950 @@ class SessionHandler(FileSystemEventHandler):
             self._mark(event.dest_path)
 
 
-def post_file(cfg: WatcherConfig, path: pathlib.Path) -> bool:
-    """POST one session file to the sink. Returns True on a 2xx."""
+def fingerprint(fh, offset: int) -> str:
+    """Hash of the first FINGERPRINT_HEAD bytes, the FINGERPRINT_TAIL bytes
+    ending at `offset`, and offset itself. A rewritten or truncated-then-
+    regrown transcript changes it; an append past `offset` does not."""
+    return fingerprint_of(offset, *fingerprint_window(fh, offset))
+
+
+def fingerprint_window(fh, offset: int) -> tuple[bytes, bytes]:
+    """The two byte ranges fingerprint() hashes: head and tail window."""
+    fh.seek(0)
+    head = fh.read(min(offset, FINGERPRINT_HEAD))
+    tail = max(0, offset - FINGERPRINT_TAIL)
+    fh.seek(tail)
+    return head, fh.read(offset - tail)
+
+
+def fingerprint_of(offset: int, head: bytes, window: bytes) -> str:
+    digest = hashlib.sha256(str(offset).encode())
+    digest.update(head)
+    digest.update(window)
+    return digest.hexdigest()
+
+
+def relpath_of(cfg: WatcherConfig, path: pathlib.Path) -> str:
     try:
-        relpath = path.relative_to(cfg.projects_dir).as_posix()
+        return path.relative_to(cfg.projects_dir).as_posix()
     except ValueError:
         # Watcher only ever sees paths under projects_dir, but be safe.
-        relpath = path.name
+        return path.name
+
+
+def http_session() -> requests.Session:
+    """This thread's pooled session: keep-alive connections to the sink are
+    reused across ships instead of a fresh TCP (+ TLS) handshake per POST."""
+    session = getattr(_HTTP, "session", None)
+    if session is None:
+        session = _HTTP.session = requests.Session()
+    return session
+
+
+@dataclasses.dataclass(frozen=True)
+class Upload:
+    """One file's pending ship: bytes [start, end) of `path`, plus what the
+    ledger records once the sink confirms them."""
+    path: pathlib.Path
+    relpath: str
+    chunk: bytes
+    start: int
+    end: int
+    mark: str
+    mtime_ns: int
+
+
+def read_delta(cfg: WatcherConfig, ledger: Ledger, path: pathlib.Path):
+    """The Upload `path` needs: the bytes appended since the last committed
+    offset, or the whole file when there is no offset, the file shrank, or
+    its prefix fingerprint moved. True if the sink already holds all of it,
+    False if the file could not be read."""
+    relpath = relpath_of(cfg, path)
     try:
         with path.open("rb") as fh:
-            resp = requests.post(
-                cfg.session_url,
-                # The sink keys storage on machine + relpath, so two
-                # machines with a colliding session UUID stay distinct.
-                data={"machine": cfg.machine, "relpath": relpath},
-                files={"file": (path.name, fh, "application/x-ndjson")},
-                headers={"X-Session-Machine": cfg.machine},
-                timeout=cfg.timeout,
-            )
-    except (OSError, requests.RequestException) as exc:
+            st = os.fstat(fh.fileno())
+            size = st.st_size
+            start = 0
+            committed = ledger.get(relpath)
+            if (committed and committed[0] <= size
+                    and fingerprint(fh, committed[0]) == committed[1]):
+                if committed[0] == size:
+                    # Nothing appended since the last ship. Touched only:
+                    # note the new mtime so the next sweep skips it.
+                    if committed[2] != st.st_mtime_ns:
+                        ledger.commit(relpath, size, committed[1], st.st_mtime_ns)
+                    return True
+                if not _APPEND_UNSUPPORTED.is_set():
+                    start = committed[0]
+            fh.seek(start)
+            chunk = fh.read(size - start)
+            end = start + len(chunk)
+            return Upload(path, relpath, chunk, start, end,
+                          fingerprint(fh, end), st.st_mtime_ns)
+    except OSError as exc:
+        LOG.warning("read failed for %s: %s", relpath, exc)
+        return False
+
+
+def post_chunk(cfg: WatcherConfig, relpath: str, chunk: bytes, offset: int):
+    """POST bytes [offset, offset+len) of one session file. offset 0 is a
+    whole-file upload to the ingest endpoint; anything else goes to the
+    append endpoint. Returns the response, or None on a transport error."""
+    fields = {
+        # The sink keys storage on machine + relpath, so two
+        # machines with a colliding session UUID stay distinct.
+        "machine": cfg.machine,
+        "relpath": relpath,
+        "sha256": hashlib.sha256(chunk).hexdigest(),
+    }
+    url = cfg.session_url
+    if offset:
+        fields["offset"] = str(offset)
+        url = cfg.append_url
+    try:
+        resp = http_session().post(
+            url,
+            data=fields,
+            files={"file": (pathlib.PurePosixPath(relpath).name, chunk,
+                            "application/x-ndjson")},
+            headers={"X-Session-Machine": cfg.machine},
+            timeout=cfg.timeout,
+        )
+    except requests.RequestException as exc:
         LOG.warning("POST failed for %s: %s", relpath, exc)
+        _BREAKER.failure()
+        return None
+    report_reachability(resp.status_code)
+    return resp
+
+
+def report_reachability(status: int):
+    # A 5xx is the proxy in front of a down sink as often as the sink itself.
+    if status >= 500:
+        _BREAKER.failure()
+    else:
+        _BREAKER.success()
+
+
+def post_upload(cfg: WatcherConfig, ledger: Ledger, upload: Upload) -> bool:
+    """Ship one Upload on its own request (ingest or append endpoint).
+    Returns True once the sink holds everything read."""
+    resp = post_chunk(cfg, upload.relpath, upload.chunk, upload.start)
+    if resp is not None and upload.start and resp.status_code in (404, 409):
+        # 404: a sink without the append endpoint. 409: the sink does not
+        # hold exactly `start` bytes (lost its copy, or a different sink).
+        # Either way the only safe recovery is a whole-file upload.
+        if resp.status_code == 404:
+            LOG.warning("sink has no append endpoint; full uploads only")
+            _APPEND_UNSUPPORTED.set()
+        else:
+            LOG.info("sink out of step on %s; resending whole file", upload.relpath)
+        ledger.forget(upload.relpath)
+        return post_file(cfg, ledger, upload.path)
+    if resp is None:
         return False
     if resp.status_code >= 300:
         LOG.warning("sink rejected %s: HTTP %s %s",
-                    relpath, resp.status_code, resp.text[:200])
+                    upload.relpath, resp.status_code, resp.text[:200])
         return False
-    LOG.info("shipped %s (%d bytes)", relpath, path.stat().st_size
-             if path.exists() else 0)
+    commit_upload(ledger, upload)
     return True
 
 
-def flush_loop(cfg: WatcherConfig, dirty: dict, lock: threading.Lock,
-               stop: threading.Event):
-    """Ship files that have been quiet for `cfg.debounce` seconds.
+def commit_upload(ledger: Ledger, upload: Upload):
+    # An append after the read leaves size != end, so the file stays dirty.
+    ledger.commit(upload.relpath, upload.end, upload.mark, upload.mtime_ns)
+    if upload.start:
+        LOG.info("shipped %s (%d bytes appended at %d)",
+                 upload.relpath, len(upload.chunk), upload.start)
+    else:
+        LOG.info("shipped %s (%d bytes)", upload.relpath, len(upload.chunk))
+
+
+def post_file(cfg: WatcherConfig, ledger: Ledger, path: pathlib.Path) -> bool:
+    """Ship one session file on its own request. Returns True once the sink
+    holds everything up to the current size."""
+    upload = read_delta(cfg, ledger, path)
+    if isinstance(upload, bool):
+        return upload
+    return post_upload(cfg, ledger, upload)
+
+
+def batches(cfg: WatcherConfig, uploads: list):
+    """Split uploads into runs of at most cfg.batch_files files and
+    cfg.batch_bytes raw bytes. A file over the byte budget goes alone."""
+    batch, size = [], 0
+    for upload in uploads:
+        if batch and (len(batch) >= cfg.batch_files
+                      or size + len(upload.chunk) > cfg.batch_bytes):
+            yield batch
+            batch, size = [], 0
+        batch.append(upload)
+        size += len(upload.chunk)
+    if batch:
+        yield batch
+
+
+def batch_request(cfg: WatcherConfig, batch: list):
+    """The batch endpoint's multipart request for these Uploads, body
+    gzip-compressed unless disabled. Returns (prepared request, raw size)."""
+    fields = [("machine", cfg.machine)]
+    files = []
+    for i, upload in enumerate(batch):
+        fields += [(f"relpath.{i}", upload.relpath),
+                   (f"offset.{i}", str(upload.start)),
+                   (f"sha256.{i}", hashlib.sha256(upload.chunk).hexdigest())]
+        files.append((f"file.{i}", (upload.path.name, upload.chunk,
+                                    "application/x-ndjson")))
+    session = http_session()
+    request = session.prepare_request(requests.Request(
+        "POST", cfg.batch_url, data=fields, files=files,
+        headers={"X-Session-Machine": cfg.machine}))
+    raw = len(request.body)
+    if cfg.compress:
+        request.body = gzip.compress(request.body)
+        request.headers["Content-Encoding"] = "gzip"
+        request.headers["Content-Length"] = str(len(request.body))
+    return request, raw
+
+
+def post_batch(cfg: WatcherConfig, ledger: Ledger, batch: list, resend: list):
+    """Ship several Uploads in one request to the batch endpoint. Returns the
+    set of shipped path strings, or None if the sink has no batch endpoint.
+    Paths the sink is out of step on are appended to `resend`."""
+    request, raw = batch_request(cfg, batch)
+    try:
+        resp = http_session().send(request, timeout=cfg.timeout)
+    except requests.RequestException as exc:
+        LOG.warning("batch POST failed (%d files): %s", len(batch), exc)
+        _BREAKER.failure()
+        return set()
+    report_reachability(resp.status_code)
+    if resp.status_code == 404:
+        LOG.warning("sink has no batch endpoint; one request per file")
+        _BATCH_UNSUPPORTED.set()
+        return None
+    try:
+        results = resp.json()["results"] if resp.status_code < 300 else None
+    except (ValueError, KeyError, TypeError):
+        results = None
+    if not isinstance(results, list) or len(results) != len(batch):
+        LOG.warning("sink rejected batch of %d: HTTP %s %s",
+                    len(batch), resp.status_code, resp.text[:200])
+        return set()
+    LOG.info("batch of %d file(s): %d bytes, %d on the wire",
+             len(batch), raw, len(request.body))
+    shipped = set()
+    for upload, result in zip(batch, results):
+        status = result.get("status", 0) if isinstance(result, dict) else 0
+        if 200 <= status < 300:
+            commit_upload(ledger, upload)
+            shipped.add(str(upload.path))
+        elif status == 409:
+            # Out of step: forget the offset so the retry is a whole file.
+            LOG.info("sink out of step on %s; resending whole file", upload.relpath)
+            ledger.forget(upload.relpath)
+            resend.append(upload.path)
+        else:
+            LOG.warning("sink rejected %s in batch: %s", upload.relpath, result)
+    return shipped
+
+
+class Breaker:
+    """Circuit breaker over the sink's reachability. `threshold` transport
+    failures in a row (connection refused, timeout, 5xx from the proxy)
+    open it: nothing is dispatched for `cooldown` seconds, doubling per
+    failed probe up to `max_cooldown`. Then one probe request is let
+    through; its success closes the breaker. A probe slot whose batch
+    sent no request is handed back with release()."""
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, threshold=3, cooldown=5.0, max_cooldown=300.0):
+        self._threshold = threshold
+        self._base = cooldown
+        self._max = max_cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._cooldown = cooldown
+        self._opened = None  # monotonic time it opened; None = closed
+        self._probing = False  # or the ident of the thread holding the probe
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened is None:
+                return "closed"
+            return "half-open" if self._probing else "open"
+
+    def blocked(self) -> bool:
+        """True while open and cooling down, or while a probe is out."""
+        with self._lock:
+            if self._opened is None:
+                return False
+            return self._probing or time.monotonic() - self._opened < self._cooldown
+
+    def retry_at(self) -> float:
+        """Monotonic time worth trying again: the end of the cooldown, or
+        shortly, while a probe is out."""
+        with self._lock:
+            if self._opened is None:
+                return time.monotonic()
+            if self._probing:
+                return time.monotonic() + 1.0
+            return self._opened + self._cooldown
+
+    def allow(self) -> bool:
+        """May a request go out now? Past the cooldown, the first caller
+        gets the probe slot."""
+        with self._lock:
+            if self._opened is None:
+                return True
+            if self._probing or time.monotonic() - self._opened < self._cooldown:
+                return False
+            self._probing = threading.get_ident()
+            return True
+
+    def release(self):
+        """Hand back this thread's probe slot if it is still held: neither
+        success() nor failure() ran because nothing was sent (every file
+        in the batch was already shipped or gone). The cooldown has
+        passed, so the next allow() probes again straight away."""
+        with self._lock:
+            if self._probing == threading.get_ident():
+                self._probing = False
+
+    def success(self):
+        with self._lock:
+            if self._opened is not None:
+                LOG.info("sink reachable again; circuit closed")
+            self._failures = 0
+            self._cooldown = self._base
+            self._opened = None
+            self._probing = False
+
+    def failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing:
+                self._cooldown = min(self._max, self._cooldown * 2)
+            elif self._opened is not None or self._failures < self._threshold:
+                return
+            self._probing = False
+            self._opened = time.monotonic()
+            LOG.warning("sink unreachable; circuit open for %.0fs", self._cooldown)
+
+
+class Metrics:
+    """Counters and a ship-latency histogram, rendered as Prometheus text
+    (SESSION_WATCHER_METRICS) and as a periodic log line."""
+
+    BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.shipped = self.failed = self.requests = 0
+        self._buckets = [0] * len(self.BUCKETS)
+        self._sum = 0.0
+
+    def observe(self, seconds: float, shipped: int, failed: int):
+        with self._lock:
+            self.requests += 1
+            self.shipped += shipped
+            self.failed += failed
+            self._sum += seconds
+            for i, bound in enumerate(self.BUCKETS):
+                if seconds <= bound:
+                    self._buckets[i] += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bucket bound holding the q-th ship latency (0 if none)."""
+        with self._lock:
+            if not self.requests:
+                return 0.0
+            for bound, count in zip(self.BUCKETS, self._buckets):
+                if count >= q * self.requests:
+                    return bound
+            return float("inf")
+
+    def render(self, gauges: dict) -> str:
+        prefix = "claude_session_watcher"
+        lines = [f"{prefix}_{name} {value}" for name, value in gauges.items()]
+        with self._lock:
+            lines += [f"{prefix}_shipped_files_total {self.shipped}",
+                      f"{prefix}_failed_files_total {self.failed}"]
+            lines += [f'{prefix}_ship_seconds_bucket{{le="{bound}"}} {count}'
+                      for bound, count in zip(self.BUCKETS, self._buckets)]
+            lines += [f'{prefix}_ship_seconds_bucket{{le="+Inf"}} {self.requests}',
+                      f"{prefix}_ship_seconds_sum {self._sum:.6f}",
+                      f"{prefix}_ship_seconds_count {self.requests}"]
+        return "\n".join(lines) + "\n"
 
-    A file that fails to POST is left in the dirty set and retried on the
-    next tick - its timestamp is not refreshed, so it stays eligible.
+
+# Module-wide, like the *_UNSUPPORTED flags: every request path reports to
+# it, the flusher reads it before dispatching.
+_BREAKER = Breaker()
+
+
+class Flusher:
+    """Ships due files on a small worker pool.
+
+    The dispatcher blocks in Debouncer.next_due() and moves each due file
+    onto a priority queue, newest mtime first, so the session being worked
+    in ships ahead of a backfill. Each worker takes up to `cfg.batch_files`
+    paths off the queue per request (see ship()), so one slow POST holds
+    up only its own batch. A failed file is rescheduled with exponential
+    backoff and jitter; while the breaker is open, due files are pushed to
+    its next probe without penalty.
     """
-    while not stop.is_set():
-        now = time.monotonic()
-        ready = []
-        with lock:
-            for path, last_seen in list(dirty.items()):
-                if now - last_seen >= cfg.debounce:
-                    ready.append(path)
-        for path_str in ready:
-            path = pathlib.Path(path_str)
-            if not path.exists():
+    # pylint: disable=too-many-instance-attributes
+
+    RETRY_BASE = 2.0
+    RETRY_MAX = 300.0
+    LOG_INTERVAL = 60.0
+
+    def __init__(self, cfg: WatcherConfig, ledger: Ledger, scheduler: Debouncer):
+        self.cfg = cfg
+        self.ledger = ledger
+        self.scheduler = scheduler
+        self.lock = threading.Lock()  # guards inflight, rerun and backoff
+        self.room = threading.Condition(self.lock)  # a file settled; see backfill()
+        self.queue = queue.PriorityQueue()
+        self.inflight = set()
+        self.rerun = set()  # came due again while in flight
+        self.backoff = {}  # path -> consecutive failures
+        self.metrics = Metrics()
+        self._seq = itertools.count()
+        self._last_log = time.monotonic()
+
+    def gauges(self) -> dict:
+        with self.lock:
+            return {"queue_depth": self.queue.qsize(),
+                    "in_flight": len(self.inflight),
+                    "pending_files": len(self.scheduler),
+                    "backing_off_files": len(self.backoff),
+                    "circuit_open": int(_BREAKER.state != "closed")}
+
+    def backfill(self, path: str) -> bool:
+        """Startup-sweep entry point: schedule `path` now, once fewer than
+        SWEEP_WINDOW files are pending, queued or in flight. Blocks the
+        sweep (backpressure) until then. False once stopped."""
+        with self.room:
+            self.room.wait_for(lambda: self.scheduler.closed or len(self.scheduler)
+                               + self.queue.qsize() + len(self.inflight) < SWEEP_WINDOW)
+        if self.scheduler.closed:
+            return False
+        self.scheduler.schedule(path, 0.0)
+        return True
+
+    def dispatch(self, paths: list):
+        if _BREAKER.blocked():
+            retry_at = _BREAKER.retry_at()
+            for path in paths:
+                self.scheduler.schedule(path, retry_at)
+            return
+        for path in paths:
+            with self.lock:
+                if path in self.inflight:
+                    # Never two ships of one file at once; it goes again
+                    # when the current one settles.
+                    self.rerun.add(path)
+                    continue
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
                 # Session file deleted before it settled; drop it.
-                with lock:
-                    dirty.pop(path_str, None)
+                with self.room:
+                    self.backoff.pop(path, None)
+                    self.room.notify_all()
                 continue
-            if post_file(cfg, path):
-                with lock:
-                    dirty.pop(path_str, None)
-        stop.wait(1.0)
+            with self.lock:
+                self.inflight.add(path)
+            self.queue.put((-mtime, next(self._seq), path))
+
+    def settle(self, paths: list, done: set, penalise: bool = True):
+        """Record a batch's outcome: a failed file is rescheduled after its
+        backoff, a file that came due mid-flight goes again now."""
+        now = time.monotonic()
+        for path in paths:
+            with self.lock:
+                self.inflight.discard(path)
+                again = path in self.rerun
+                self.rerun.discard(path)
+                if path in done:
+                    self.backoff.pop(path, None)
+                    failures = None
+                else:
+                    failures = self.backoff[path] = self.backoff.get(path, 0) + penalise
+            if failures is not None:
+                delay = min(self.RETRY_MAX, self.RETRY_BASE * 2 ** max(0, failures - 1))
+                # Full-range jitter keeps a fleet of failed files from
+                # retrying in lockstep against a recovering sink.
+                self.scheduler.schedule(path, now + delay * random.uniform(0.5, 1.0))
+            elif again:
+                self.scheduler.schedule(path, now)
+        with self.room:
+            self.room.notify_all()
+
+    def work(self):
+        """Worker loop; exits on the None sentinel stop() queues."""
+        while True:
+            item = self.queue.get()
+            if item[2] is None:
+                return
+            items = [item]
+            while len(items) < self.cfg.batch_files:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item[2] is None:
+                    # Another worker's stop sentinel: put it back, or that
+                    # worker blocks in get() forever.
+                    self.queue.put(item)
+                    break
+                items.append(item)
+            paths = [item[2] for item in items]
+            if not _BREAKER.allow():
+                self.settle(paths, set(), penalise=False)
+                continue
+            started = time.monotonic()
+            try:
+                done = ship(self.cfg, self.ledger, [pathlib.Path(p) for p in paths])
+            finally:
+                _BREAKER.release()
+            self.metrics.observe(time.monotonic() - started,
+                                 len(done), len(paths) - len(done))
+            self.settle(paths, done)
+            self.log_metrics()
+
+    def log_metrics(self):
+        """The metrics line, at most once per LOG_INTERVAL, after a ship."""
+        with self.lock:
+            if time.monotonic() - self._last_log < self.LOG_INTERVAL:
+                return
+            self._last_log = time.monotonic()
+        LOG.info("metrics: %s, shipped=%d failed=%d p50=%.2fs p95=%.2fs",
+                 " ".join(f"{k}={v}" for k, v in self.gauges().items()),
+                 self.metrics.shipped, self.metrics.failed,
+                 self.metrics.quantile(0.5), self.metrics.quantile(0.95))
+
+    def run(self):
+        """Dispatcher loop, until the scheduler is closed."""
+        while due := self.scheduler.next_due():
+            self.dispatch(due)
+
+    def stop(self, workers: int):
+        self.scheduler.close()
+        with self.room:
+            self.room.notify_all()  # releases a sweep parked in backfill()
+        for _ in range(workers):
+            # Sorts ahead of any real item: workers stop before the backlog.
+            self.queue.put((float("-inf"), next(self._seq), None))
+
+
+def serve_metrics(flusher, address: str):
+    """Serve GET /metrics (Prometheus text) on host:port, on a daemon
+    thread. Bind to localhost or the tailnet address, not 0.0.0.0.
+    `flusher` is a Flusher or a Streamer: anything with .metrics and
+    .gauges(). Returns the server."""
+    host, _, port = address.rpartition(":")
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        """GET /metrics only."""
 
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = flusher.metrics.render(flusher.gauges()).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
 
-def initial_sweep(dirty: dict, lock: threading.Lock,
-                  projects_dir: pathlib.Path):
-    """Mark every pre-existing session file dirty on startup.
+        def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+            pass
+
+    server = ThreadingHTTPServer((host or "127.0.0.1", int(port)), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    LOG.info("metrics on http://%s:%s/metrics", host or "127.0.0.1", port)
+    return server
+
+
+def ship(cfg: WatcherConfig, ledger: Ledger, paths: list,
+         retry: bool = True) -> set:
+    """Ship every path that is ready this tick, batched. Returns the path
+    strings the sink now holds in full (including ones with nothing new).
+    Files the sink was out of step on go once more, whole, when `retry`."""
+    done, uploads, resend = set(), [], []
+    for path in paths:
+        upload = read_delta(cfg, ledger, path)
+        if upload is True:
+            done.add(str(path))
+        elif upload:
+            uploads.append(upload)
+    for batch in batches(cfg, uploads):
+        shipped = None
+        if not _BATCH_UNSUPPORTED.is_set():
+            shipped = post_batch(cfg, ledger, batch, resend)
+        if shipped is None:
+            shipped = {str(u.path) for u in batch if post_upload(cfg, ledger, u)}
+        done |= shipped
+    if resend and retry:
+        done |= ship(cfg, ledger, resend, retry=False)
+    return done
+
+
+def sweep(projects_dir: pathlib.Path, ledger: Ledger, relprefix: str = ""):
+    """Yield (path, current) for every session file under projects_dir, a
+    directory at a time, newest mtime first within each. `current`: its
+    size and mtime match the ledger (shipped, unchanged since).
+
+    A generator over os.scandir rather than rglob() into the scheduler:
+    what is held is one directory's listing per level (and that
+    directory's ledger rows), so memory stays flat however long the
+    history, and the first file ships while the rest are still unread.
+    """
+    entries = []
+    try:
+        with os.scandir(projects_dir / relprefix) as listing:
+            for entry in listing:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        entries.append((entry.stat(follow_symlinks=False).st_mtime_ns, entry.name, None))
+                    elif entry.name.endswith(SESSION_SUFFIX) and entry.is_file():
+                        st = entry.stat()
+                        entries.append((st.st_mtime_ns, entry.name, st.st_size))
+                except OSError:
+                    continue  # gone between listing and stat
+    except OSError as exc:
+        LOG.warning("sweep skipped %s: %s", projects_dir / relprefix, exc)
+        return
+    entries.sort(reverse=True)
+    shipped = ledger.shipped(relprefix) if any(e[2] is not None for e in entries) else {}
+    for mtime_ns, name, size in entries:
+        if size is None:
+            yield from sweep(projects_dir, ledger, f"{relprefix}{name}/")
+        else:
+            yield (str(projects_dir / relprefix / name),
+                   shipped.get(name) == (size, mtime_ns))
+
+
+def backfill(target, projects_dir: pathlib.Path, ledger: Ledger):
+    """Startup-sweep thread: hand every pre-existing session file that is
+    not already current to `target` (a Flusher or Streamer), whose
+    backfill() blocks while SWEEP_WINDOW files are outstanding.
 
     Without this, a fresh install would only ever ship sessions touched
     after the watcher came up - every session from before launch would
     be invisible to the pipeline until its next edit.
     """
-    count = 0
-    for path in projects_dir.rglob(f"*{SESSION_SUFFIX}"):
-        with lock:
-            # Backdate so the first flush tick ships them immediately.
-            dirty[str(path)] = time.monotonic() - 3600
-        count += 1
-    LOG.info("initial sweep queued %d existing session file(s)", count)
+    count = skipped = 0
+    for path, current in sweep(projects_dir, ledger):
+        if current:
+            skipped += 1
+        elif target.backfill(path):
+            count += 1
+        else:
+            return  # target stopped
+    LOG.info("initial sweep queued %d existing session file(s), "
+             "%d already current", count, skipped)
+
+
+@dataclasses.dataclass
+class Tail:
+    """One file --stream is following: how far it has been sent, plus the
+    bytes its fingerprint covers at that offset, kept in memory so marking
+    a frame re-reads nothing."""
+    path: str
+    relpath: str
+    sent: int
+    head: bytes
+    window: bytes
+    touched: float = 0.0
+
+    def advance(self, data: bytes):
+        self.touched = time.monotonic()
+        self.sent += len(data)
+        if len(self.head) < FINGERPRINT_HEAD:
+            self.head = (self.head + data[:FINGERPRINT_HEAD])[:FINGERPRINT_HEAD]
+        self.window = (self.window + data[-FINGERPRINT_TAIL:])[-FINGERPRINT_TAIL:]
+
+
+# Scheduler key for the stream's heartbeat; no session file has an empty path.
+_HEARTBEAT = ""
+
+
+class Streamer:
+    """--stream mode: follows every session file and forwards what is
+    appended, complete lines only, over one long-lived chunked POST to the
+    sink's stream endpoint.
+
+    The request body is a run of frames: a JSON header line (relpath,
+    offset, length, sha256) then `length` raw bytes. The sink answers
+    with one ack line per frame on the chunked response, in order, while
+    the request is still open. Each Tail remembers how far it has sent, so
+    a write costs one seek and one read of the new bytes. The ledger moves
+    only on an ack: after a dropped connection every followed file resumes
+    from its last acked offset (the sink accepts the replayed overlap),
+    and a file the sink is out of step on is resent whole. A heartbeat
+    frame every HEARTBEAT seconds keeps an idle stream open and proves the
+    sink still answers.
+    """
+    # pylint: disable=too-many-instance-attributes
+
+    HEARTBEAT = 30.0
+    RECONNECT = 2.0
+    FRAME_MAX = 1 << 20
+    # A Tail holds ~68 KiB; one idle this long is dropped, and a later
+    # write picks the file up again from the ledger.
+    IDLE_EVICT = 600.0
+
+    def __init__(self, cfg: WatcherConfig, ledger: Ledger, scheduler: Debouncer):
+        self.cfg = cfg
+        self.ledger = ledger
+        self.scheduler = scheduler
+        self.lock = threading.Lock()  # guards tails and conn
+        self.room = threading.Condition(self.lock)  # see backfill()
+        self.tails = {}  # path -> Tail
+        self.conn = None
+        self.pending = collections.deque()  # this connection's unacked frames
+        self.unsupported = False
+        self.metrics = Metrics()
+        self._last_log = time.monotonic()
+
+    def gauges(self) -> dict:
+        with self.lock:
+            return {"followed_files": len(self.tails),
+                    "unacked_frames": len(self.pending),
+                    "stream_connected": int(self.conn is not None),
+                    "circuit_open": int(_BREAKER.state != "closed")}
+
+    def backfill(self, path: str) -> bool:
+        """Startup-sweep entry point, as Flusher.backfill(): waits while
+        SWEEP_WINDOW files are due or backing off."""
+        with self.room:
+            self.room.wait_for(lambda: self.scheduler.closed
+                               or len(self.scheduler) < SWEEP_WINDOW)
+        if self.scheduler.closed:
+            return False
+        self.scheduler.schedule(path, 0.0)
+        return True
+
+    def connect(self) -> bool:
+        """Open the stream and start its ack reader. False on failure; sets
+        `unsupported` if the sink has no stream endpoint."""
+        url = urllib.parse.urlsplit(self.cfg.stream_url)
+        cls = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+        conn = cls(url.netloc, timeout=self.cfg.timeout)
+        try:
+            conn.putrequest("POST", (url.path or "/") + (f"?{url.query}" if url.query else ""))
+            conn.putheader("Content-Type", "application/x-ndjson")
+            conn.putheader("Transfer-Encoding", "chunked")
+            conn.putheader("X-Session-Machine", self.cfg.machine)
+            conn.endheaders()
+            # The sink answers before the body ends; acks follow on it.
+            resp = conn.getresponse()
+        except (OSError, http.client.HTTPException) as exc:
+            LOG.warning("stream connect failed: %s", exc)
+            conn.close()
+            _BREAKER.failure()
+            return False
+        report_reachability(resp.status)
+        if resp.status != 200:
+            if resp.status == 404:
+                self.unsupported = True
+            else:
+                LOG.warning("sink refused the stream: HTTP %s", resp.status)
+            conn.close()
+            return False
+        # An idle stream still sees a heartbeat ack every HEARTBEAT seconds.
+        conn.sock.settimeout(self.HEARTBEAT + self.cfg.timeout)
+        pending = collections.deque()
+        with self.lock:
+            self.conn, self.pending = conn, pending
+        threading.Thread(target=self.read_acks, args=(conn, resp, pending),
+                         daemon=True).start()
+        self.scheduler.schedule(_HEARTBEAT, time.monotonic() + self.HEARTBEAT)
+        LOG.info("streaming to %s", self.cfg.stream_url)
+        return True
+
+    def drop(self, conn, reason):
+        """Close `conn` if it is still the live stream. Every followed file
+        is rescheduled, to resume from its last acked offset."""
+        with self.lock:
+            if self.conn is not conn:
+                return
+            self.conn = None
+            paths = list(self.tails)
+            self.tails.clear()
+        self.hang_up(conn)
+        _BREAKER.failure()
+        LOG.warning("stream dropped: %s", reason)
+        for path in paths:
+            self.scheduler.schedule(path, time.monotonic())
+
+    @staticmethod
+    def hang_up(conn):
+        """Close `conn`. The shutdown wakes its ack reader, which a close
+        from this thread alone would leave blocked in recv until the next
+        heartbeat."""
+        if conn.sock is not None:
+            try:
+                conn.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        conn.close()
+
+    def send(self, header: dict, data: bytes = b""):
+        """One frame as one chunk. Drops the stream on a send error."""
+        conn = self.conn
+        if conn is None:
+            return  # dropped under us; the file was rescheduled
+        frame = json.dumps(header, separators=(",", ":")).encode() + b"\n" + data
+        try:
+            conn.send(b"%x\r\n%b\r\n" % (len(frame), frame))
+        except OSError as exc:
+            self.drop(conn, exc)
+
+    def follow(self, path: str, fh, size: int) -> Tail:
+        """Start following `path` from its ledger offset, or from 0 (a
+        whole-file frame) if the ledger has none or the fingerprint moved."""
+        relpath = relpath_of(self.cfg, pathlib.Path(path))
+        tail = Tail(path, relpath, 0, b"", b"")
+        committed = self.ledger.get(relpath)
+        if committed and committed[0] <= size:
+            head, window = fingerprint_window(fh, committed[0])
+            if fingerprint_of(committed[0], head, window) == committed[1]:
+                tail = Tail(path, relpath, committed[0], head, window)
+        tail.touched = time.monotonic()
+        with self.lock:
+            self.tails[path] = tail
+        return tail
+
+    def pump(self, path: str):
+        """Send what `path` gained since its last frame: complete lines,
+        up to FRAME_MAX (a backfill goes in slices, rescheduled, so live
+        files interleave with it)."""
+        with self.lock:
+            tail = self.tails.get(path)
+        try:
+            with open(path, "rb") as fh:
+                st = os.fstat(fh.fileno())
+                if tail is None or st.st_size < tail.sent:
+                    tail = self.follow(path, fh, st.st_size)
+                fh.seek(tail.sent)
+                data = fh.read(min(st.st_size - tail.sent, self.FRAME_MAX))
+        except FileNotFoundError:
+            with self.lock:
+                self.tails.pop(path, None)
+            return
+        except OSError as exc:
+            LOG.warning("read failed for %s: %s", path, exc)
+            return
+        cut = data.rfind(b"\n") + 1
+        if cut:
+            data = data[:cut]
+        elif len(data) < self.FRAME_MAX:
+            return  # nothing new, or half a line still being written
+        start = tail.sent
+        tail.advance(data)
+        self.pending.append((tail, tail.sent, fingerprint_of(tail.sent, tail.head, tail.window),
+                             st.st_mtime_ns, time.monotonic()))
+        self.send({"relpath": tail.relpath, "offset": start, "length": len(data),
+                   "sha256": hashlib.sha256(data).hexdigest()}, data)
+        if tail.sent < st.st_size:
+            self.scheduler.schedule(path, time.monotonic())
+
+    def read_acks(self, conn, resp, pending):
+        """Ack reader for one stream: commits each acked frame to the
+        ledger; a 409 sends that file again from 0."""
+        reason = "sink closed the stream"
+        try:
+            while line := resp.readline():
+                ack = json.loads(line)
+                if "relpath" not in ack:
+                    continue  # heartbeat
+                tail, end, mark, mtime_ns, sent_at = pending.popleft()
+                status = ack.get("status", 0)
+                self.metrics.observe(time.monotonic() - sent_at,
+                                     int(status == 200), int(status != 200))
+                if status == 200:
+                    self.ledger.commit(tail.relpath, end, mark, mtime_ns)
+                elif status == 409:
+                    self.resync(tail)
+                else:
+                    LOG.warning("sink rejected a frame of %s: %s", tail.relpath, ack)
+        except (OSError, ValueError, IndexError, http.client.HTTPException) as exc:
+            reason = exc
+        except AttributeError as exc:
+            # stop() or drop() closed the response under us (http.client
+            # sets its fp to None); drop() below is then a no-op.
+            reason = exc
+        self.drop(conn, reason)
+
+    def resync(self, tail: Tail):
+        with self.lock:
+            current = self.tails.get(tail.path) is tail
+            if current:
+                del self.tails[tail.path]
+        # Later frames of a file already being resent 409 too; one resend.
+        if current:
+            LOG.info("sink out of step on %s; resending whole file", tail.relpath)
+            self.ledger.forget(tail.relpath)
+            self.scheduler.schedule(tail.path, time.monotonic())
+
+    def heartbeat(self):
+        self.send({})
+        now = time.monotonic()
+        self.scheduler.schedule(_HEARTBEAT, now + self.HEARTBEAT)
+        with self.lock:
+            for path in [p for p, t in self.tails.items() if now - t.touched > self.IDLE_EVICT]:
+                del self.tails[path]
+            if time.monotonic() - self._last_log < Flusher.LOG_INTERVAL:
+                return
+            self._last_log = time.monotonic()
+        LOG.info("metrics: %s, acked=%d rejected=%d p50=%.2fs p95=%.2fs",
+                 " ".join(f"{k}={v}" for k, v in self.gauges().items()),
+                 self.metrics.shipped, self.metrics.failed,
+                 self.metrics.quantile(0.5), self.metrics.quantile(0.95))
+
+    def run(self):
+        """Writer loop, until the scheduler is closed. Reconnects (behind
+        the breaker) whenever something is due and the stream is down.
+        Returns early if a reconnect finds the sink has no stream
+        endpoint; run_stream() then falls back to run_watch()."""
+        while due := self.scheduler.next_due():
+            if self.conn is None and (_BREAKER.blocked() or not self.connect()):
+                if self.unsupported:
+                    LOG.warning("sink has no stream endpoint; debouncing and shipping instead")
+                    return
+                retry_at = max(_BREAKER.retry_at(), time.monotonic() + self.RECONNECT)
+                for path in due:
+                    self.scheduler.schedule(path, retry_at)
+                continue
+            for path in due:
+                if self.conn is None:
+                    self.scheduler.schedule(path, time.monotonic())
+                elif path == _HEARTBEAT:
+                    self.heartbeat()
+                else:
+                    self.pump(path)
+            with self.room:
+                self.room.notify_all()
+
+    def stop(self):
+        self.scheduler.close()
+        with self.room:
+            self.room.notify_all()  # releases a sweep parked in backfill()
+            conn, self.conn = self.conn, None
+        if conn is not None:
+            try:
+                conn.send(b"0\r\n\r\n")  # end of body: the sink sees a clean close
+            except OSError:
+                pass
+            self.hang_up(conn)
 
 
 def load_config():
@@ -160,54 +1207,146 @@ def load_config():
         LOG.error("Claude projects dir %s does not exist", projects_dir)
         return None
 
+    default_ledger = (pathlib.Path.home() / ".local" / "state"
+                      / "claude-session-watcher" / "ledger.sqlite3")
     return WatcherConfig(
         session_url=session_url,
+        # Sibling of the ingest path: http://host:port/ingest -> .../append.
+        append_url=os.environ.get("SESSION_SINK_APPEND_URL", "").strip()
+        or urllib.parse.urljoin(session_url, "append"),
+        batch_url=os.environ.get("SESSION_SINK_BATCH_URL", "").strip()
+        or urllib.parse.urljoin(session_url, "batch"),
+        stream_url=os.environ.get("SESSION_SINK_STREAM_URL", "").strip()
+        or urllib.parse.urljoin(session_url, "stream"),
         machine=machine,
         projects_dir=projects_dir,
+        ledger_path=pathlib.Path(
+            os.environ.get("SESSION_WATCHER_LEDGER", str(default_ledger))
+        ).expanduser(),
         debounce=float(os.environ.get("SESSION_WATCHER_DEBOUNCE", "3.0")),
         timeout=float(os.environ.get("SESSION_WATCHER_TIMEOUT", "30")),
+        batch_files=max(1, int(os.environ.get("SESSION_WATCHER_BATCH_FILES", "32"))),
+        batch_bytes=int(os.environ.get("SESSION_WATCHER_BATCH_BYTES", str(8 << 20))),
+        compress=os.environ.get("SESSION_WATCHER_COMPRESS", "gzip").strip() != "none",
+        workers=max(1, int(os.environ.get("SESSION_WATCHER_WORKERS", "4"))),
+        metrics_addr=os.environ.get("SESSION_WATCHER_METRICS", "").strip(),
+        stream=os.environ.get("SESSION_WATCHER_STREAM", "").strip() not in ("", "0"),
     )
 
 
-def run_once(cfg: WatcherConfig, dirty: dict) -> int:
-    """Smoke-test path: ship whatever the sweep queued, then exit. No
-    observer, no debounce, no flusher thread."""
+def run_once(cfg: WatcherConfig, ledger: Ledger, sweep_files: bool = True) -> int:
+    """Smoke-test path: sweep, ship what is not current, then exit. No
+    observer, no debounce, no flusher thread. Ships as the sweep goes, a
+    batch at a time, so neither the path list nor the file bytes are ever
+    all in memory."""
+    skipped = 0
+
+    def stale():
+        nonlocal skipped
+        for path, current in sweep(cfg.projects_dir, ledger) if sweep_files else ():
+            if current:
+                skipped += 1
+            else:
+                yield pathlib.Path(path)
+
     shipped = failed = 0
-    for path_str in list(dirty):
-        path = pathlib.Path(path_str)
-        if not path.exists():
-            continue
-        if post_file(cfg, path):
-            shipped += 1
-        else:
-            failed += 1
-    LOG.info("--once done: %d shipped, %d failed", shipped, failed)
+    for chunk in itertools.batched(stale(), cfg.batch_files):
+        done = len(ship(cfg, ledger, list(chunk)))
+        shipped += done
+        failed += len(chunk) - done
+    LOG.info("--once done: %d shipped, %d failed, %d skipped as already current",
+             shipped, failed, skipped)
     return 1 if failed else 0
 
 
-def run_watch(cfg: WatcherConfig, dirty: dict, lock: threading.Lock) -> int:
-    """Long-lived path: an observer marks files dirty, a flusher thread
-    ships them. Runs until interrupted."""
+def run_watch(cfg: WatcherConfig, ledger: Ledger, scheduler: Debouncer,
+              sweep_files: bool = True) -> int:
+    """Long-lived path: an observer touches the scheduler, a Flusher's
+    dispatcher + worker threads ship what comes due, and a sweep thread
+    backfills what was there before launch. Runs until interrupted."""
     stop = threading.Event()
     observer = Observer()
-    observer.schedule(SessionHandler(dirty, lock), str(cfg.projects_dir),
+    observer.schedule(SessionHandler(scheduler), str(cfg.projects_dir),
                       recursive=True)
     observer.start()
 
-    flusher = threading.Thread(
-        target=flush_loop, args=(cfg, dirty, lock, stop), daemon=True)
-    flusher.start()
+    flusher = Flusher(cfg, ledger, scheduler)
+    if cfg.metrics_addr:
+        serve_metrics(flusher, cfg.metrics_addr)
+    threads = [threading.Thread(target=flusher.run, daemon=True)]
+    threads += [threading.Thread(target=flusher.work, daemon=True)
+                for _ in range(cfg.workers)]
+    for thread in threads:
+        thread.start()
+    if sweep_files:
+        # Not joined on shutdown: it may be parked in backfill().
+        threading.Thread(target=backfill, args=(flusher, cfg.projects_dir, ledger),
+                         daemon=True).start()
 
     try:
-        while True:
-            time.sleep(1.0)
+        # Nothing sets `stop`: this only parks the main thread (waking
+        # hourly) until Ctrl-C.
+        while not stop.wait(3600):
+            pass
     except KeyboardInterrupt:
         LOG.info("shutting down")
     finally:
-        stop.set()
+        flusher.stop(cfg.workers)
         observer.stop()
         observer.join(timeout=5)
-        flusher.join(timeout=5)
+        for thread in threads:
+            thread.join(timeout=5)
+    return 0
+
+
+def run_stream(cfg: WatcherConfig, ledger: Ledger, scheduler: Debouncer,
+               sweep_files: bool = True) -> int:
+    """--stream path: an observer touches the scheduler (no debounce), a
+    Streamer's writer thread forwards what each touch appended. Falls
+    back to run_watch() on a sink without a stream endpoint, whether the
+    first connect finds that out or a later reconnect does (say the first
+    one failed because the tailnet was not up yet)."""
+    streamer = Streamer(cfg, ledger, scheduler)
+    if not streamer.connect() and streamer.unsupported:
+        LOG.warning("sink has no stream endpoint; debouncing and shipping instead")
+        return run_watch(cfg, ledger, Debouncer(cfg.debounce), sweep_files)
+
+    stop = threading.Event()
+
+    def write():
+        streamer.run()
+        stop.set()  # only early when the sink turned out not to stream
+
+    observer = Observer()
+    observer.schedule(SessionHandler(scheduler), str(cfg.projects_dir),
+                      recursive=True)
+    observer.start()
+    metrics = serve_metrics(streamer, cfg.metrics_addr) if cfg.metrics_addr else None
+    writer = threading.Thread(target=write, daemon=True)
+    writer.start()
+    sweeper = None
+    if sweep_files:
+        sweeper = threading.Thread(target=backfill, args=(streamer, cfg.projects_dir, ledger),
+                                   daemon=True)
+        sweeper.start()
+    try:
+        while not stop.wait(3600):
+            pass
+    except KeyboardInterrupt:
+        LOG.info("shutting down")
+    finally:
+        streamer.stop()
+        observer.stop()
+        observer.join(timeout=5)
+        writer.join(timeout=5)
+        if sweeper is not None:
+            sweeper.join(timeout=5)
+        if metrics is not None:
+            metrics.shutdown()
+            metrics.server_close()  # run_watch() binds the same address
+    if streamer.unsupported:
+        # Files the stream left half-sent resume from the ledger.
+        return run_watch(cfg, ledger, Debouncer(cfg.debounce), sweep_files)
     return 0
 
 
@@ -219,6 +1358,10 @@ def main() -> int:
     parser.add_argument(
         "--once", action="store_true",
         help="run the initial sweep, flush once, and exit (for testing)")
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="forward appended lines as they are written over one long-lived "
+             "connection, instead of debouncing (also SESSION_WATCHER_STREAM=1)")
     args = parser.parse_args()
 
     logging.basicConfig(
@@ -230,19 +1373,28 @@ def main() -> int:
     cfg = load_config()
     if cfg is None:
         return 2
+    if args.stream:
+        cfg = dataclasses.replace(cfg, stream=True)
 
-    LOG.info("watching %s -> %s as machine=%s (debounce=%.1fs)",
-             cfg.projects_dir, cfg.session_url, cfg.machine, cfg.debounce)
-
-    dirty: dict = {}
-    lock = threading.Lock()
-
-    if not args.no_initial_sweep:
-        initial_sweep(dirty, lock, cfg.projects_dir)
+    if cfg.stream and not args.once:
+        LOG.info("watching %s -> %s as machine=%s (streaming)",
+                 cfg.projects_dir, cfg.stream_url, cfg.machine)
+    else:
+        LOG.info("watching %s -> %s as machine=%s (debounce=%.1fs, workers=%d)",
+                 cfg.projects_dir, cfg.session_url, cfg.machine, cfg.debounce,
+                 cfg.workers)
 
-    if args.once:
-        return run_once(cfg, dirty)
-    return run_watch(cfg, dirty, lock)
+    ledger = Ledger(cfg.ledger_path)
+    sweep_files = not args.no_initial_sweep
+    try:
+        if args.once:
+            return run_once(cfg, ledger, sweep_files)
+        if cfg.stream:
+            # Streaming forwards every write straight away: no quiescence window.
+            return run_stream(cfg, ledger, Debouncer(0.0), sweep_files)
+        return run_watch(cfg, ledger, Debouncer(cfg.debounce), sweep_files)
+    finally:
+        ledger.close()
 
 
 if __name__ == "__main__":
@@ -7,8 +7,8 @@ set -uo pipefail
 SINCE="$(date -u -d '48 hours ago' +%Y-%m-%dT%H:%M:%SZ)"
 API="https://forgejo.coilysiren.me/api/v1"
 
-TOKEN="$(aws ssm get-parameter --name /forgejo/api-token --with-decryption \
-  --query Parameter.Value --output text 2>/dev/null)"
+# Through the short-TTL SSM cache (docs/ssm-cache.md); a miss is one aws call.
+TOKEN="$(python3 "$(dirname "$0")/ssm-cache.py" get /forgejo/api-token 2>/dev/null)"
 if [[ "${#TOKEN}" -ne 40 ]]; then
   echo "ABORT: /forgejo/api-token fetch failed (got ${#TOKEN} chars)" >&2
   exit 1
@@ -9,27 +9,51 @@ agentic-os-kai#439 rename), and writes one Caddy site snippet per
 declared shortcut. Stale files (snippets whose owning repo no longer
 declares a shortcut, or was removed) are deleted.
 
-Runs in Forgejo Actions (.forgejo/workflows/caddy-shortcuts.yml) and
-locally for debugging. Stdlib only - no PyYAML dependency. YAML parsing
-defers to `yq` (already present in the deploy toolchain).
-
-Manual reload after a regen lands on kai-server:
+Repos are fetched on a thread pool, each worker holding one keep-alive
+connection to Forgejo. The fetched files are cached on disk keyed on
+each repo's default branch and search-API `updated_at` (which moves on
+every push), so an unchanged repo skips its contents requests entirely.
+
+`--source local` reads the same files from the checkouts under
+`~/projects/<owner>/` instead (kai-server keeps them current), fully
+offline. Each checkout is keyed on its default-branch tip, read from the
+ref files, so only repos whose tip moved spawn a `git cat-file`; the
+committed file is read, never the working tree. Local checkouts carry no
+fork/archived flag, so every checkout under the owner dir is scanned, and
+a repo that is merely not checked out looks the same as a removed one:
+this mode writes snippets but never deletes them. Each source keeps its
+own cache file, so alternating between them costs neither its hits.
+
+Runs in Forgejo Actions (.forgejo/workflows/caddy-shortcuts.yml, which
+persists the cache between runs) and locally for debugging. Stdlib only - no PyYAML dependency. Configs are
+read in-process by a small YAML-subset reader (block mappings, block
+lists, plain and quoted scalars); a document outside that subset -
+anchors, tags, block scalars, flow collections - defers to `yq`
+(already present in the deploy toolchain). `--bench-parse` times both
+paths over a corpus and checks they agree.
+
+A regen that lands on kai-server deploys itself: caddy-config-deploy.path
+watches caddy/sites/ and scripts/install-caddy-config.sh hot-loads the
+adapted config, skipping the load when it hashes unchanged. By hand:
 
     cd ~/projects/coilysiren/infrastructure && git pull
-    sudo caddy reload --config /etc/caddy/Caddyfile
+    sudo bash scripts/install-caddy-config.sh
 """
 
 from __future__ import annotations
 
 import argparse
 import base64
+import http.client
 import json
 import os
 import re
 import subprocess
 import sys
-import urllib.error
-import urllib.request
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 FORGEJO_URL = os.environ.get("FORGEJO_URL", "https://forgejo.coilysiren.me").rstrip("/")
@@ -43,6 +67,18 @@ TRAEFIK_UPSTREAM = "192.168.0.194:80"
 # syntax into the generated file.
 SHORTCUT_RE = re.compile(r"^[a-z0-9][a-z0-9-]*[a-z0-9]$")
 
+CACHE_SCHEMA = 1
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "infrastructure"
+# Per source: both key entries by repo name, and a run keeps only its own.
+DEFAULT_CACHE = {
+    "forgejo": CACHE_DIR / "caddy-shortcuts.json",
+    "local": CACHE_DIR / "caddy-shortcuts-local.json",
+}
+
+# One persistent connection per worker thread (http.client is not
+# thread-safe, urllib.request opens a fresh socket per call).
+_conn = threading.local()
+
 SNIPPET_HEADER = "# generated by scripts/generate-caddy-shortcuts.py from {repo}/coily.yaml. do not edit.\n"
 
 
@@ -59,17 +95,53 @@ def main() -> int:
         action="store_true",
         help="print what would change, do not touch disk",
     )
+    ap.add_argument(
+        "--source",
+        choices=("forgejo", "local"),
+        default="forgejo",
+        help="read configs via the Forgejo API, or from local checkouts (offline)",
+    )
+    ap.add_argument(
+        "--projects-root",
+        default="~/projects",
+        help="parent of the <owner>/<repo> checkouts read by --source local",
+    )
+    ap.add_argument("--parallel", type=int, default=8, help="concurrent Forgejo requests / git reads")
+    ap.add_argument(
+        "--cache-file",
+        help="per-repo config cache (default: one per --source under "
+        f"{CACHE_DIR}; empty string disables)",
+    )
+    ap.add_argument(
+        "--bench-parse",
+        nargs="*",
+        metavar="FILE",
+        help="benchmark the in-process YAML reader against yq over FILEs "
+        "(default: the configs in --cache-file) and exit",
+    )
     args = ap.parse_args()
+    if args.cache_file is None:
+        args.cache_file = str(DEFAULT_CACHE[args.source])
+    if args.bench_parse is not None:
+        return bench_parse(args.bench_parse, args.cache_file)
 
     sites_dir = Path(args.sites_dir)
     sites_dir.mkdir(parents=True, exist_ok=True)
 
-    repos = list_repos(args.owner)
-    print(f"scanning {len(repos)} repos under {args.owner}/", file=sys.stderr)
+    if args.source == "local":
+        repos = list_local_repos(Path(args.projects_root).expanduser() / args.owner)
+    else:
+        repos = list_repos(args.owner)
+    cache = load_cache(args.cache_file)
+    with ThreadPoolExecutor(max_workers=max(1, args.parallel)) as pool:
+        fetched = list(pool.map(lambda r: fetch_any(args.owner, r, cache.get(r["name"])), repos))
+    hits = sum(1 for r, (_, entry) in zip(repos, fetched) if entry is not None and entry is cache.get(r["name"]))
+    print(f"scanned {len(repos)} repos under {args.owner}/ ({hits} unchanged, cached)", file=sys.stderr)
+    save_cache(args.cache_file, {r["name"]: entry for r, (_, entry) in zip(repos, fetched) if entry is not None})
 
     desired: dict[str, str] = {}  # shortcut -> snippet contents
-    for repo in repos:
-        cfg = fetch_config(args.owner, repo)
+    for repo, (body, _) in zip((r["name"] for r in repos), fetched):
+        cfg = parse_config(body) if body is not None else None
         if cfg is None:
             continue
         shortcut, dns_name = extract_shortcut(cfg)
@@ -86,15 +158,16 @@ def main() -> int:
             continue
         desired[shortcut] = render_snippet(repo=f"{args.owner}/{repo}", shortcut=shortcut, dns_name=dns_name)
 
-    changes = reconcile(sites_dir, desired, dry_run=args.dry_run)
+    changes = reconcile(sites_dir, desired, dry_run=args.dry_run, delete=args.source != "local")
     print(f"shortcuts: {len(desired)} desired / {changes} changes", file=sys.stderr)
     return 0
 
 
-def list_repos(owner: str) -> list[str]:
-    """Return repo names under owner on Forgejo (excluding forks and archived).
-    Paginates over the search API."""
-    names: list[str] = []
+def list_repos(owner: str) -> list[dict]:
+    """Return the repos under owner on Forgejo (excluding forks and archived)
+    as {name, key}, where key - default branch + updated_at - changes
+    whenever the repo is pushed to. Paginates over the search API."""
+    repos: list[dict] = []
     page = 1
     while True:
         url = (
@@ -110,35 +183,128 @@ def list_repos(owner: str) -> list[str]:
         for r in data:
             if r.get("fork"):
                 continue
-            names.append(r["name"])
+            key = f"{r.get('default_branch') or ''}@{r['updated_at']}" if r.get("updated_at") else ""
+            repos.append({"name": r["name"], "key": key})
         if len(data) < 50:
             break
         page += 1
-    return names
-
-
-def fetch_config(owner: str, repo: str) -> dict | None:
+    return repos
+
+
+def list_local_repos(owner_dir: Path) -> list[dict]:
+    """Return the git checkouts under owner_dir as {name, key, path}, where
+    key is the default branch's tip sha - read from the ref files, so
+    listing spawns no process."""
+    if not owner_dir.is_dir():
+        print(f"{owner_dir} does not exist", file=sys.stderr)
+        return []
+    repos: list[dict] = []
+    for path in sorted(owner_dir.iterdir()):
+        if (path / ".git").is_dir():
+            sha = default_branch_sha(path / ".git")
+            repos.append({"name": path.name, "key": f"local:{sha}" if sha else "", "path": str(path)})
+    return repos
+
+
+def default_branch_sha(gitdir: Path) -> str:
+    """The tip of origin's default branch (origin/HEAD), else of a local
+    main/master, from loose refs or packed-refs. "" if none resolves."""
+    packed: dict[str, str] = {}
+    try:
+        for line in (gitdir / "packed-refs").read_text(encoding="utf-8").splitlines():
+            if line[:1] not in "#^":
+                sha, _, ref = line.partition(" ")
+                packed[ref] = sha
+    except OSError:
+        pass
+
+    def resolve(ref: str, depth: int = 0) -> str:
+        try:
+            value = (gitdir / ref).read_text(encoding="utf-8").strip()
+        except OSError:
+            return packed.get(ref, "")
+        if value.startswith("ref: "):
+            return resolve(value[5:], depth + 1) if depth < 5 else ""
+        return value
+
+    for ref in ("refs/remotes/origin/HEAD", "refs/heads/main", "refs/heads/master"):
+        if sha := resolve(ref):
+            return sha
+    return ""
+
+
+def fetch_any(owner: str, repo: dict, cached: dict | None) -> tuple[str | None, dict | None]:
+    """fetch_source or fetch_local_source, by where `repo` was listed from.
+    A cached entry whose key still matches is returned as-is, untouched."""
+    if cached and repo["key"] and cached.get("key") == repo["key"]:
+        return cached.get("body"), cached
+    if "path" in repo:
+        return fetch_local_source(repo)
+    return fetch_source(owner, repo)
+
+
+def fetch_local_source(repo: dict) -> tuple[str | None, dict | None]:
+    """Read coily.yaml (or legacy config.yml) as committed at the checkout's
+    default-branch tip. Same contract as fetch_source."""
+    if not repo["key"]:
+        return None, None
+    sha = repo["key"].removeprefix("local:")
+    for filename in ("coily.yaml", "config.yml"):
+        try:
+            proc = subprocess.run(
+                ["git", "-C", repo["path"], "cat-file", "blob", f"{sha}:{filename}"],
+                capture_output=True,
+                check=False,
+            )
+        except OSError:
+            return None, None
+        if proc.returncode == 0:
+            try:
+                body = proc.stdout.decode("utf-8")
+            except UnicodeDecodeError:
+                return None, None
+            return body, {"key": repo["key"], "body": body}
+    return None, {"key": repo["key"], "body": None}
+
+
+def fetch_source(owner: str, repo: dict) -> tuple[str | None, dict | None]:
     """Fetch coily.yaml (or legacy config.yml) from a repo's default branch
-    on Forgejo and parse it via yq. Returns None if neither file is present.
+    on Forgejo. Returns (file text or None if neither file is present, the
+    cache entry to keep). An entry is only returned when both lookups got a
+    definite answer, so a transient error is retried next run.
 
     Transition: coilyco-bridge/agentic-os-kai#439 renames per-repo deploy configs from
     `config.yml` to `coily.yaml`. Try the new name first, fall back to legacy.
     """
-    payload: dict | None = None
     for filename in ("coily.yaml", "config.yml"):
-        url = f"{FORGEJO_URL}/api/v1/repos/{owner}/{repo}/contents/{filename}"
-        result = forgejo_get_json(url)
+        url = f"{FORGEJO_URL}/api/v1/repos/{owner}/{repo['name']}/contents/{filename}"
+        status, result = forgejo_get(url)
         # Forgejo's contents endpoint returns an object for files and a
         # list for directories. Only the file shape is useful here.
         if isinstance(result, dict) and result.get("type") == "file":
-            payload = result
-            break
-    if payload is None:
-        return None
+            try:
+                body = base64.b64decode(result["content"]).decode("utf-8")
+            except (KeyError, ValueError):
+                return None, None
+            return body, {"key": repo["key"], "body": body}
+        if status not in (200, 404):
+            return None, None
+    return None, {"key": repo["key"], "body": None}
+
+
+def parse_config(body: str) -> dict | None:
+    """Parse a fetched config: in-process when it stays inside the YAML
+    subset read_yaml handles, via yq otherwise. None unless the document
+    is a mapping."""
     try:
-        body = base64.b64decode(payload["content"]).decode("utf-8")
-    except (KeyError, ValueError):
-        return None
+        cfg = read_yaml(body)
+    except UnsupportedYaml:
+        cfg = parse_config_yq(body)
+    return cfg if isinstance(cfg, dict) else None
+
+
+def parse_config_yq(body: str):
+    """Parse a config via a yq subprocess. None if it is not valid YAML."""
     try:
         as_json = sh(["yq", "-o", "json", "."], stdin=body)
     except (subprocess.CalledProcessError, FileNotFoundError):
@@ -149,18 +315,252 @@ def fetch_config(owner: str, repo: str) -> dict | None:
         return None
 
 
+class UnsupportedYaml(ValueError):
+    """The document uses YAML outside read_yaml's subset."""
+
+
+# Plain scalars resolve as in the YAML 1.2 core schema, which is what yq
+# (v4) applies: `yes`/`on` stay strings, unlike YAML 1.1.
+_NULLS = ("", "~", "null", "Null", "NULL")
+_BOOLS = {"true": True, "True": True, "TRUE": True, "false": False, "False": False, "FALSE": False}
+_INT_RE = re.compile(r"^[-+]?[0-9]+$|^0o[0-7]+$|^0x[0-9a-fA-F]+$")
+_FLOAT_RE = re.compile(r"^[-+]?(\.[0-9]+|[0-9]+(\.[0-9]*)?)([eE][-+]?[0-9]+)?$|^[-+]?\.(inf|Inf|INF)$|^\.(nan|NaN|NAN)$")
+# A mapping key (plain, or quoted) followed by `:` and a space or end of line.
+_KEY_RE = re.compile(r"""^("(?:[^"\\]|\\.)*"|'(?:[^']|'')*'|[^\s#'"\[\]{},&*!|>%@`-][^#]*?|-[^\s#][^#]*?)\s*:(?:\s+|$)(.*)$""")
+_ESCAPES = {"0": "\0", "a": "\a", "b": "\b", "t": "\t", "n": "\n", "v": "\v", "f": "\f",
+            "r": "\r", "e": "\x1b", " ": " ", '"': '"', "/": "/", "\\": "\\"}
+
+
+def read_yaml(text: str):
+    """Parse `text` in-process, line by line. Handles block mappings, block
+    lists (of scalars or mappings), plain/single/double-quoted scalars,
+    comments and a leading `---`. Raises UnsupportedYaml on anything else,
+    so the caller can hand the document to yq instead."""
+    lines: list[tuple[int, str]] = []
+    for raw in text.splitlines():
+        content = raw.strip()
+        if not content or content.startswith("#"):
+            continue
+        if "\t" in raw[: len(raw) - len(raw.lstrip())]:
+            raise UnsupportedYaml("tab indentation")
+        if content == "---" and not lines:
+            continue
+        if content.startswith(("---", "...", "%")):
+            raise UnsupportedYaml("directives or multiple documents")
+        lines.append((len(raw) - len(raw.lstrip(" ")), content))
+    if not lines:
+        return None
+    doc, end = _yaml_block(lines, 0, lines[0][0])
+    if end != len(lines):
+        raise UnsupportedYaml(f"unexpected indentation: {lines[end][1]!r}")
+    return doc
+
+
+def _yaml_is_item(content: str) -> bool:
+    return content == "-" or content.startswith("- ")
+
+
+def _yaml_block(lines: list, i: int, indent: int):
+    if _yaml_is_item(lines[i][1]):
+        return _yaml_sequence(lines, i, indent)
+    return _yaml_mapping(lines, i, indent)
+
+
+def _yaml_mapping(lines: list, i: int, indent: int):
+    out: dict = {}
+    while i < len(lines) and lines[i][0] == indent and not _yaml_is_item(lines[i][1]):
+        m = _KEY_RE.match(lines[i][1])
+        if not m:
+            raise UnsupportedYaml(f"not a mapping entry: {lines[i][1]!r}")
+        key = m.group(1) if m.group(1)[0] not in "\"'" else _yaml_scalar(m.group(1))
+        if key in out:
+            raise UnsupportedYaml(f"duplicate key {key!r}")
+        rest = m.group(2).strip()
+        i += 1
+        if rest and not rest.startswith("#"):
+            out[key] = _yaml_scalar(rest)
+        elif i < len(lines) and (
+            lines[i][0] > indent or (lines[i][0] == indent and _yaml_is_item(lines[i][1]))
+        ):
+            # `key:` then a nested block, or a list at the key's own indent.
+            out[key], i = _yaml_block(lines, i, lines[i][0])
+        else:
+            out[key] = None
+    if i < len(lines) and lines[i][0] >= indent:
+        raise UnsupportedYaml(f"unexpected line: {lines[i][1]!r}")
+    return out, i
+
+
+def _yaml_sequence(lines: list, i: int, indent: int):
+    out: list = []
+    while i < len(lines) and lines[i][0] == indent and _yaml_is_item(lines[i][1]):
+        rest = lines[i][1][1:]
+        body = rest.lstrip()
+        if not body or body.startswith("#"):
+            i += 1
+            if i < len(lines) and lines[i][0] > indent:
+                item, i = _yaml_block(lines, i, lines[i][0])
+            else:
+                item = None
+        elif _yaml_is_item(body) or _KEY_RE.match(body):
+            # `- key: value` / `- - x`: a block node that starts mid-line, at
+            # the column its first character sits in.
+            lines[i] = (indent + 1 + len(rest) - len(body), body)
+            item, i = _yaml_block(lines, i, lines[i][0])
+        else:
+            item = _yaml_scalar(body)
+            i += 1
+        out.append(item)
+    if i < len(lines) and lines[i][0] > indent:
+        raise UnsupportedYaml(f"unexpected line: {lines[i][1]!r}")
+    return out, i
+
+
+def _yaml_scalar(text: str):
+    """One-line scalar, with any trailing comment dropped."""
+    if text[0] == '"':
+        m = re.match(r'"((?:[^"\\]|\\.)*)"\s*(#.*)?$', text)
+        if not m:
+            raise UnsupportedYaml(f"multi-line or malformed string: {text!r}")
+        return re.sub(r"\\(x[0-9a-fA-F]{2}|u[0-9a-fA-F]{4}|U[0-9a-fA-F]{8}|.)", _yaml_unescape, m.group(1))
+    if text[0] == "'":
+        m = re.match(r"'((?:[^']|'')*)'\s*(#.*)?$", text)
+        if not m:
+            raise UnsupportedYaml(f"multi-line or malformed string: {text!r}")
+        return m.group(1).replace("''", "'")
+    if text in ("[]", "{}"):
+        return [] if text == "[]" else {}
+    if text[0] in "&*!|>{[%@`":
+        raise UnsupportedYaml(f"anchor, alias, tag, block scalar or flow node: {text!r}")
+    value = re.split(r"\s#", text, maxsplit=1)[0].rstrip()
+    if ": " in value or value.endswith(":"):
+        raise UnsupportedYaml(f"nested mapping on one line: {text!r}")
+    return _yaml_plain(value)
+
+
+def _yaml_plain(value: str):
+    if value in _NULLS:
+        return None
+    if value in _BOOLS:
+        return _BOOLS[value]
+    if _INT_RE.match(value):
+        return int(value, 0) if value[:2] in ("0o", "0x") else int(value)
+    if _FLOAT_RE.match(value):
+        return float(value.lower().replace(".inf", "inf").replace(".nan", "nan"))
+    return value
+
+
+def _yaml_unescape(m: re.Match) -> str:
+    esc = m.group(1)
+    if esc[0] in "xuU" and len(esc) > 1:
+        return chr(int(esc[1:], 16))
+    if esc not in _ESCAPES:
+        raise UnsupportedYaml(f"escape \\{esc}")
+    return _ESCAPES[esc]
+
+
+def bench_parse(paths: list[str], cache_file: str) -> int:
+    """Time read_yaml against the yq path over a corpus - the given files,
+    or every config body in the crawl cache - and check they agree."""
+    docs = [Path(p).read_text(encoding="utf-8") for p in paths] or [
+        e["body"] for e in load_cache(cache_file).values() if isinstance(e, dict) and e.get("body")
+    ]
+    if not docs:
+        print("no corpus: pass coily.yaml paths, or run once to fill the cache", file=sys.stderr)
+        return 2
+    unsupported = object()
+    start = time.perf_counter()
+    fast = []
+    for doc in docs:
+        try:
+            fast.append(read_yaml(doc))
+        except UnsupportedYaml:
+            fast.append(unsupported)
+    fast_secs = time.perf_counter() - start
+    start = time.perf_counter()
+    slow = [parse_config_yq(doc) for doc in docs]
+    slow_secs = time.perf_counter() - start
+    handled = [(f, y) for f, y in zip(fast, slow) if f is not unsupported]
+    agree = sum(1 for f, y in handled if json.dumps(f, sort_keys=True) == json.dumps(y, sort_keys=True))
+    print(
+        f"{len(docs)} docs: in-process {fast_secs * 1000:.2f} ms "
+        f"({len(docs) - len(handled)} outside the subset), yq {slow_secs * 1000:.0f} ms; "
+        f"{agree}/{len(handled)} in-process results match yq"
+    )
+    return 0 if agree == len(handled) else 1
+
+
 def forgejo_get_json(url: str):
     """GET a Forgejo API URL and return the parsed JSON (dict or list).
     Returns None on 404 or any error; this keeps the caller's
     "missing = skip" semantics."""
-    req = urllib.request.Request(url)
+    return forgejo_get(url)[1]
+
+
+def forgejo_get(url: str) -> tuple[int, object]:
+    """GET a Forgejo API URL over this thread's keep-alive connection.
+    Returns (HTTP status, parsed JSON or None); status 0 means the request
+    or the JSON failed. A socket the server closed while idle is reopened
+    once."""
+    parts = urllib.parse.urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    headers = {"Accept": "application/json"}
     if FORGEJO_TOKEN:
-        req.add_header("Authorization", f"token {FORGEJO_TOKEN}")
+        headers["Authorization"] = f"token {FORGEJO_TOKEN}"
+    for attempt in range(2):
+        conn = _connection(parts.scheme, parts.netloc)
+        try:
+            conn.request("GET", path, headers=headers)
+            resp = conn.getresponse()
+            body = resp.read()
+            break
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            _conn.conn = None
+            if attempt:
+                return 0, None
+    if resp.status != 200:
+        return resp.status, None
     try:
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            return json.loads(resp.read().decode("utf-8"))
-    except (urllib.error.HTTPError, urllib.error.URLError, json.JSONDecodeError):
-        return None
+        return resp.status, json.loads(body.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        return 0, None
+
+
+def _connection(scheme: str, netloc: str) -> http.client.HTTPConnection:
+    if getattr(_conn, "conn", None) is None or _conn.origin != (scheme, netloc):
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        _conn.conn = cls(netloc, timeout=15)
+        _conn.origin = (scheme, netloc)
+    return _conn.conn
+
+
+def load_cache(path: str) -> dict:
+    """{repo name: {key, body}} from the last run; {} when off or unreadable."""
+    if not path:
+        return {}
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("schema") != CACHE_SCHEMA:
+        return {}
+    repos = data.get("repos")
+    return repos if isinstance(repos, dict) else {}
+
+
+def save_cache(path: str, repos: dict) -> None:
+    """Write-then-rename; a failed write only costs the next run its hits."""
+    if not path:
+        return
+    target = Path(path)
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    try:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(json.dumps({"schema": CACHE_SCHEMA, "repos": repos}), encoding="utf-8")
+        os.replace(tmp, target)
+    except OSError:
+        pass
 
 
 def extract_shortcut(cfg: dict) -> tuple[str | None, str | None]:
@@ -186,16 +586,16 @@ def render_snippet(repo: str, shortcut: str, dns_name: str) -> str:
     )
 
 
-def reconcile(sites_dir: Path, desired: dict[str, str], dry_run: bool) -> int:
-    """Make sites_dir match desired exactly. Returns the count of
-    file-level changes (write + delete)."""
+def reconcile(sites_dir: Path, desired: dict[str, str], dry_run: bool, delete: bool = True) -> int:
+    """Make sites_dir match desired exactly, or only write/update when not
+    `delete`. Returns the count of file-level changes (write + delete)."""
     changes = 0
     existing = {p.stem: p for p in sites_dir.glob("*.caddy")}
 
     # Refuse mass-deletes: a transient Forgejo API or auth failure can drop
     # every desired shortcut and otherwise wipe the whole sites dir.
     to_delete = [s for s in existing if s not in desired]
-    if existing and len(to_delete) > max(2, len(existing) // 2):
+    if delete and existing and len(to_delete) > max(2, len(existing) // 2):
         print(
             f"refusing to delete {len(to_delete)} of {len(existing)} shortcuts "
             f"in one run (desired={len(desired)}); likely upstream enumeration "
@@ -216,6 +616,10 @@ def reconcile(sites_dir: Path, desired: dict[str, str], dry_run: bool) -> int:
     for shortcut, path in existing.items():
         if shortcut in desired:
             continue
+        if not delete:
+            print(f"keep caddy/sites/{path.name} (not declared by any checkout; "
+                  "--source local never deletes)", file=sys.stderr)
+            continue
         print(f"delete caddy/sites/{path.name}", file=sys.stderr)
         if not dry_run:
             path.unlink()
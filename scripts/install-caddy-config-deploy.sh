@@ -31,9 +31,10 @@ echo ">>> running initial deploy"
 bash "$INFRA_SRC/scripts/install-caddy-config.sh"
 
 echo
-echo "done. future changes to $INFRA_SRC/caddy/Caddyfile auto-deploy via"
+echo "done. future changes to $INFRA_SRC/caddy/{Caddyfile,sites,sites-manual} auto-deploy via"
 echo "caddy-config-deploy.path -> caddy-config-deploy.service -> install-caddy-config.sh."
 echo
 echo "inspect:"
 echo "  systemctl status caddy-config-deploy.path"
 echo "  journalctl -u caddy-config-deploy.service -n 50 --no-pager"
+echo "  cat /var/lib/caddy-config-deploy/applied.sha256   # hash of the last adapted config loaded"
@@ -1,9 +1,13 @@
 #!/usr/bin/env bash
-# Copy the repo Caddyfile to /etc/caddy as a real root-owned file (not a symlink,
-# since /home/kai is mode 750), then reload Caddy on diff. See infrastructure#292.
+# Copy the repo Caddyfile and its sites/ + sites-manual/ snippets to /etc/caddy as real
+# root-owned files (not symlinks, since /home/kai is mode 750), then hot-load the adapted
+# config through Caddy's admin API, only when it changed. See infrastructure#292.
 
 # Runs as root from caddy-config-deploy.service or by hand via sudo bash. Idempotent:
-# validates the source first, reloads only when destination content changed.
+# the final JSON (`caddy adapt`, imports resolved) is hashed, and the load is skipped
+# when the hash matches the last one applied - a byte-identical or comment-only regen
+# costs no reload. The source tree must sit still for CADDY_DEPLOY_SETTLE seconds
+# first, so a burst of snippet writes (one pull, one generator run) lands as one load.
 
 set -euo pipefail
 
@@ -13,47 +17,98 @@ if [[ ${EUID:-$(id -u)} -ne 0 ]]; then
 fi
 
 INFRA_SRC="${INFRA_SRC:-/home/kai/projects/coilysiren/infrastructure}"
-SRC="$INFRA_SRC/caddy/Caddyfile"
-DST="/etc/caddy/Caddyfile"
+SRC_DIR="$INFRA_SRC/caddy"
+DST_DIR="/etc/caddy"
+STATE_DIR="${CADDY_DEPLOY_STATE:-/var/lib/caddy-config-deploy}"
+CADDY_ADMIN="${CADDY_ADMIN:-http://localhost:2019}"
+SETTLE="${CADDY_DEPLOY_SETTLE:-3}"
+SETTLE_MAX=30
+# Imported by the Caddyfile relative to its own dir, so they ship next to it.
+SNIPPET_DIRS=(sites sites-manual)
 
-if [[ ! -f "$SRC" ]]; then
-  echo "no such source: $SRC" >&2
+if [[ ! -f "$SRC_DIR/Caddyfile" ]]; then
+  echo "no such source: $SRC_DIR/Caddyfile" >&2
   exit 1
 fi
 
-echo ">>> validating $SRC"
-# `caddy validate` is good enough as a syntax + import gate.
-caddy validate --config "$SRC" --adapter caddyfile
+# A by-hand run and a path-triggered run must not interleave their swaps.
+exec 9>/run/caddy-config-deploy.lock
+flock 9
+
+# Names + contents of every file the Caddyfile can import.
+fingerprint() {
+  (cd "$SRC_DIR" && { find Caddyfile "${SNIPPET_DIRS[@]}" -maxdepth 1 -type f -print0 2>/dev/null || true; } \
+    | sort -z | xargs -0 -r sha256sum) | sha256sum
+}
+
+prev=""
+cur=$(fingerprint)
+waited=0
+while [[ "$cur" != "$prev" ]] && (( waited < SETTLE_MAX )); do
+  prev=$cur
+  sleep "$SETTLE"
+  waited=$((waited + SETTLE))
+  cur=$(fingerprint)
+done
+
+install -d -m 0755 "$DST_DIR"
+STAGE=$(mktemp -d "$DST_DIR/.deploy.XXXXXX")
+trap 'rm -rf "$STAGE"' EXIT
+install -m 0644 "$SRC_DIR/Caddyfile" "$STAGE/Caddyfile"
+for dir in "${SNIPPET_DIRS[@]}"; do
+  install -d -m 0755 "$STAGE/$dir"
+  for f in "$SRC_DIR/$dir"/*.caddy; do
+    if [[ -f "$f" ]]; then
+      install -m 0644 "$f" "$STAGE/$dir/"
+    fi
+  done
+done
+
+echo ">>> adapting $SRC_DIR/Caddyfile"
+# --validate provisions the result too, so this is the syntax + import gate.
+caddy adapt --config "$STAGE/Caddyfile" --adapter caddyfile --validate > "$STAGE/caddy.json"
+hash=$(sha256sum < "$STAGE/caddy.json" | cut -d' ' -f1)
 
 # Force a real-file install when DST is a symlink (the #292 failure mode), even if
-# contents match. Skip install + reload only when DST is a matching real file.
-needs_install=0
-if [[ -L "$DST" ]]; then
-  echo ">>> $DST is a symlink; replacing with a real file"
-  needs_install=1
-elif [[ ! -f "$DST" ]]; then
-  echo ">>> $DST does not exist yet"
-  needs_install=1
-elif ! cmp -s "$SRC" "$DST"; then
-  echo ">>> $DST differs from $SRC"
-  needs_install=1
+# contents match. Files are kept in step even when the adapted config is unchanged,
+# so a caddy restart always reads what the repo holds.
+if [[ -L "$DST_DIR/Caddyfile" ]] || ! cmp -s "$STAGE/Caddyfile" "$DST_DIR/Caddyfile"; then
+  # `install` writes a temp file then renames atomically, so a concurrent caddy read
+  # sees the old or new inode, never a partial write.
+  install -m 0644 -o root -g root "$STAGE/Caddyfile" "$DST_DIR/Caddyfile"
+  echo ">>> installed $DST_DIR/Caddyfile"
 fi
+for dir in "${SNIPPET_DIRS[@]}"; do
+  if [[ -L "$DST_DIR/$dir" ]] || ! diff -rq "$STAGE/$dir" "$DST_DIR/$dir" >/dev/null 2>&1; then
+    rm -rf "$DST_DIR/$dir.old"
+    if [[ -e "$DST_DIR/$dir" || -L "$DST_DIR/$dir" ]]; then
+      mv "$DST_DIR/$dir" "$DST_DIR/$dir.old"
+    fi
+    mv "$STAGE/$dir" "$DST_DIR/$dir"
+    rm -rf "$DST_DIR/$dir.old"
+    echo ">>> installed $DST_DIR/$dir/"
+  fi
+done
 
-if (( needs_install == 0 )); then
-  echo ">>> no change; caddy reload not needed"
+applied=$(cat "$STATE_DIR/applied.sha256" 2>/dev/null || true)
+if [[ "$hash" == "$applied" ]]; then
+  echo ">>> adapted config unchanged (${hash:0:12}); caddy reload not needed"
   exit 0
 fi
 
-# `install` writes a temp file then renames atomically, so a concurrent caddy read
-# sees the old or new inode, never a partial write.
-install -m 0644 -o root -g root "$SRC" "$DST"
-echo ">>> installed $DST"
-
-# Reload over restart: it is a zero-downtime config swap via the admin API.
-# Falls back to restart if reload fails (rare, the validate above gates that).
-if systemctl reload caddy; then
-  echo ">>> reloaded caddy"
+# POST /load swaps the config in the running process (graceful, listeners kept), the
+# same path `caddy reload` takes minus a second adapt and its --force.
+# A path-scoped PATCH would not help - caddy applies every admin change as a full
+# (graceful) config load. Falls back to reload, then restart, if the API is down.
+if curl -fsS --max-time 30 -X POST -H "Content-Type: application/json" \
+    --data-binary @"$STAGE/caddy.json" "$CADDY_ADMIN/load"; then
+  echo ">>> loaded ${hash:0:12} via $CADDY_ADMIN/load"
+elif systemctl reload caddy; then
+  echo ">>> admin API load failed; reloaded caddy" >&2
 else
   echo ">>> reload failed; restarting caddy" >&2
   systemctl restart caddy
 fi
+
+install -d -m 0755 "$STATE_DIR"
+printf '%s\n' "$hash" > "$STATE_DIR/applied.sha256"
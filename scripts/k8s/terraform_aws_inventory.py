@@ -28,9 +28,7 @@ import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
-from _lib import terraform_run  # noqa: E402
-
-import boto3  # noqa: E402
+from _lib import client, terraform_run  # noqa: E402
 
 CHDIR = "terraform/aws-inventory"
 
@@ -108,8 +106,7 @@ def show_output():
 def _zone_id() -> str:
     """The coilysiren.me hosted zone id, resolved from AWS at run time so
     the opaque id never has to be checked in."""
-    client = boto3.client("route53")
-    for zone in client.list_hosted_zones()["HostedZones"]:
+    for zone in client("route53").list_hosted_zones()["HostedZones"]:
         if zone["Name"] == "coilysiren.me.":
             return zone["Id"].rsplit("/", 1)[-1]
     sys.exit("could not find the coilysiren.me hosted zone")
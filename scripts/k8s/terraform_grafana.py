@@ -13,14 +13,11 @@ import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
-from _lib import ssm, terraform_run  # noqa: E402
+from _lib import ssm_parameter, terraform_run  # noqa: E402
 
 
 def main():
-    password = ssm().get_parameter(
-        Name="/grafana/admin-password",
-        WithDecryption=True,
-    )["Parameter"]["Value"]
+    password = ssm_parameter("/grafana/admin-password")
     env = os.environ.copy()
     env["GRAFANA_URL"] = "https://grafana.coilysiren.me"
     env["GRAFANA_AUTH"] = f"admin:{password}"
@@ -5,14 +5,11 @@ import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
-from _lib import run, ssm  # noqa: E402
+from _lib import run, ssm_parameter  # noqa: E402
 
 
 def main():
-    github_token = ssm().get_parameter(
-        Name="/github/pat",
-        WithDecryption=True,
-    )["Parameter"]["Value"]
+    github_token = ssm_parameter("/github/pat")
     run("kubectl create namespace llama", warn=True)
     run(
         f"echo {github_token} | docker login ghcr.io -u coilysiren/llama --password-stdin"
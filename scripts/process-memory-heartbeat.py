@@ -1,20 +1,32 @@
 #!/usr/bin/env python3
 # Sample per-process RSS, humanize interpreter names, and push to VictoriaMetrics
-# single via OTLP/HTTP protobuf. Runs on kai-server every 30s; stdlib only.
+# single via OTLP/HTTP protobuf. Runs on kai-server as a resident --daemon
+# (Type=notify, systemd watchdog) sampling every few seconds; stdlib only.
 
 import argparse
+import http.client
 import os
 import pwd  # pylint: disable=import-error  # Unix-only stdlib; this script runs on Linux (kai-server)
 import re
+import resource  # pylint: disable=import-error  # Unix-only stdlib, as pwd
+import signal
 import socket
 import sys
+import threading
 import time
-import urllib.error
-import urllib.request
+import urllib.parse
 
 DEFAULT_URL = "http://localhost:30428/opentelemetry/v1/metrics"
 DEFAULT_TOP_N = 20
+DEFAULT_INTERVAL = 5.0
 HOSTNAME = socket.gethostname()
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+# Every this many samples a cached name is checked against /proc/<pid>/stat
+# again, so a process that exec()s (same pid and start time, new comm)
+# is renamed within a minute or so at the daemon's interval.
+REVALIDATE_EVERY = 12
+# fds kept free for everything that is not a cached statm.
+FD_HEADROOM = 64
 
 # Python entry-points where the interesting name lives in the next argv,
 # not in the `-m <runner>` token itself.
@@ -36,18 +48,40 @@ def read_cmdline(pid: int) -> list[str]:
     return [a.decode("utf-8", "replace") for a in raw.split(b"\x00")]
 
 
-def read_comm(pid: int) -> str:
-    return read_bytes(f"/proc/{pid}/comm").decode("utf-8", "replace").strip()
+def read_stat(pid: int) -> tuple[str, int] | None:
+    """(comm, start time in clock ticks since boot) from /proc/<pid>/stat."""
+    raw = read_bytes(f"/proc/{pid}/stat")
+    # comm is parenthesised and may itself hold spaces or ')'.
+    head, sep, rest = raw.rpartition(b")")
+    fields = rest.split()
+    if not sep or len(fields) < 20:
+        return None
+    # rest starts at field 3 (state); starttime is field 22.
+    return head.partition(b"(")[2].decode("utf-8", "replace"), int(fields[19])
+
+
+def read_uid(pid: int) -> int:
+    """Real uid, from the Uid: line of /proc/<pid>/status (no dict of the
+    other ~55 lines)."""
+    for line in read_bytes(f"/proc/{pid}/status").splitlines():
+        if line.startswith(b"Uid:"):
+            return int(line.split()[1])
+    return 0
 
 
-def read_status(pid: int) -> dict[str, str]:
-    raw = read_bytes(f"/proc/{pid}/status").decode("utf-8", "replace")
-    out: dict[str, str] = {}
-    for line in raw.splitlines():
-        k, sep, v = line.partition(":")
-        if sep:
-            out[k.strip()] = v.strip()
-    return out
+def raise_fd_limit() -> int:
+    """Lift the soft RLIMIT_NOFILE to the hard limit (systemd's default soft
+    limit, 1024, is below a k3s host's process count). Returns the soft
+    limit in effect."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = 1 << 16 if hard == resource.RLIM_INFINITY else hard
+    if soft != resource.RLIM_INFINITY and soft < target:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+            soft = target
+        except (ValueError, OSError):
+            pass
+    return soft
 
 
 _DIGIT_RUN = re.compile(r"\d+")
@@ -119,34 +153,126 @@ def _humanize_inner(comm: str, argv: list[str]) -> str:
     return comm
 
 
-def collect_processes() -> list[dict]:
-    procs: list[dict] = []
-    try:
-        entries = os.listdir("/proc")
-    except OSError:
-        return procs
-    for entry in entries:
-        if not entry.isdigit():
-            continue
-        pid = int(entry)
-        status = read_status(pid)
-        rss_field = status.get("VmRSS")
-        if not rss_field:
-            continue
+class Sampler:
+    """Per-process RSS from /proc, cheap to call again and again.
+
+    RSS comes from /proc/<pid>/statm: one short line, no status dict.
+    What does not change between samples is kept. Each process's statm fd
+    stays open and is re-read with pread. Its humanized name and user are
+    keyed on (pid, start time), so cmdline, status and the humanize regexes
+    are read once per process, not once per sample. uid -> user name
+    lookups are cached. An open statm fd also pins its process: once it
+    exits the fd reads ESRCH, so a reused pid is always looked up afresh.
+    An exec keeps pid and start time, so every REVALIDATE_EVERY samples the
+    comm in stat is compared again and a changed one renames the process.
+    """
+
+    def __init__(self):
+        self._fds: dict[int, int] = {}  # pid -> open statm fd
+        self._keys: dict[int, tuple[int, int]] = {}  # pid -> (pid, start) while its fd is open
+        self._names: dict[tuple[int, int], tuple[str, str, str]] = {}  # (pid, start) -> (comm, name, user)
+        self._users: dict[int, str] = {}
+        self._fd_budget = max(0, raise_fd_limit() - FD_HEADROOM)
+        self._samples = 0
+        self.humanized = 0  # name-cache misses, for --bench
+
+    @property
+    def open_fds(self) -> int:
+        return len(self._fds)
+
+    def close(self):
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds.clear()
+        self._keys.clear()
+
+    def forget(self, pid: int):
+        fd = self._fds.pop(pid, None)
+        if fd is not None:
+            os.close(fd)
+        self._keys.pop(pid, None)
+
+    def statm(self, pid: int) -> tuple[int, int] | None:
+        """(size, resident) in pages, or None once the process is gone."""
+        fd = self._fds.get(pid)
         try:
-            rss_bytes = int(rss_field.split()[0]) * 1024
-        except (ValueError, IndexError):
-            continue
-        uid_field = status.get("Uid", "0").split()[0]
+            if fd is None:
+                fd = os.open(f"/proc/{pid}/statm", os.O_RDONLY)
+                if len(self._fds) < self._fd_budget:
+                    self._fds[pid] = fd
+                else:
+                    try:
+                        return self._parse_statm(os.pread(fd, 128, 0))
+                    finally:
+                        os.close(fd)
+            return self._parse_statm(os.pread(fd, 128, 0))
+        except (OSError, ValueError):
+            self.forget(pid)
+            return None
+
+    @staticmethod
+    def _parse_statm(raw: bytes) -> tuple[int, int]:
+        size, resident = raw.split(maxsplit=2)[:2]
+        return int(size), int(resident)
+
+    def user(self, uid: int) -> str:
+        name = self._users.get(uid)
+        if name is None:
+            try:
+                name = pwd.getpwuid(uid).pw_name
+            except KeyError:
+                name = str(uid)
+            self._users[uid] = name
+        return name
+
+    def identify(self, pid: int) -> tuple[str, str] | None:
+        """(humanized name, user) for pid, reading stat only when its fd is
+        not cached and cmdline + status only for a process not seen before."""
+        key = self._keys.get(pid)
+        if key is None:
+            stat = read_stat(pid)
+            if stat is None:
+                return None
+            comm, start = stat
+            key = (pid, start)
+            cached = self._names.get(key)
+            if cached is None or cached[0] != comm:
+                self._names[key] = (comm, humanize(comm, read_cmdline(pid)), self.user(read_uid(pid)))
+                self.humanized += 1
+            if pid in self._fds:
+                self._keys[pid] = key
+        return self._names[key][1:]
+
+    def sample(self) -> list[dict]:
+        procs: list[dict] = []
         try:
-            user = pwd.getpwuid(int(uid_field)).pw_name
-        except (KeyError, ValueError):
-            user = uid_field
-        comm = read_comm(pid)
-        argv = read_cmdline(pid)
-        name = humanize(comm, argv)
-        procs.append({"pid": pid, "user": user, "rss_bytes": rss_bytes, "name": name})
-    return procs
+            entries = os.listdir("/proc")
+        except OSError:
+            return procs
+        self._samples += 1
+        if self._samples % REVALIDATE_EVERY == 0:
+            self._keys.clear()
+        seen: set[int] = set()
+        for entry in entries:
+            if not entry.isdigit():
+                continue
+            pid = int(entry)
+            pages = self.statm(pid)
+            if pages is None:
+                continue
+            seen.add(pid)
+            if not pages[0]:
+                continue  # kernel thread or zombie: no address space
+            who = self.identify(pid)
+            if who is None:
+                continue
+            procs.append({"pid": pid, "user": who[1], "rss_bytes": pages[1] * PAGE_SIZE,
+                          "name": who[0]})
+        for pid in self._fds.keys() - seen:
+            self.forget(pid)
+        for key in [k for k in self._names if k[0] not in seen]:
+            del self._names[key]
+        return procs
 
 
 def aggregate(procs: list[dict]) -> dict[tuple[str, str], int]:
@@ -301,20 +427,68 @@ def build_protobuf(
     return _len_delim(1, rm_body)
 
 
-def post_otlp(url: str, body: bytes, timeout: float = 5.0) -> tuple[int | None, bytes]:
-    req = urllib.request.Request(
-        url,
-        data=body,
-        headers={"Content-Type": "application/x-protobuf"},
-        method="POST",
-    )
+class OtlpClient:
+    """POSTs OTLP payloads over one keep-alive HTTP connection.
+
+    The connection is opened lazily and reused for every later POST, so the
+    daemon pays for TCP setup once rather than once per sample. vmsingle
+    may close an idle connection between samples; a POST on a reused
+    connection that fails that way is retried once on a fresh one.
+    """
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        parts = urllib.parse.urlsplit(url)
+        self._https = parts.scheme == "https"
+        self._host = parts.hostname or "localhost"
+        self._port = parts.port
+        self._path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self._timeout = timeout
+        self._conn: http.client.HTTPConnection | None = None
+
+    def _connect(self) -> http.client.HTTPConnection:
+        cls = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+        return cls(self._host, self._port, timeout=self._timeout)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def post(self, body: bytes) -> tuple[int | None, bytes]:
+        for attempt in (0, 1):
+            reused = self._conn is not None
+            if self._conn is None:
+                self._conn = self._connect()
+            try:
+                self._conn.request(
+                    "POST", self._path, body=body, headers={"Content-Type": "application/x-protobuf"}
+                )
+                resp = self._conn.getresponse()
+                data = resp.read()
+                if resp.will_close:
+                    self.close()
+                return resp.status, data
+            except (http.client.HTTPException, OSError) as e:
+                self.close()
+                if not reused or attempt:
+                    return None, str(e).encode()
+        return None, b""
+
+
+def sd_notify(state: str) -> bool:
+    """Send `state` (e.g. "READY=1") to systemd's $NOTIFY_SOCKET. A no-op
+    returning False outside a Type=notify unit."""
+    addr = os.environ.get("NOTIFY_SOCKET")
+    if not addr:
+        return False
+    if addr.startswith("@"):
+        addr = "\0" + addr[1:]  # abstract namespace
     try:
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            return resp.status, resp.read()
-    except urllib.error.HTTPError as e:
-        return e.code, e.read()
-    except (urllib.error.URLError, TimeoutError, socket.timeout) as e:
-        return None, str(e).encode()
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.sendto(state.encode(), addr)
+    except OSError:
+        return False
+    return True
 
 
 def render_table(agg: dict[tuple[str, str], int], top_n: int) -> str:
@@ -325,6 +499,82 @@ def render_table(agg: dict[tuple[str, str], int], top_n: int) -> str:
     return "\n".join(lines)
 
 
+def bench(samples: int) -> int:
+    """Time `samples` back-to-back samples (no POST): the first pays for
+    every name, the rest only for statm reads of known processes."""
+    sampler = Sampler()
+    costs = []
+    first_humanized = 0
+    procs: list[dict] = []
+    for i in range(samples):
+        wall, cpu = time.perf_counter(), time.process_time()
+        procs = sampler.sample()
+        costs.append(((time.perf_counter() - wall) * 1000, (time.process_time() - cpu) * 1000))
+        if i == 0:
+            first_humanized = sampler.humanized
+    sys.stdout.write(f"{len(procs)} processes, {samples} samples, {sampler.open_fds} statm fds held\n")
+    sys.stdout.write(f"first sample   {costs[0][0]:8.2f} ms wall {costs[0][1]:8.2f} ms cpu"
+                     f"  ({first_humanized} names humanized)\n")
+    rest = sorted(costs[1:])
+    if rest:
+        p50, p95 = rest[len(rest) // 2], rest[min(len(rest) - 1, int(len(rest) * 0.95))]
+        sys.stdout.write(f"later p50      {p50[0]:8.2f} ms wall {p50[1]:8.2f} ms cpu"
+                         f"  ({sampler.humanized - first_humanized} names humanized)\n")
+        sys.stdout.write(f"later p95      {p95[0]:8.2f} ms wall {p95[1]:8.2f} ms cpu\n")
+    sampler.close()
+    return 0
+
+
+def heartbeat(sampler: Sampler, client: OtlpClient, top_n: int) -> tuple[int | None, bytes]:
+    payload = build_protobuf(aggregate(sampler.sample()), read_meminfo(), top_n)
+    return client.post(payload)
+
+
+def run_daemon(url: str, top_n: int, interval: float) -> int:
+    """Sample and POST every `interval` seconds until SIGTERM.
+
+    Ticks are at a fixed rate from start, not `interval` after the last POST
+    finished; a tick that overruns skips the ones it missed. The watchdog is
+    pinged after every tick whether or not the POST landed: a vmsingle
+    outage is not something a restart fixes, a wedged loop is.
+    """
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    sampler = Sampler()
+    client = OtlpClient(url)
+    failing = False
+    ticks = 0
+    next_tick = time.monotonic()
+    try:
+        while not stop.is_set():
+            status, body = heartbeat(sampler, client, top_n)
+            ok = status is not None and status < 400
+            if ok == failing:  # log transitions, not every tick of an outage
+                failing = not ok
+                sys.stderr.write(
+                    f"process-memory-heartbeat: OTLP POST failed status={status} body={body[:200]!r}\n"
+                    if failing else "process-memory-heartbeat: OTLP POST recovered\n"
+                )
+            # READY after the first tick, so `systemctl start` returns once
+            # the caches are warm and the first sample is in.
+            sd_notify(
+                ("WATCHDOG=1\n" if ticks else "READY=1\nWATCHDOG=1\n")
+                + f"STATUS={'failing' if failing else 'ok'}, {sampler.open_fds} statm fds, every {interval:g}s"
+            )
+            ticks += 1
+            next_tick += interval
+            now = time.monotonic()
+            if next_tick < now:
+                next_tick = now + interval - (now - next_tick) % interval
+            stop.wait(next_tick - now)
+    finally:
+        sd_notify("STOPPING=1")
+        client.close()
+        sampler.close()
+    return 0
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="process memory heartbeat -> vmsingle (OTLP)")
     parser.add_argument("--url", default=os.environ.get("VMSINGLE_OTLP_URL", DEFAULT_URL))
@@ -336,9 +586,35 @@ def main() -> int:
         action="store_true",
         help="print humanized table + OTLP payload, skip POST",
     )
+    parser.add_argument(
+        "--bench",
+        type=int,
+        nargs="?",
+        const=20,
+        metavar="N",
+        help="time N samples (default 20) and report per-sample cost, skip POST",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="stay resident and push a sample every --interval seconds (systemd Type=notify)",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=float(os.environ.get("PROCESS_SAMPLE_INTERVAL", DEFAULT_INTERVAL)),
+        help=f"seconds between --daemon samples (default {DEFAULT_INTERVAL:g})",
+    )
     args = parser.parse_args()
 
-    procs = collect_processes()
+    if args.bench:
+        return bench(args.bench)
+    if args.daemon:
+        if args.interval <= 0:
+            parser.error("--interval must be positive")
+        return run_daemon(args.url, args.top, args.interval)
+
+    procs = Sampler().sample()
     agg = aggregate(procs)
     meminfo = read_meminfo()
     payload = build_protobuf(agg, meminfo, args.top)
@@ -348,7 +624,9 @@ def main() -> int:
         sys.stdout.write(f"OTLP protobuf payload: {len(payload)} bytes\n")
         return 0
 
-    status, body = post_otlp(args.url, payload)
+    client = OtlpClient(args.url)
+    status, body = client.post(payload)
+    client.close()
     if status is None or status >= 400:
         sys.stderr.write(
             f"process-memory-heartbeat: OTLP POST failed status={status} body={body[:200]!r}\n"
@@ -0,0 +1,54 @@
+#!/usr/bin/env bash
+# Install the repo watch as a launchd agent on a Mac. Idempotent.
+# Usage: [--uninstall]. See docs/repo-watch.md.
+
+set -euo pipefail
+
+REPO_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+LABEL="me.coilysiren.repo-watch"
+INSTALL_DIR="${HOME}/.local/share/repo-watch"
+PLIST_DST="${HOME}/Library/LaunchAgents/${LABEL}.plist"
+
+UNINSTALL=0
+while [[ $# -gt 0 ]]; do
+  case "$1" in
+    --uninstall) UNINSTALL=1; shift ;;
+    *) echo "unknown arg: $1" >&2; exit 2 ;;
+  esac
+done
+
+if [[ "${UNINSTALL}" == "1" ]]; then
+  echo "==> unload + remove launchd agent"
+  launchctl unload "${PLIST_DST}" 2>/dev/null || true
+  rm -f "${PLIST_DST}"
+  echo "==> remove install dir ${INSTALL_DIR}"
+  rm -rf "${INSTALL_DIR}"
+  echo "done. the git sweep falls back to running git status everywhere."
+  exit 0
+fi
+
+# --- provision the install dir + venv --------------------------------
+echo "==> install script + venv into ${INSTALL_DIR}"
+mkdir -p "${INSTALL_DIR}"
+install -m 0755 "${REPO_DIR}/scripts/repo-watch.py" "${INSTALL_DIR}/repo-watch.py"
+if [[ ! -d "${INSTALL_DIR}/venv" ]]; then
+  uv venv "${INSTALL_DIR}/venv"
+fi
+uv pip install --python "${INSTALL_DIR}/venv/bin/python" --quiet watchdog
+
+# --- render the plist from the repo template ------------------------
+echo "==> render launchd plist -> ${PLIST_DST}"
+mkdir -p "$(dirname "${PLIST_DST}")"
+sed -e "s|{{HOME}}|${HOME}|g" \
+    "${REPO_DIR}/scripts/launchd/${LABEL}.plist" > "${PLIST_DST}"
+
+# --- (re)load --------------------------------------------------------
+echo "==> launchctl reload"
+launchctl unload "${PLIST_DST}" 2>/dev/null || true
+launchctl load "${PLIST_DST}"
+
+echo
+echo "Verify with:"
+echo "  launchctl list | grep repo-watch"
+echo "  tail -f ~/Library/Logs/repo-watch.log"
+echo "  cat ~/.cache/infrastructure/repo_watch.json"
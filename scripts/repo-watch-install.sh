@@ -0,0 +1,51 @@
+#!/usr/bin/env bash
+# Install the repo watch as a systemd unit on a Linux host. Run as kai.
+# Usage: [--uninstall]. See docs/repo-watch.md.
+
+set -euo pipefail
+
+REPO_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+INSTALL_DIR="${HOME}/.local/share/repo-watch"
+UNIT_DST="/etc/systemd/system/repo-watch.service"
+
+UNINSTALL=0
+while [[ $# -gt 0 ]]; do
+  case "$1" in
+    --uninstall) UNINSTALL=1; shift ;;
+    *) echo "unknown arg: $1" >&2; exit 2 ;;
+  esac
+done
+
+if [[ "${UNINSTALL}" == "1" ]]; then
+  echo "==> stop + disable unit"
+  sudo systemctl disable --now repo-watch.service 2>/dev/null || true
+  sudo rm -f "${UNIT_DST}"
+  sudo systemctl daemon-reload
+  echo "==> remove install dir ${INSTALL_DIR}"
+  rm -rf "${INSTALL_DIR}"
+  echo "done. the git sweep falls back to running git status everywhere."
+  exit 0
+fi
+
+# --- provision the install dir + venv --------------------------------
+echo "==> install script + venv into ${INSTALL_DIR}"
+mkdir -p "${INSTALL_DIR}"
+install -m 0755 "${REPO_DIR}/scripts/repo-watch.py" "${INSTALL_DIR}/repo-watch.py"
+if [[ ! -d "${INSTALL_DIR}/venv" ]]; then
+  uv venv "${INSTALL_DIR}/venv"
+fi
+uv pip install --python "${INSTALL_DIR}/venv/bin/python" --quiet watchdog
+
+# --- install + enable the unit ---------------------------------------
+echo "==> install unit + enable --now"
+sudo install -m 0644 "${REPO_DIR}/systemd/repo-watch.service" "${UNIT_DST}"
+sudo systemctl daemon-reload
+sudo systemctl enable --now repo-watch.service
+
+echo
+echo "==> status"
+sudo systemctl --no-pager status repo-watch.service | head -10 || true
+echo
+echo "Verify with:"
+echo "  journalctl -u repo-watch.service -n 50 --no-pager -f"
+echo "  cat ~/.cache/infrastructure/repo_watch.json"
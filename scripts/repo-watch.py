@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Per-machine watcher: records which checkouts under ~/projects/<org>/ saw
+working-tree events, so the ansible git sweep can skip `git status` on the
+quiet ones. See docs/repo-watch.md.
+"""
+
+import argparse
+import json
+import logging
+import os
+import pathlib
+import signal
+import sys
+import threading
+import time
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+LOG = logging.getLogger("repo-watch")
+
+# Bump together with WATCH_SCHEMA in ansible/library/repo_status.py.
+SCHEMA = 1
+FLUSH_SECS = 2.0
+# repo_status distrusts an index whose heartbeat is older than 120s, so the
+# daemon rewrites it well inside that even when nothing changed.
+HEARTBEAT_SECS = 30.0
+# Reads are not changes: `git status` itself opens every tracked file.
+IGNORED_EVENTS = ("opened", "closed_no_write")
+
+
+def default_index() -> pathlib.Path:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return pathlib.Path(base) / "infrastructure" / "repo_watch.json"
+
+
+class RepoEventHandler(FileSystemEventHandler):
+    """Stamps the checkout (`<root>/<org>/<repo>`) each event lands in.
+
+    Events inside `.git/` are dropped: they are the sweep's own fetches and
+    index refreshes, and the sweep already fingerprints `.git` itself. Only
+    the working tree - what `git status` reads - is this index's business.
+    """
+
+    def __init__(self, root: pathlib.Path, events: dict, lock: threading.Lock):
+        self._root = root
+        self._events = events
+        self._lock = lock
+
+    def _repo_of(self, path: str):
+        try:
+            parts = pathlib.PurePath(path).relative_to(self._root).parts
+        except ValueError:
+            return None
+        if len(parts) < 3 or parts[2] == ".git":
+            return None
+        return str(self._root / parts[0] / parts[1])
+
+    def on_any_event(self, event):
+        if event.event_type in IGNORED_EVENTS:
+            return
+        now = time.time()
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            repo = self._repo_of(path) if path else None
+            if repo:
+                with self._lock:
+                    self._events[repo] = now
+
+
+def write_index(path: pathlib.Path, root: pathlib.Path, started: float, events: dict):
+    """Write-then-rename so the sweep never reads a torn file."""
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    data = {
+        "schema": SCHEMA,
+        "pid": os.getpid(),
+        "root": str(root),
+        "started": started,
+        "heartbeat": time.time(),
+        "repos": events,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def run(root: pathlib.Path, index: pathlib.Path) -> int:
+    """Observe `root` recursively and keep `index` current until stopped.
+    The index is deleted on a clean stop; a crash leaves it to go stale, and
+    either way the sweep falls back to running `git status` everywhere."""
+    events: dict = {}
+    lock = threading.Lock()
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    # `started` is taken before the observer is live, so a consumer comparing
+    # it against its last status run never trusts a window the watch missed.
+    started = time.time()
+    observer = Observer()
+    observer.schedule(RepoEventHandler(root, events, lock), str(root), recursive=True)
+    try:
+        observer.start()
+    except OSError as exc:
+        # Typically the inotify watch limit on a big tree
+        # (fs.inotify.max_user_watches); no index beats a partial one.
+        LOG.error("cannot watch %s: %s", root, exc)
+        return 1
+
+    LOG.info("watching %s -> %s", root, index)
+    written = {}
+    last_write = 0.0
+    try:
+        while not stop.is_set():
+            with lock:
+                snapshot = dict(events)
+            if snapshot != written or time.time() - last_write >= HEARTBEAT_SECS:
+                try:
+                    write_index(index, root, started, snapshot)
+                    written, last_write = snapshot, time.time()
+                except OSError as exc:
+                    LOG.warning("index write failed: %s", exc)
+            stop.wait(FLUSH_SECS)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        LOG.info("shutting down")
+        observer.stop()
+        observer.join(timeout=5)
+        index.unlink(missing_ok=True)
+    return 0
+
+
+def main() -> int:
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(message)s",
+        stream=sys.stdout,
+    )
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--root", default=os.environ.get("REPO_WATCH_ROOT", "~/projects"),
+        help="directory holding the <org>/<repo> checkouts (default ~/projects)")
+    parser.add_argument(
+        "--index", default=os.environ.get("REPO_WATCH_INDEX", ""),
+        help="index path (default $XDG_CACHE_HOME/infrastructure/repo_watch.json)")
+    args = parser.parse_args()
+
+    # Resolved so the keys match repo_status's realpath'd checkouts (macOS
+    # FSEvents reports resolved paths).
+    root = pathlib.Path(args.root).expanduser().resolve()
+    if not root.is_dir():
+        LOG.error("repo root %s does not exist", root)
+        return 2
+    index = pathlib.Path(args.index).expanduser() if args.index else default_index()
+    return run(root, index)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# Local stand-in for the session-sink ingest API, for exercising
+# claude-session-watcher.py without kai-server. Stores uploads under
+# <root>/<machine>/<relpath> and counts what it received (on the wire and
+# after gzip decoding). Also takes the watcher's --stream frames. Stdlib only.
+# See docs/claude-session-watcher.md ("The POST contract").
+
+import argparse
+import email.parser
+import email.policy
+import gzip
+import hashlib
+import json
+import os
+import pathlib
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Sink:
+    """Storage + counters shared by the handler threads."""
+
+    def __init__(self, root: pathlib.Path):
+        self.root = root
+        self.lock = threading.Lock()
+        self.stats = {"connections": 0, "requests": 0, "bytes": 0, "raw_bytes": 0, "ingest": 0,
+                      "append": 0, "batch": 0, "stream": 0, "frames": 0, "files": 0,
+                      "conflicts": 0}
+
+    def target(self, machine: str, relpath: str) -> pathlib.Path | None:
+        """<root>/<machine>/<relpath>, or None if either would escape root."""
+        parts = pathlib.PurePosixPath(relpath).parts
+        if not parts or parts[0] == "/" or ".." in parts:
+            return None
+        if not machine or "/" in machine or machine.startswith("."):
+            return None
+        return self.root / machine / pathlib.Path(*parts)
+
+    def count(self, kind: str, wire: int, raw: int):
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats[kind] += 1
+            self.stats["bytes"] += wire
+            self.stats["raw_bytes"] += raw
+
+    def store(self, machine: str, item: dict) -> tuple[int, dict]:
+        """Apply one upload ({relpath, file, sha256, offset}); offset 0
+        replaces, anything else appends. Only appends when we hold exactly
+        `offset` bytes; 409 + our size otherwise, so the watcher resends
+        the whole file. With `replay` (stream frames), bytes we already hold
+        are accepted when they match, so a resumed stream can overlap."""
+        target = self.target(machine, item["relpath"])
+        chunk = item["file"]
+        offset = item["offset"]
+        if chunk is None or target is None:
+            return 400, {"error": "machine, relpath and file are required"}
+        if item["sha256"] and hashlib.sha256(chunk).hexdigest() != item["sha256"]:
+            return 400, {"error": "sha256 mismatch"}
+        with self.lock:
+            self.stats["files"] += 1
+            if not offset:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+                tmp.write_bytes(chunk)
+                os.replace(tmp, target)
+                return 200, {"size": len(chunk)}
+            size = target.stat().st_size if target.exists() else 0
+            if item.get("replay") and offset < size:
+                with target.open("rb") as fh:
+                    fh.seek(offset)
+                    held = fh.read(min(size - offset, len(chunk)))
+                if held == chunk[:len(held)]:
+                    chunk, offset = chunk[len(held):], size
+            if offset != size:
+                self.stats["conflicts"] += 1
+                return 409, {"error": "offset mismatch", "size": size}
+            with target.open("ab") as fh:
+                fh.write(chunk)
+            return 200, {"size": size + len(chunk)}
+
+
+def parse_multipart(content_type: str, body: bytes) -> dict[str, bytes]:
+    """{field name: raw bytes} for a multipart/form-data body."""
+    msg = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        b"Content-Type: " + content_type.encode("latin-1") + b"\r\n\r\n" + body)
+    fields = {}
+    for part in msg.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        if name:
+            fields[name] = part.get_payload(decode=True) or b""
+    return fields
+
+
+class Handler(BaseHTTPRequestHandler):
+    """POST /ingest (whole file), POST /append (delta at offset), POST /batch
+    (several of either in one body), POST /stream (chunked frames, acked as
+    they land), GET /stats. Bodies may be gzip-encoded, except the stream."""
+
+    sink: Sink  # set on the subclass built in main()
+    # Keep-alive, so a pooled client reuses one connection (every reply
+    # carries Content-Length).
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.sink.lock:
+            self.sink.stats["connections"] += 1
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        sys.stderr.write(f"{self.address_string()} {format % args}\n")
+
+    def reply(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/stats":
+            self.reply(404, {"error": "not found"})
+            return
+        with self.sink.lock:
+            self.reply(200, dict(self.sink.stats))
+
+    def do_POST(self):
+        kind = self.path.rstrip("/").rsplit("/", 1)[-1]
+        if kind not in ("ingest", "append", "batch", "stream"):
+            self.reply(404, {"error": "not found"})
+            return
+        if kind == "stream":
+            self.stream(self.headers.get("X-Session-Machine", ""))
+            return
+        wire = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        body = wire
+        if self.headers.get("Content-Encoding", "").lower() == "gzip":
+            try:
+                body = gzip.decompress(wire)
+            except (OSError, EOFError):
+                self.reply(400, {"error": "bad gzip body"})
+                return
+        self.sink.count(kind, len(wire), len(body))
+        fields = parse_multipart(self.headers.get("Content-Type", ""), body)
+        text = {k: v.decode("utf-8", "replace") for k, v in fields.items() if not k.startswith("file")}
+        machine = text.get("machine", "")
+        if kind != "batch":
+            self.reply(*self.sink.store(machine, {
+                "relpath": text.get("relpath", ""),
+                "file": fields.get("file"),
+                "sha256": text.get("sha256", ""),
+                "offset": int(text.get("offset", "-1")) if kind == "append" else 0,
+            }))
+            return
+        # One multipart body, items indexed: relpath.N, offset.N, sha256.N,
+        # file.N. Each item succeeds or fails on its own.
+        results = []
+        i = 0
+        while f"relpath.{i}" in text:
+            status, payload = self.sink.store(machine, {
+                "relpath": text[f"relpath.{i}"],
+                "file": fields.get(f"file.{i}"),
+                "sha256": text.get(f"sha256.{i}", ""),
+                "offset": int(text.get(f"offset.{i}", "0")),
+            })
+            results.append({"status": status, **payload})
+            i += 1
+        self.reply(200, {"results": results})
+
+
+    def chunks(self):
+        """The chunked request body, one chunk at a time."""
+        while size := int(self.rfile.readline().split(b";")[0].strip() or b"0", 16):
+            chunk = self.rfile.read(size)
+            self.rfile.readline()
+            yield chunk
+        self.rfile.readline()
+
+    def stream(self, machine: str):
+        """Frames are a JSON header line ({relpath, offset, length, sha256},
+        or {} for a heartbeat) then `length` raw bytes. Reply headers go out
+        at once; one ack line per frame follows on the chunked response as
+        each is stored, while the request body is still open."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self.sink.count("stream", 0, 0)
+        buf = b""
+        for chunk in self.chunks():
+            buf += chunk
+            while (newline := buf.find(b"\n")) >= 0:
+                header = json.loads(buf[:newline])
+                end = newline + 1 + int(header.get("length", 0))
+                if len(buf) < end:
+                    break
+                data, buf = buf[newline + 1:end], buf[end:]
+                ack = {}
+                if "relpath" in header:
+                    with self.sink.lock:
+                        self.sink.stats["frames"] += 1
+                        self.sink.stats["bytes"] += end
+                        self.sink.stats["raw_bytes"] += len(data)
+                    status, payload = self.sink.store(machine, {
+                        "relpath": header["relpath"], "file": data,
+                        "sha256": header.get("sha256", ""),
+                        "offset": int(header.get("offset", 0)), "replay": True})
+                    ack = {"relpath": header["relpath"], "status": status, **payload}
+                line = json.dumps(ack).encode() + b"\n"
+                self.wfile.write(b"%x\r\n%b\r\n" % (len(line), line))
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local stand-in for the session-sink ingest API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9999)
+    parser.add_argument("--root", default="session-sink", help="where uploads are stored")
+    args = parser.parse_args()
+
+    handler = type("SinkHandler", (Handler,), {"sink": Sink(pathlib.Path(args.root).resolve())})
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    print(f"session-sink stand-in on http://{args.host}:{args.port}/ingest -> {args.root}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
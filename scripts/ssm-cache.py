@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# Short-TTL local cache for SSM parameter values (tokens, DSNs), so repeated
+# lookups in one sync skip the AWS CLI + SSM round trip. Stdlib only, so the
+# shell callers (Makefile, mirror scripts) need no venv. See docs/ssm-cache.md.
+
+import argparse
+import hashlib
+import json
+import os
+import stat
+import subprocess
+import sys
+import time
+
+# Default seconds a fetched value is reused. SSM_CACHE_TTL overrides it for
+# every entry point (this CLI, _lib.ssm_parameter, repo_registry); 0 disables.
+DEFAULT_TTL = 900
+
+
+def default_ttl() -> int:
+    try:
+        return max(0, int(os.environ.get("SSM_CACHE_TTL", DEFAULT_TTL)))
+    except ValueError:
+        return DEFAULT_TTL
+
+
+def cache_dir() -> str | None:
+    """$XDG_RUNTIME_DIR (per-user tmpfs, gone at logout) when the session has
+    one; on macOS, which has none, the per-user 0700 $TMPDIR. Otherwise None
+    and nothing is cached: a shared /tmp must not hold a plaintext token."""
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime:
+        return os.path.join(runtime, "infrastructure-ssm")
+    tmpdir = os.environ.get("TMPDIR")
+    if sys.platform == "darwin" and tmpdir:
+        return os.path.join(tmpdir, "infrastructure-ssm")
+    return None
+
+
+def private_dir() -> str | None:
+    """The cache dir, created 0700, or None if there is no runtime dir or it
+    is not a real directory owned by us with no group/other access - then
+    nothing is cached."""
+    path = cache_dir()
+    if not path:
+        return None
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        st = os.lstat(path)
+    except OSError:
+        return None
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        return None
+    return path
+
+
+def entry_path(directory: str, name: str, decrypt: bool = True) -> str:
+    # Hashed so a parameter path never becomes a path on disk. A lookup
+    # without decryption is its own entry: for a SecureString it is the
+    # ciphertext, not the value.
+    key = name if decrypt else f"{name}\0plain"
+    return os.path.join(directory, hashlib.sha256(key.encode()).hexdigest()[:32] + ".json")
+
+
+def read(name: str, decrypt: bool = True) -> str | None:
+    """The cached value of `name` if present, private and unexpired."""
+    directory = private_dir()
+    if not directory:
+        return None
+    try:
+        fd = os.open(entry_path(directory, name, decrypt), os.O_RDONLY | os.O_NOFOLLOW)
+    except OSError:
+        return None
+    with os.fdopen(fd, encoding="utf-8") as handle:
+        st = os.fstat(handle.fileno())
+        if st.st_uid != os.getuid() or st.st_mode & 0o077:
+            return None
+        try:
+            entry = json.load(handle)
+        except ValueError:
+            return None
+    if (not isinstance(entry, dict) or entry.get("name") != name
+            or entry.get("decrypt", True) != decrypt or entry.get("expires", 0) <= time.time()):
+        return None
+    return entry.get("value") or None
+
+
+def write(name: str, value: str, ttl: int, decrypt: bool = True):
+    """Create-exclusive 0600 temp file, then rename over the entry. A failed
+    write only costs the next lookup its round trip."""
+    directory = private_dir()
+    if not directory or ttl <= 0:
+        return
+    path = entry_path(directory, name, decrypt)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump({"name": name, "decrypt": decrypt, "value": value,
+                       "expires": time.time() + ttl}, handle)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+def forget(names: list[str]) -> int:
+    """Drop the named entries (with and without decryption), or every entry
+    when none are named."""
+    directory = private_dir()
+    if not directory:
+        return 0
+    paths = [entry_path(directory, n, d) for n in names for d in (True, False)] if names else [
+        os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(".json")
+    ]
+    dropped = 0
+    for path in paths:
+        try:
+            os.unlink(path)
+            dropped += 1
+        except OSError:
+            pass
+    return dropped
+
+
+def fetch(name: str, decrypt: bool) -> str | None:
+    cmd = ["aws", "ssm", "get-parameter", "--name", name,
+           "--query", "Parameter.Value", "--output", "text"]
+    if decrypt:
+        cmd.append("--with-decryption")
+    try:
+        r = subprocess.run(cmd, capture_output=True, text=True, check=False)
+    except OSError as exc:
+        print(f"ssm-cache: {exc}", file=sys.stderr)
+        return None
+    value = r.stdout.strip()
+    if r.returncode != 0 or not value:
+        print(f"ssm-cache: {name}: {r.stderr.strip() or 'empty value'}", file=sys.stderr)
+        return None
+    return value
+
+
+def get(name: str, ttl: int, decrypt: bool = True) -> str | None:
+    value = read(name, decrypt) if ttl > 0 else None
+    if value is None:
+        value = fetch(name, decrypt)
+        if value is not None:
+            write(name, value, ttl, decrypt)
+    return value
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Cached SSM parameter lookups.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    get_cmd = sub.add_parser("get", help="print a parameter's value")
+    get_cmd.add_argument("name", help="SSM parameter name, e.g. /forgejo/api-token")
+    get_cmd.add_argument("--ttl", type=int, default=default_ttl(),
+                         help=f"seconds to reuse a fetched value (default $SSM_CACHE_TTL or {DEFAULT_TTL})")
+    get_cmd.add_argument("--no-decryption", action="store_true",
+                         help="fetch a plain String parameter without --with-decryption")
+    forget_cmd = sub.add_parser("forget", help="drop cached values (all when no name is given)")
+    forget_cmd.add_argument("names", nargs="*")
+    args = parser.parse_args()
+
+    if args.command == "forget":
+        print(f"dropped {forget(args.names)} cached value(s)")
+        return 0
+    value = get(args.name, args.ttl, decrypt=not args.no_decryption)
+    if value is None:
+        return 1
+    print(value)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())